@@ -1,7 +1,21 @@
-from .core.main import generate_test_data
+import sys
 
 
 __version__ = '1.1.2'
 
 
-__all__ = ["generate_test_data"]
\ No newline at end of file
+__all__ = ["generate_test_data"]
+
+
+def __getattr__(name):
+    # The generators are imported on the first use, so that loading the app
+    # (and the management commands) doesn't import them.
+    if name == "generate_test_data":
+        from .core.main import generate_test_data
+        return generate_test_data
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+if sys.version_info < (3, 7):
+    # Module attributes can't be lazy before python 3.7.
+    from .core.main import generate_test_data  # noqa: F401
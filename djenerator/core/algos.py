@@ -12,27 +12,98 @@ def topological_sort(models: list, dependencies_func) -> list:
     non_leafs = list(filter(dependencies_func, models))
 
     def visit(model):
-        if model not in visited:
-            if model in pending:
-                return [model]
-            pending.add(model)
-            for dep_model in dependencies_func(model):
-                cycle = visit(dep_model)
-                if cycle:
-                    cycle.append(model)
-                    return cycle
-            visited.add(model)
-            pending.remove(model)
-            result.append(model)
+        # A depth first search with an explicit stack, as the chains of
+        # dependencies can be deeper than the recursion limit.
+        stack = [(model, iter(dependencies_func(model)))]
+        path = [model]
+        pending.add(model)
+        while stack:
+            node, deps = stack[-1]
+            dep_model = next(deps, None)
+            if dep_model is None:
+                stack.pop()
+                path.pop()
+                pending.remove(node)
+                visited.add(node)
+                result.append(node)
+            elif dep_model in pending:
+                return [dep_model] + path[path.index(dep_model):][::-1]
+            elif dep_model not in visited:
+                pending.add(dep_model)
+                path.append(dep_model)
+                stack.append((dep_model, iter(dependencies_func(dep_model))))
 
     while non_leafs:
         model = non_leafs.pop()
-        cycle = visit(model)
-        if cycle:
-            return [], cycle
-
-    result_singleton = []
-    for model in models:
-        if model not in result:
-            result_singleton.append(model)
+        if model not in visited:
+            cycle = visit(model)
+            if cycle:
+                return [], cycle
+
+    result_singleton = [model for model in models if model not in visited]
     return result_singleton + result, []
+
+
+def generation_plan(models: list, dependencies_func,
+                    closure_func=None) -> tuple:
+    """
+    Plan the generation of some models, with Kahn's algorithm: every model
+    comes after the models it depends on.
+
+    :param List models: A list of model class references.
+    :param dependencies_func:
+        A function giving the models a model depends on.
+    :param closure_func:
+        A function giving the models to generate with a model, if they are
+        more than its dependencies (by default, dependencies_func).
+    :returns:
+        The models to generate in order, the levels of the models (the
+        models of a level depend only on the models of the previous levels),
+        and a cycle of dependencies if any, in which case the order and the
+        levels are empty.
+    """
+    closure_func = closure_func or dependencies_func
+    nodes = list(dict.fromkeys(models))
+    seen = set(nodes)
+    deps = {}
+    for model in nodes:
+        deps[model] = list(dict.fromkeys(dependencies_func(model)))
+        for dep_model in deps[model] + list(closure_func(model)):
+            if dep_model not in seen:
+                seen.add(dep_model)
+                nodes.append(dep_model)
+
+    dependents = dict((model, []) for model in nodes)
+    remaining = {}
+    for model in nodes:
+        remaining[model] = len(deps[model])
+        for dep_model in deps[model]:
+            dependents[dep_model].append(model)
+
+    level = dict((model, 0) for model in nodes if not remaining[model])
+    order = [model for model in nodes if not remaining[model]]
+    for model in order:
+        for dependent in dependents[model]:
+            remaining[dependent] -= 1
+            if not remaining[dependent]:
+                level[dependent] = 1 + max(
+                    level[dep_model] for dep_model in deps[dependent]
+                )
+                order.append(dependent)
+
+    if len(order) < len(nodes):
+        # Every remaining model depends on a remaining model, following them
+        # ends in a cycle.
+        model = next(model for model in nodes if remaining[model])
+        path = []
+        while model not in path:
+            path.append(model)
+            model = next(
+                dep_model for dep_model in deps[model] if remaining[dep_model]
+            )
+        return [], [], path[path.index(model):] + [model]
+
+    levels = [[] for _ in range(max(level.values(), default=-1) + 1)]
+    for model in order:
+        levels[level[model]].append(model)
+    return order, levels, []
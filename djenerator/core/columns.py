@@ -0,0 +1,188 @@
+"""
+This module has the columnar storage of the generated values of a model.
+The values of a column are stored in a typed array when they have a common
+type: integers, floats and booleans as such, datetimes and dates as integers
+(microseconds since the epoch, days), strings as UTF-8 bytes with an array
+of offsets. The nulls of a typed column are marked in a mask. The other
+columns are lists of the values. The rows are only materialised as dicts
+when they are inserted with the ORM.
+"""
+import array
+import datetime
+from collections.abc import Sequence
+
+
+EPOCH = datetime.datetime(1970, 1, 1)
+
+UTC_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+MICROSECOND = datetime.timedelta(microseconds=1)
+
+
+class Column(Sequence):
+    """
+    The values of a column, either in a typed array, or in a list if their
+    types are mixed (in which case kind is "object"). Assigning a value that
+    doesn't fit the array of the column converts the column to a list.
+    """
+    def __init__(self, values: list):
+        values = list(values)
+        self.kind = column_kind(values)
+        self.nulls = None
+        if None in values and self.kind != "object":
+            self.nulls = bytearray(value is None for value in values)
+        if self.kind == "object":
+            self.data = values
+        elif self.kind == "str":
+            encoded = [
+                (value or "").encode(errors="surrogatepass")
+                for value in values
+            ]
+            self.offsets = array.array("Q", [0])
+            for value in encoded:
+                self.offsets.append(self.offsets[-1] + len(value))
+            self.data = b"".join(encoded)
+            # The assigned strings, by their indices.
+            self.changed = {}
+        else:
+            if self.kind == "datetime":
+                self.tzinfo = next(
+                    value for value in values if value is not None
+                ).tzinfo
+            self.data = array.array(TYPECODES[self.kind], [
+                self.encode(value) if value is not None else 0
+                for value in values
+            ])
+
+    def __len__(self):
+        if self.kind == "str":
+            return len(self.offsets) - 1
+        return len(self.data)
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def __getitem__(self, idx: int):
+        if self.kind == "object":
+            return self.data[idx]
+        if idx < 0:
+            idx += len(self)
+        if self.nulls is not None and self.nulls[idx]:
+            return None
+        if self.kind == "str":
+            if idx in self.changed:
+                return self.changed[idx]
+            return self.data[self.offsets[idx]:self.offsets[idx + 1]].decode(
+                errors="surrogatepass"
+            )
+        return self.decode(self.data[idx])
+
+    def __setitem__(self, idx: int, value):
+        if self.kind != "object":
+            if value is not None and column_kind([value]) != self.kind or (
+                self.kind == "datetime" and value is not None and
+                value.tzinfo is not self.tzinfo
+            ):
+                self.data, self.kind, self.nulls = list(self), "object", None
+            elif value is None or self.nulls is not None:
+                if self.nulls is None:
+                    self.nulls = bytearray(len(self))
+                self.nulls[idx] = value is None
+        if self.kind == "object":
+            self.data[idx] = value
+        elif self.kind == "str":
+            self.changed[idx] = value
+        elif value is not None:
+            self.data[idx] = self.encode(value)
+
+    def encode(self, value):
+        if self.kind == "datetime":
+            epoch = EPOCH if value.tzinfo is None else UTC_EPOCH
+            return (value - epoch) // MICROSECOND
+        elif self.kind == "date":
+            return value.toordinal()
+        return value
+
+    def decode(self, value):
+        if self.kind == "datetime":
+            if self.tzinfo is None:
+                return EPOCH + value * MICROSECOND
+            return (UTC_EPOCH + value * MICROSECOND).astimezone(self.tzinfo)
+        elif self.kind == "date":
+            return datetime.date.fromordinal(value)
+        elif self.kind == "bool":
+            return bool(value)
+        return value
+
+
+# The typecodes of the arrays of the kinds of columns.
+TYPECODES = {
+    "int": "q", "float": "d", "bool": "b", "datetime": "q", "date": "q",
+}
+
+# The kinds of the columns of the types of values.
+TYPE_KINDS = {
+    int: "int", float: "float", bool: "bool", str: "str",
+    datetime.datetime: "datetime", datetime.date: "date",
+}
+
+INT64_RANGE = range(-2 ** 63, 2 ** 63)
+
+
+def column_kind(values: list) -> str:
+    """
+    The kind of the column of some values, "object" if they don't have a
+    common type that can be stored in an array, or if they are all None.
+    """
+    types = set(type(value) for value in values if value is not None)
+    if len(types) != 1:
+        return "object"
+    kind = TYPE_KINDS.get(types.pop(), "object")
+    if kind == "int" and not all(
+        value in INT64_RANGE for value in values if value is not None
+    ):
+        return "object"
+    if kind == "datetime" and len(set(
+        value.tzinfo for value in values if value is not None
+    )) != 1:
+        return "object"
+    return kind
+
+
+class ColumnBatch(object):
+    """
+    The generated columns of a model, by the names of the columns.
+    """
+    def __init__(self):
+        self.columns = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def __getitem__(self, name: str) -> Column:
+        return self.columns[name]
+
+    def __setitem__(self, name: str, values):
+        self.columns[name] = Column(values)
+
+    def keys(self):
+        return self.columns.keys()
+
+    def row(self, idx: int) -> dict:
+        """
+        Materialise a row as a dict of the values by the column names.
+        """
+        return dict(
+            (name, column[idx]) for name, column in self.columns.items()
+        )
+
+    def rows(self, indices):
+        """
+        Materialise the rows of some indices one by one.
+        """
+        for idx in indices:
+            yield self.row(idx)
@@ -0,0 +1,295 @@
+"""
+This module compiles the constraints of a model (Meta.constraints and
+Meta.unique_together) into python predicates, that are evaluated on the
+generated rows before inserting them in the database. Expressions that
+can't be compiled are left to be checked by the database.
+"""
+import operator
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import F, Q
+
+try:
+    from django.db.models import CheckConstraint, UniqueConstraint
+except ImportError:
+    CheckConstraint = UniqueConstraint = None
+try:
+    from django.db.models.expressions import CombinedExpression, Value
+except ImportError:
+    CombinedExpression = Value = None
+
+from .utils import field_name
+
+
+class UnsupportedExpression(Exception):
+    pass
+
+
+def _normalize(value):
+    """
+    Model instances are compared by their primary keys.
+    """
+    if hasattr(value, "_meta") and hasattr(value, "pk"):
+        return value.pk
+    return value
+
+
+def _lower(value):
+    return value.lower() if isinstance(value, str) else value
+
+
+LOOKUPS = {
+    "exact": operator.eq,
+    "iexact": lambda a, b: _lower(a) == _lower(b),
+    "lt": operator.lt,
+    "lte": operator.le,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "in": lambda a, b: a in b,
+    "range": lambda a, b: b[0] <= a <= b[1],
+    "contains": lambda a, b: str(b) in str(a),
+    "icontains": lambda a, b: str(b).lower() in str(a).lower(),
+    "startswith": lambda a, b: str(a).startswith(str(b)),
+    "istartswith": lambda a, b: str(a).lower().startswith(str(b).lower()),
+    "endswith": lambda a, b: str(a).endswith(str(b)),
+    "iendswith": lambda a, b: str(a).lower().endswith(str(b).lower()),
+}
+
+OPERATORS = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+}
+
+
+def resolve_field(model_cls, name: str):
+    """
+    Find a concrete field of the model by its name or attribute name.
+    """
+    try:
+        return model_cls._meta.get_field(name)
+    except FieldDoesNotExist:
+        for field in model_cls._meta.concrete_fields:
+            if field.attname == name:
+                return field
+    raise UnsupportedExpression(name)
+
+
+class RowExpression(object):
+    """
+    Compile a value of a lookup, a field reference (F) or a literal, into
+    a function of a generated row.
+    """
+    def __init__(self, model_cls, expression, columns: dict):
+        self.fields = set([])
+        self.func = self.compile(model_cls, expression, columns)
+
+    def compile(self, model_cls, expression, columns: dict):
+        if isinstance(expression, F):
+            if "__" in expression.name:
+                raise UnsupportedExpression(expression)
+            field = resolve_field(model_cls, expression.name)
+            if field_name(field) not in columns:
+                raise UnsupportedExpression(expression)
+            self.fields.add(field_name(field))
+            key = columns[field_name(field)]
+            return lambda row: _normalize(row[key])
+        elif Value is not None and isinstance(expression, Value):
+            value = _normalize(expression.value)
+            return lambda row: value
+        elif (
+            CombinedExpression is not None and
+            isinstance(expression, CombinedExpression) and
+            expression.connector in OPERATORS
+        ):
+            lhs = self.compile(model_cls, expression.lhs, columns)
+            rhs = self.compile(model_cls, expression.rhs, columns)
+            op = OPERATORS[expression.connector]
+
+            def combined(row):
+                left, right = lhs(row), rhs(row)
+                if left is None or right is None:
+                    return None
+                return op(left, right)
+            return combined
+        elif hasattr(expression, "resolve_expression"):
+            raise UnsupportedExpression(expression)
+        else:
+            value = _normalize(expression)
+            if isinstance(value, (list, tuple, set, frozenset)):
+                value = type(value)(map(_normalize, value))
+            return lambda row: value
+
+
+class QPredicate(object):
+    """
+    A python predicate for a Q object, evaluated with the SQL three-valued
+    logic: it returns True, False or None (unknown).
+    """
+    def __init__(self, model_cls, q, columns: dict):
+        self.fields = set([])
+        self.func = self.compile(model_cls, q, columns)
+
+    def __call__(self, row: dict):
+        try:
+            return self.func(row)
+        except (TypeError, ValueError, ArithmeticError):
+            return None
+
+    def compile(self, model_cls, q, columns: dict):
+        if not isinstance(q, Q):
+            raise UnsupportedExpression(q)
+        children = [
+            self.compile(model_cls, child, columns) if isinstance(child, Q)
+            else self.compile_lookup(model_cls, child, columns)
+            for child in q.children
+        ]
+        connector = q.connector
+
+        def evaluate(row):
+            values = [child(row) for child in children]
+            if connector == Q.OR:
+                result = True if any(values) else (
+                    None if None in values else False
+                )
+            else:
+                result = False if False in values else (
+                    None if None in values else True
+                )
+            if q.negated and result is not None:
+                return not result
+            return result
+        if connector not in (Q.AND, Q.OR):
+            raise UnsupportedExpression(q)
+        return evaluate
+
+    def compile_lookup(self, model_cls, child, columns: dict):
+        if not isinstance(child, tuple) or len(child) != 2:
+            raise UnsupportedExpression(child)
+        lookup, value = child
+        parts = lookup.split("__")
+        if len(parts) == 1:
+            parts.append("exact")
+        if len(parts) != 2 or (
+            parts[1] not in LOOKUPS.keys() and parts[1] != "isnull"
+        ):
+            raise UnsupportedExpression(lookup)
+        field = resolve_field(model_cls, parts[0])
+        if field_name(field) not in columns:
+            raise UnsupportedExpression(lookup)
+        self.fields.add(field_name(field))
+        key = columns[field_name(field)]
+
+        if parts[1] == "isnull":
+            return lambda row: (row[key] is None) == bool(value)
+
+        rhs = RowExpression(model_cls, value, columns)
+        self.fields |= rhs.fields
+        op = LOOKUPS[parts[1]]
+
+        def evaluate(row):
+            left, right = _normalize(row[key]), rhs.func(row)
+            if left is None or right is None:
+                return None
+            return bool(op(left, right))
+        return evaluate
+
+
+class CheckRowConstraint(object):
+    """
+    A CheckConstraint, a row violates it only if its condition is False.
+    """
+    def __init__(self, model_cls, q, columns: dict):
+        self.predicate = QPredicate(model_cls, q, columns)
+        self.fields = self.predicate.fields
+
+    def accept(self, row: dict) -> bool:
+        return self.predicate(row) is not False
+
+    def register(self, row: dict):
+        pass
+
+
+class UniqueRowConstraint(object):
+    """
+    A UniqueConstraint (or a unique_together constraint), optionally with a
+    condition, checked against the accepted rows and the existing ones.
+    """
+    def __init__(self, model_cls, fields: list, columns: dict, q=None,
+                 nulls_distinct: bool = True):
+        fields = [resolve_field(model_cls, name) for name in fields]
+        if any(field_name(field) not in columns for field in fields):
+            raise UnsupportedExpression(fields)
+        self.keys = [columns[field_name(field)] for field in fields]
+        self.fields = set(map(field_name, fields))
+        self.nulls_distinct = nulls_distinct
+        self.condition = None
+        existing = model_cls._default_manager.all()
+        if q is not None:
+            self.condition = QPredicate(model_cls, q, columns)
+            self.fields |= self.condition.fields
+            existing = existing.filter(q)
+        self.seen = set(
+            existing.values_list(*[field.attname for field in fields])
+        )
+
+    def key(self, row: dict):
+        if self.condition is not None and self.condition(row) is not True:
+            return None
+        key = tuple(_normalize(row[name]) for name in self.keys)
+        if self.nulls_distinct and None in key:
+            return None
+        return key
+
+    def accept(self, row: dict) -> bool:
+        return self.key(row) not in self.seen
+
+    def register(self, row: dict):
+        key = self.key(row)
+        if key is not None:
+            self.seen.add(key)
+
+
+def compile_constraints(model_cls, columns: dict) -> list:
+    """
+    Compile the constraints of a model into row constraints, the supported
+    ones are CheckConstraints and UniqueConstraints on fields (with an
+    optional condition), and the unique_together constraints.
+
+    :param model_cls: A reference to the class of the model.
+    :param columns:
+        A dictionary mapping the names of the generated fields to the keys of
+        their values in the generated rows.
+    """
+    compiled = []
+    for fields in model_cls._meta.unique_together:
+        try:
+            compiled.append(UniqueRowConstraint(model_cls, fields, columns))
+        except UnsupportedExpression:
+            pass
+    for constraint in getattr(model_cls._meta, "constraints", []):
+        try:
+            if (
+                CheckConstraint is not None and
+                isinstance(constraint, CheckConstraint)
+            ):
+                q = getattr(constraint, "condition", None)
+                if q is None:
+                    q = constraint.check
+                compiled.append(CheckRowConstraint(model_cls, q, columns))
+            elif (
+                UniqueConstraint is not None and
+                isinstance(constraint, UniqueConstraint) and
+                constraint.fields and
+                not getattr(constraint, "expressions", None)
+            ):
+                nulls_distinct = getattr(constraint, "nulls_distinct", None)
+                compiled.append(UniqueRowConstraint(
+                    model_cls, constraint.fields, columns,
+                    q=constraint.condition,
+                    nulls_distinct=nulls_distinct is not False,
+                ))
+        except UnsupportedExpression:
+            pass
+    return compiled
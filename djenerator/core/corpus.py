@@ -0,0 +1,166 @@
+"""
+This module has a corpus of random sentences, which is built once, cached on
+disk and memory mapped. When it is enabled, the texts are random windows of
+the corpus aligned to the boundaries of the sentences, so the cost of a text
+doesn't depend on its length, and the corpus is shared between processes.
+
+It is enabled by the setting DJENERATOR_TEXT_CORPUS, which is either True
+(the corpus is cached in DJENERATOR_CACHE_DIR), or the path of the file of
+the corpus. The size of the corpus in bytes is DJENERATOR_TEXT_CORPUS_SIZE.
+"""
+import array
+import bisect
+import functools
+import hashlib
+import mmap
+import os
+import struct
+import sys
+
+from .rng import random
+from .utils import atomic_write, cache_dir, get_setting
+from .values_generator import (
+    generate_sentence_batch,
+    generate_text,
+    WORDS_DICTIONARY,
+)
+
+
+CORPUS_MAGIC = b"DJTC0002"
+
+# The offsets of the sentences are 64 bits little endian integers.
+OFFSET = struct.Struct("<Q")
+
+DEFAULT_CORPUS_SIZE = 8 * 1024 * 1024
+
+# Number of random starting sentences tried for a text, before falling back
+# to generating the text.
+WINDOW_RETRIES = 3
+
+
+def corpus_path(size: int) -> str:
+    """
+    The default path of a corpus in the cache directory, the name depends on
+    the words used and the size, so that a stale corpus is never reused.
+    """
+    key = repr((WORDS_DICTIONARY.signature(), size)).encode()
+    digest = hashlib.sha1(key).hexdigest()[:16]
+    return os.path.join(cache_dir(), "text-corpus-%s.bin" % digest)
+
+
+def build_corpus(path: str, size: int):
+    """
+    Build a corpus of random sentences of about 'size' bytes. The file has a
+    header with the number of sentences, the offsets of the sentences (as
+    64 bits little endian integers), then the sentences, each followed by a
+    space.
+    """
+    offsets = [0]
+    sentences = []
+    while offsets[-1] < size:
+        count = min(4096, (size - offsets[-1]) // 20 + 1)
+        lengths = [random.randint(5, 40) for _ in range(count)]
+        for sentence in generate_sentence_batch(lengths):
+            data = sentence.encode("ascii", "ignore") + b" "
+            sentences.append(data)
+            offsets.append(offsets[-1] + len(data))
+    header = CORPUS_MAGIC + OFFSET.pack(len(sentences))
+    atomic_write(path, [
+        header, struct.pack("<%dQ" % len(offsets), *offsets)
+    ] + sentences)
+
+
+class TextCorpus(object):
+    """
+    A memory mapped corpus of sentences, serving random texts as windows of
+    consecutive sentences.
+    """
+    def __init__(self, path: str):
+        with open(path, "rb") as corpus_file:
+            self.data = mmap.mmap(
+                corpus_file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+        if self.data[:len(CORPUS_MAGIC)] != CORPUS_MAGIC:
+            raise ValueError("%s is not a text corpus." % path)
+        beg = len(CORPUS_MAGIC)
+        self.count, = OFFSET.unpack_from(self.data, beg)
+        beg += OFFSET.size
+        end = beg + OFFSET.size * (self.count + 1)
+        if len(self.data) < end:
+            raise ValueError("%s is truncated." % path)
+        if sys.byteorder == "little" and array.array("Q").itemsize == 8:
+            self.offsets = memoryview(self.data)[beg:end].cast("Q")
+        else:
+            self.offsets = struct.unpack_from(
+                "<%dQ" % (self.count + 1), self.data, beg
+            )
+        self.base = end
+
+    def text(self, max_length: int, min_length: int = 0) -> str:
+        """
+        Get a random window of sentences, of length between min_length and
+        max_length, or None if no window is found.
+        """
+        offsets = self.offsets
+        for _ in range(WINDOW_RETRIES):
+            beg = random.randrange(self.count)
+            start = offsets[beg]
+            # The text ends before the space after the last sentence.
+            first = max(beg + 1, bisect.bisect_left(
+                offsets, start + min_length + 1, beg + 1
+            ))
+            last = bisect.bisect_right(
+                offsets, start + max_length + 1, beg + 1
+            ) - 1
+            if first <= last:
+                end = offsets[random.randint(first, last)] - 1
+                return self.data[
+                    self.base + start:self.base + end
+                ].decode("ascii")
+        return None
+
+    def generate_batch(self, size: int, max_length=None, min_length=0,
+                       sep=" "):
+        """
+        Generate a list of random texts with the arguments of generate_text,
+        which are generated by generate_text if the corpus can't serve them.
+        """
+        max_length = max_length or 1000
+        values = []
+        for _ in range(size):
+            value = self.text(max_length, min_length) if sep == " " else None
+            if value is None:
+                value = generate_text(max_length, min_length, sep)
+            values.append(value)
+        return values
+
+
+@functools.lru_cache(maxsize=4)
+def load_corpus(path: str, size: int) -> TextCorpus:
+    """
+    Load the corpus of a path, which is built if it doesn't exist, or if it
+    is a corpus of an older format. Any other file raises a ValueError, so
+    it is never overwritten.
+    """
+    if os.path.isfile(path):
+        try:
+            return TextCorpus(path)
+        except ValueError:
+            with open(path, "rb") as corpus_file:
+                header = corpus_file.read(len(CORPUS_MAGIC))
+            if header[:4] != CORPUS_MAGIC[:4]:
+                raise
+    build_corpus(path, size)
+    return TextCorpus(path)
+
+
+def text_corpus():
+    """
+    Get the text corpus if it is enabled in the settings, otherwise None.
+    """
+    setting = get_setting("TEXT_CORPUS", False)
+    if not setting:
+        return None
+    size = get_setting("TEXT_CORPUS_SIZE", DEFAULT_CORPUS_SIZE)
+    path = setting if isinstance(setting, str) else corpus_path(size)
+    return load_corpus(path, size)
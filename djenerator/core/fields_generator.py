@@ -2,10 +2,12 @@
 This module has a function that matches django fields to the corresponding
 random value generator.
 """
+import functools
 import json
+import math
 import os
-import random
 import warnings
+from itertools import islice
 
 from django.conf import settings
 from django.core import validators
@@ -49,33 +51,147 @@ from django.db.models.fields.files import (
 )
 from django.utils.text import slugify
 
+from .corpus import text_corpus
 from .exceptions import InconsistentDefinition, SparseGeneratorError
-from .utils import is_required, is_unique, validate_data
+from .regex_generator import generate_regex, generate_regex_batch
+from .rng import random
+from .storage import file_pool, storage_writer
+from .utils import (
+    canonical_json,
+    get_setting,
+    is_required,
+    is_unique,
+    validate_data,
+)
 from .values_generator import (
-    generate_big_integer,
     generate_boolean,
     # generate_comma_separated_int,
     generate_date_time,
+    generate_date_time_batch,
     generate_decimal,
+    generate_decimal_batch,
+    generate_duration_batch,
     generate_email,
     generate_file_name,
     generate_file_path,
+    generate_file_path_batch,
     generate_float,
-    generate_int,
+    generate_float_batch,
+    generate_integer,
+    generate_integer_batch,
     generate_integer_list,
+    generate_integer_list_batch,
     generate_ip,
+    generate_ip_batch,
     generate_json,
+    generate_json_batch,
     generate_png,
-    generate_positive_big_integer,
-    generate_positive_integer,
-    generate_small_integer,
     generate_string,
+    generate_string_batch,
     generate_text,
+    generate_text_batch,
     generate_url,
     generate_uuid,
+    generate_uuid_batch,
+    PNG_COMPRESSION,
+    png_pool,
+    WordPool,
 )
 
 
+# Number of values drawn from a generator to estimate its acceptance rate.
+PILOT_SIZE = 100
+# Maximum number of values drawn from a generator per requested value, for
+# unique fields and for the other fields.
+MAX_DRAWS_FACTOR = 100
+MAX_DRAWS_FACTOR_NON_UNIQUE = 10
+# Minimum number of values that can be drawn for unique fields.
+MIN_DRAWS = 10000
+
+
+def humanize_count(count) -> str:
+    for limit, suffix in [(10 ** 9, "G"), (10 ** 6, "M"), (10 ** 3, "K")]:
+        if count >= limit:
+            return "%.1f%s" % (count / limit, suffix)
+    return "%d" % count
+
+
+class AcceptanceTracker(object):
+    """
+    Tracks the rate of valid values of a generator, and the rate of the
+    duplicates among them, to estimate the number of values that needs to be
+    drawn from the generator to get a given number of distinct valid values.
+    """
+    def __init__(self):
+        self.draws = 0
+        self.valid = 0
+        self.distinct = 0
+
+    def add(self, valid: bool, new: bool = True):
+        self.draws += 1
+        if valid:
+            self.valid += 1
+            self.distinct += int(new)
+
+    def distinct_values(self, slack: float = 0) -> float:
+        """
+        Estimate the total number of distinct valid values, N, such that
+        drawing 'valid' values uniformly gives 'distinct' values in average,
+        i.e., distinct = N * (1 - exp(-valid / N)). The number of observed
+        duplicates is reduced by 'slack' standard deviations, to get an
+        optimistic estimate.
+        """
+        duplicates = self.valid - self.distinct
+        duplicates -= slack * math.sqrt(duplicates)
+        if duplicates <= 0:
+            return math.inf
+        distinct = self.valid - duplicates
+        lo, hi = distinct, float(self.valid) ** 2
+        for _ in range(100):
+            mid = (lo + hi) / 2
+            if mid * (1 - math.exp(-self.valid / mid)) < distinct:
+                lo = mid
+            else:
+                hi = mid
+        return hi
+
+    def expected_draws(self, size: int, optimistic: bool = True) -> float:
+        """
+        Estimate the number of further draws needed to get 'size' distinct
+        valid values in total. The optimistic estimate is shifted by two
+        standard deviations, so that a generator is not rejected by chance.
+        """
+        if self.distinct >= size:
+            return 0
+        slack = 2 if optimistic else 0
+        valid_rate = min(1.0, (
+            self.valid + slack * math.sqrt(self.valid) + slack + 1
+        ) / (self.draws + 1))
+        total = self.distinct_values(slack=slack)
+        if total == math.inf:
+            return (size - self.distinct) / valid_rate
+        if total < size + 1:
+            return math.inf
+        return total * math.log(
+            (total - self.distinct) / (total - size)
+        ) / valid_rate
+
+    def diagnosis(self, size: int) -> str:
+        expected = self.expected_draws(size, optimistic=False)
+        total = self.distinct_values()
+        return (
+            "expected %s draws for %s unique values; %d valid values (%d "
+            "distinct) out of %d draws so far%s" % (
+                "infinitely many" if expected == math.inf else
+                humanize_count(expected), humanize_count(size),
+                self.valid, self.distinct, self.draws,
+                "" if total == math.inf else
+                ", the generator yields about %s distinct valid values" %
+                humanize_count(total)
+            )
+        )
+
+
 def generate_random_field_values(
     field, generator, size: int, to_filter=[]
 ) -> list:
@@ -85,209 +201,370 @@ def generate_random_field_values(
     are less than 'size', like in Booleans. The given generator can be an
     iterator over a list, or a generator that generates random (possibly
     repetitive) values. The generator must always yield a "valid" value with
-    high probability, otherwise it will raise a SparseGeneratorException if
-    it fails frequently (50 times in a row); valid here means non-repetitive
-    values that satisfies the validator of the django field.
+    high probability; valid here means non-repetitive values that satisfies
+    the validator of the django field. The rate of the valid values is
+    measured from a pilot batch, and the values are drawn in batches sized by
+    the measured rate. If the expected number of draws exceeds the budget
+    (MAX_DRAWS_FACTOR per value), a SparseGeneratorError is raised early for
+    unique required fields, otherwise the generated values are returned.
 
     :param DjangoField field: A reference to the field to get values for.
     :param generator: A generator that generates a set of values.
     :param size: The size of the output list.
     :returns: A list of random values generated for the given field.
     """
-    results = []
-    is_hashable = not (JSONField is not None and isinstance(field, JSONField))
-    if is_hashable:
-        results = set([])
-    fail = 0
-    for idx, value in enumerate(generator):
-        if is_hashable and (
-            value is None or value in results or value in to_filter or
-            not validate_data(value, *field.validators)
-        ):
-            fail += 1
-        else:
-            if is_hashable:
-                results.add(value)
+    results = {}
+    key = value_key(field)
+    to_filter = set(map(key, to_filter))
+    strict = is_unique(field) and is_required(field)
+    tracker = AcceptanceTracker()
+    if is_unique(field):
+        budget = max(MIN_DRAWS, size * MAX_DRAWS_FACTOR)
+    else:
+        budget = size * MAX_DRAWS_FACTOR_NON_UNIQUE + PILOT_SIZE
+    batch = PILOT_SIZE
+    while len(results) < size:
+        drawn = 0
+        for value in islice(generator, batch):
+            drawn += 1
+            hashed = key(value)
+            if (
+                value is None or hashed in to_filter or
+                not validate_data(value, *field.validators)
+            ):
+                tracker.add(False)
             else:
-                results.append(value)
-            fail = 0
-        if len(results) >= size or fail >= 300 or idx >= 10 * size:
+                tracker.add(True, hashed not in results)
+                results[hashed] = value
+            if len(results) >= size:
+                break
+        if drawn < batch or len(results) >= size:
             break
-    if (
-            is_unique(field) and is_required(field) and
-            (fail >= 300 or len(results) < size)
-    ):
+        expected = tracker.expected_draws(size)
+        if expected > budget - tracker.draws:
+            if strict:
+                raise SparseGeneratorError(
+                    "%s.%s has generated very few valid values, but more is "
+                    "required by the given unique required field: %s." % (
+                        field.model.__name__, field.name,
+                        tracker.diagnosis(size)
+                    )
+                )
+            break
+        # The batches grow at most geometrically, so the estimates are
+        # refined before drawing most of the values.
+        batch = int(min(
+            budget - tracker.draws, tracker.draws, max(1, expected * 1.1)
+        ))
+    if strict and len(results) < size:
         raise SparseGeneratorError(
             ("%s.%s has generated very few valid values"
              ", but more is required by the given unique required field.") %
             (field.model.__name__, field.name)
         )
-    return list(results)
+    return list(results.values())
 
 
-def extract_validator_args(field):
-    clss = [
-        validator.__name__ if validator.__class__.__name__ == "function" else
-        validator.__class__.__name__ for validator in field._validators
-    ]
-    if len(clss) != len(set(clss)):
-        raise InconsistentDefinition(
-            "There are duplicate validators of the same type for %s.%s: %s" %
-            (field.model.__name__, field.name, clss)
-        )
-    kwargs = {}
-    for validator in field._validators:
-        if isinstance(validator, validators.EmailValidator):
-            kwargs["allowlist"] = list(set(
-                (getattr(validator, "domain_allowlist", []) or []) +
-                (getattr(validator, "domain_whitelist", []) or [])
-            ))
-        elif isinstance(validator, validators.URLValidator):
-            kwargs["schemas"] = validator.schemes or []
-        elif isinstance(validator, validators.MaxValueValidator):
-            kwargs["mx"] = validator.limit_value
-        elif isinstance(validator, validators.MinValueValidator):
-            kwargs["mn"] = validator.limit_value
-        elif isinstance(validator, validators.MaxLengthValidator):
-            kwargs["max_length"] = validator.limit_value
-        elif isinstance(validator, validators.MinLengthValidator):
-            kwargs["min_length"] = validator.limit_value
-        elif (
-            hasattr(validators, "FileExtensionValidator") and
-            isinstance(validator, validators.FileExtensionValidator)
-        ):
-            kwargs["extensions"] = validator.allowed_extensions
-        elif isinstance(validator, validators.DecimalValidator):
-            kwargs["max_digits"] = validator.max_digits
-            kwargs["decimal_places"] = validator.decimal_places
-            # kwargs["max_whole_digits"] = validator.max_whole_digits
-        elif (
-            hasattr(validators, "StepValueValidator") and
-            isinstance(validator, validators.StepValueValidator)
-        ):
-            kwargs["step"] = validator.step_size
-    if hasattr(field, "max_length") and field.max_length is not None:
-        kwargs["max_length"] = field.max_length
-    return kwargs
+def value_key(field):
+    """
+    Get a function mapping the values of a field to hashable keys, which are
+    equal for equal values. JSON values are mapped to their canonical
+    serialization.
+    """
+    if JSONField is not None and isinstance(field, JSONField):
+        return canonical_json
+    return lambda value: value
 
 
-def generate_random_value(field):
+def json_shape(field) -> dict:
     """
-    Generate a random value for a given field, by matching to the corresponding
-    random generator in values_generator.
+    Get the shape of the JSON values of a field from its default value, the
+    type of the values ("dict" or "list"), and the keys of the dicts.
+    """
+    if not field.has_default():
+        return {}
+    default = field.get_default()
+    if isinstance(default, dict):
+        return {"container": "dict", "keys": list(default.keys()) or None}
+    elif isinstance(default, list):
+        return {"container": "list"}
+    return {}
 
-    :param DjangoField field: A reference to the field to get values for.
-    :returns: A random value generated for the given field.
+
+def integer_field_args(field):
+    """
+    Get the arguments of the integer generators for an integer field, the
+    number of bits and whether negative values are allowed. None is returned
+    for other fields.
     """
-    kwargs = extract_validator_args(field)
     if (
         PositiveBigIntegerField is not None and
         isinstance(field, PositiveBigIntegerField)
     ):
-        return generate_positive_big_integer(**kwargs)
+        return 64, False
     elif isinstance(field, BigIntegerField):
-        return generate_big_integer(**kwargs)
+        return 64, True
     elif isinstance(field, PositiveSmallIntegerField):
-        return abs(generate_small_integer(**kwargs))
+        return 16, False
     elif isinstance(field, PositiveIntegerField):
-        return abs(generate_positive_integer(**kwargs))
+        return 32, False
     elif isinstance(field, SmallIntegerField):
-        return generate_small_integer(**kwargs)
+        return 16, True
     elif isinstance(field, IntegerField):
-        return generate_int(**kwargs)
+        return 32, True
+    return None
+
+
+def field_kind(field):
+    """
+    Find the kind of the values of a field, which decides the generator used
+    for the field in generate_random_value and generate_random_values.
+    """
+    if integer_field_args(field) is not None:
+        return "integer"
     elif isinstance(field, (BooleanField, NullBooleanField)):
-        return generate_boolean(**kwargs)
+        return "boolean"
     elif (isinstance(field, EmailField) or
           validators.validate_email in field.validators or any(
               isinstance(v, validators.EmailValidator)
               for v in field.validators
           )):
-        return generate_email(**kwargs)
+        return "email"
     elif (isinstance(field, URLField) or any(
             isinstance(v, validators.URLValidator) for v in field.validators
           )):
-        return generate_url(**kwargs)
+        return "url"
     elif (
         validators.validate_ipv4_address in field.validators or
         (isinstance(field, GenericIPAddressField) and field.protocol == "IPv4")
     ):
-        return generate_ip(v6=False)
+        return "ipv4"
     elif (
         validators.validate_ipv6_address in field.validators or
         (isinstance(field, GenericIPAddressField) and field.protocol == "IPv6")
     ):
-        return generate_ip(v4=False)
+        return "ipv6"
     elif (isinstance(field, (GenericIPAddressField, IPAddressField)) or
           validators.validate_ipv46_address in field.validators):
-        return generate_ip()
+        return "ip"
     elif (
         isinstance(field, CommaSeparatedIntegerField) or
         validators.validate_comma_separated_integer_list in field.validators or
         validators.int_list_validator in field.validators
     ):
-        # return generate_comma_separated_int(field.max_length)
-        return generate_integer_list(**kwargs)
+        return "integer_list"
     elif isinstance(field, BinaryField):
-        kwargs["max_length"] = field.max_length or 100
-        return generate_string(**kwargs).encode()
+        return "binary"
     elif (
         isinstance(field, SlugField) or
         validators.validate_slug in field.validators or
         validators.validate_unicode_slug in field.validators
     ):
-        return slugify(generate_string(special=['_', '-'], **kwargs))
+        return "slug"
     elif JSONField is not None and isinstance(field, JSONField):
-        return generate_json(**kwargs)
+        return "json"
     elif isinstance(field, TextField):
-        return generate_text(**kwargs)
+        return "text"
     elif (
         isinstance(field, DecimalField) or any(
             isinstance(v, validators.DecimalValidator)
             for v in field.validators
         )
     ):
-        if hasattr(field, "max_digits"):
-            kwargs["max_digits"] = field.max_digits
-        if hasattr(field, "decimal_places"):
-            kwargs["decimal_places"] = field.decimal_places
-        return generate_decimal(**kwargs)
+        return "decimal"
     elif isinstance(field, DateTimeField):
-        timezone = settings.USE_TZ and settings.TIME_ZONE
-        return generate_date_time(tz=timezone, **kwargs)
+        return "datetime"
     elif isinstance(field, DateField):
-        timezone = settings.USE_TZ and settings.TIME_ZONE
-        return generate_date_time(tz=timezone, **kwargs).date()
+        return "date"
     elif isinstance(field, FloatField):
-        return generate_float(**kwargs)
+        return "float"
     elif isinstance(field, TimeField):
-        timezone = settings.USE_TZ and settings.TIME_ZONE
-        return generate_date_time(tz=timezone, **kwargs).time()
+        return "time"
     elif isinstance(field, DurationField):
-        timezone = settings.USE_TZ and settings.TIME_ZONE
-        t1 = generate_date_time(tz=timezone, **kwargs)
-        t2 = generate_date_time(tz=timezone, **kwargs)
-        if t1 < t2:
-            return t2 - t1
-        else:
-            return t1 - t2
+        return "duration"
     elif isinstance(field, UUIDField):
-        return generate_uuid()
+        return "uuid"
     elif isinstance(field, FilePathField):
-        return generate_file_path(**kwargs)
+        return "file_path"
     elif any(
         isinstance(v, validators.RegexValidator) for v in field.validators
     ):
-        # TODO: Handle this scenario with exrex package.
-        if random.random() < 0.1:
-            return generate_string(**kwargs)
-        else:
-            return generate_text(**kwargs)
+        return "regex"
     elif isinstance(field, CharField):
-        if random.random() < 0.1:
-            return generate_string(**kwargs)
-        else:
-            return generate_text(**kwargs)
+        return "char"
     elif isinstance(field, ImageField):
+        return "image"
+    elif isinstance(field, FileField):
+        return "file"
+    return None
+
+
+def regex_validator(field):
+    """
+    Find the first RegexValidator of a field, which is not an inverse match.
+    """
+    return next((
+        v for v in field.validators
+        if isinstance(v, validators.RegexValidator) and not v.inverse_match
+    ), None)
+
+
+def file_path_args(field, kwargs: dict) -> dict:
+    """
+    The arguments of generate_file_path for a FilePathField, from its
+    options and its validators.
+    """
+    root = field.path() if callable(field.path) else field.path
+    kwargs = dict(kwargs)
+    kwargs.update(
+        root=root or None, match=field.match, recursive=field.recursive,
+        allow_files=field.allow_files, allow_folders=field.allow_folders,
+        disk_cache=get_setting("PATH_INDEX_CACHE", False),
+    )
+    return kwargs
+
+
+def generate_text_values(size: int, **kwargs) -> list:
+    """
+    Generate a list of random texts, from the text corpus if it is enabled.
+    """
+    corpus = text_corpus()
+    if corpus is not None:
+        return corpus.generate_batch(size, **kwargs)
+    return generate_text_batch(size, **kwargs)
+
+
+def generate_random_values(field, size: int):
+    """
+    Generate a list of random values for a given field. The fields having a
+    batch generator in values_generator get their values at once, otherwise
+    the values are generated lazily one by one by generate_random_value.
+
+    :param DjangoField field: A reference to the field to get values for.
+    :param size: The number of the values.
+    :returns: An iterable of random values generated for the given field.
+    """
+    kwargs = extract_validator_args(field)
+    kind = field_kind(field)
+    if kind == "integer":
+        bits, negative_allowed = integer_field_args(field)
+        return generate_integer_batch(
+            size, bits, negative_allowed=negative_allowed, **kwargs
+        )
+    elif kind in ("email", "url"):
+        pool = WordPool()
+        generate = generate_email if kind == "email" else generate_url
+        return [generate(pool=pool, **kwargs) for _ in range(size)]
+    elif kind in ("ipv4", "ipv6", "ip"):
+        return generate_ip_batch(size, v4=kind != "ipv6", v6=kind != "ipv4")
+    elif kind == "uuid":
+        return generate_uuid_batch(size)
+    elif kind == "integer_list":
+        return generate_integer_list_batch(size, **kwargs)
+    elif kind == "binary":
+        kwargs["max_length"] = field.max_length or 100
+        return [value.encode() for value in generate_string_batch(
+            size, **kwargs
+        )]
+    elif kind == "slug":
+        return list(map(slugify, generate_string_batch(
+            size, special=['_', '-'], **kwargs
+        )))
+    elif kind == "decimal":
+        if hasattr(field, "max_digits"):
+            kwargs["max_digits"] = field.max_digits
+        if hasattr(field, "decimal_places"):
+            kwargs["decimal_places"] = field.decimal_places
+        return generate_decimal_batch(size, **kwargs)
+    elif kind == "float":
+        return generate_float_batch(size, **kwargs)
+    elif kind in ("datetime", "date", "time"):
+        timezone = settings.USE_TZ and settings.TIME_ZONE
+        values = generate_date_time_batch(size, tz=timezone, **kwargs)
+        if kind == "date":
+            return [value.date() for value in values]
+        elif kind == "time":
+            return [value.time() for value in values]
+        return values
+    elif kind == "duration":
+        return generate_duration_batch(size, **kwargs)
+    elif kind == "file_path":
+        return generate_file_path_batch(size, **file_path_args(field, kwargs))
+    elif kind == "json":
+        return generate_json_batch(
+            size, unique=is_unique(field), **json_shape(field)
+        )
+    elif kind == "regex" and regex_validator(field) is not None:
+        return generate_regex_batch(
+            regex_validator(field).regex, size,
+            max_length=kwargs.get("max_length"),
+            min_length=kwargs.get("min_length", 0),
+        )
+    elif kind == "text":
+        return generate_text_values(size, **kwargs)
+    elif kind == "char":
+        is_string = [random.random() < 0.1 for _ in range(size)]
+        strings = iter(generate_string_batch(sum(is_string), **kwargs))
+        texts = iter(generate_text_values(size - sum(is_string), **kwargs))
+        return [
+            next(strings) if flag else next(texts) for flag in is_string
+        ]
+    return (generate_random_value(field) for _ in range(size))
+
+
+def extract_validator_args(field):
+    clss = [
+        validator.__name__ if validator.__class__.__name__ == "function" else
+        validator.__class__.__name__ for validator in field._validators
+    ]
+    if len(clss) != len(set(clss)):
+        raise InconsistentDefinition(
+            "There are duplicate validators of the same type for %s.%s: %s" %
+            (field.model.__name__, field.name, clss)
+        )
+    kwargs = {}
+    for validator in field._validators:
+        if isinstance(validator, validators.EmailValidator):
+            kwargs["allowlist"] = list(set(
+                (getattr(validator, "domain_allowlist", []) or []) +
+                (getattr(validator, "domain_whitelist", []) or [])
+            ))
+        elif isinstance(validator, validators.URLValidator):
+            kwargs["schemas"] = validator.schemes or []
+        elif isinstance(validator, validators.MaxValueValidator):
+            kwargs["mx"] = validator.limit_value
+        elif isinstance(validator, validators.MinValueValidator):
+            kwargs["mn"] = validator.limit_value
+        elif isinstance(validator, validators.MaxLengthValidator):
+            kwargs["max_length"] = validator.limit_value
+        elif isinstance(validator, validators.MinLengthValidator):
+            kwargs["min_length"] = validator.limit_value
+        elif (
+            hasattr(validators, "FileExtensionValidator") and
+            isinstance(validator, validators.FileExtensionValidator)
+        ):
+            kwargs["extensions"] = validator.allowed_extensions
+        elif isinstance(validator, validators.DecimalValidator):
+            kwargs["max_digits"] = validator.max_digits
+            kwargs["decimal_places"] = validator.decimal_places
+            # kwargs["max_whole_digits"] = validator.max_whole_digits
+        elif (
+            hasattr(validators, "StepValueValidator") and
+            isinstance(validator, validators.StepValueValidator)
+        ):
+            kwargs["step"] = validator.step_size
+    if hasattr(field, "max_length") and field.max_length is not None:
+        kwargs["max_length"] = field.max_length
+    return kwargs
+
+
+def generate_file_content(field, kwargs: dict) -> tuple:
+    """
+    Generate the name and the content of a random file for a FileField or an
+    ImageField.
+    """
+    kwargs = dict(kwargs)
+    if isinstance(field, ImageField):
         # extensions = {
         #     '.blp': 'BLP', '.bmp': 'BMP', '.dib': 'DIB', '.bufr': 'BUFR',
         #     '.cur': 'CUR', '.pcx': 'PCX', '.dcx': 'DCX', '.dds': 'DDS',
@@ -317,14 +594,19 @@ def generate_random_value(field):
         kwargs["width"] = field.width_field or 128
         kwargs["height"] = field.height_field or 128
 
-        name = generate_file_name(12, extensions=[".png"])
-        image = generate_png(**kwargs)
+        kwargs["compression"] = get_setting(
+            "PNG_COMPRESSION", PNG_COMPRESSION
+        )
+        pool_size = get_setting("IMAGE_POOL", 0)
 
-        content = ContentFile(image)
-        val = ImageFieldFile(content, field, name)
-        val.save(name, content, False)
-        return val
-    elif isinstance(field, FileField):
+        name = generate_file_name(12, extensions=[".png"])
+        if pool_size:
+            kwargs.pop("max_length", None)
+            image = random.choice(png_pool(pool_size, **kwargs))
+        else:
+            image = generate_png(**kwargs)
+        return name, image
+    else:
         warn = False
         if "extensions" in kwargs.keys():
             extensions = kwargs["extensions"][:]
@@ -349,7 +631,103 @@ def generate_random_value(field):
             txt = json.dumps(generate_json(**kwargs))
         else:
             txt = generate_text(**kwargs)
-        content = ContentFile(txt)
-        val = FieldFile(content, field, name)
+        return name, txt
+
+
+def generate_random_value(field):
+    """
+    Generate a random value for a given field, by matching to the corresponding
+    random generator in values_generator.
+
+    :param DjangoField field: A reference to the field to get values for.
+    :returns: A random value generated for the given field.
+    """
+    kwargs = extract_validator_args(field)
+    kind = field_kind(field)
+    if kind == "integer":
+        return generate_integer(*integer_field_args(field), **kwargs)
+    elif kind == "boolean":
+        return generate_boolean(**kwargs)
+    elif kind == "email":
+        return generate_email(**kwargs)
+    elif kind == "url":
+        return generate_url(**kwargs)
+    elif kind == "ipv4":
+        return generate_ip(v6=False)
+    elif kind == "ipv6":
+        return generate_ip(v4=False)
+    elif kind == "ip":
+        return generate_ip()
+    elif kind == "integer_list":
+        # return generate_comma_separated_int(field.max_length)
+        return generate_integer_list(**kwargs)
+    elif kind == "binary":
+        kwargs["max_length"] = field.max_length or 100
+        return generate_string(**kwargs).encode()
+    elif kind == "slug":
+        return slugify(generate_string(special=['_', '-'], **kwargs))
+    elif kind == "json":
+        return generate_json(**json_shape(field))
+    elif kind == "text":
+        return generate_text(**kwargs)
+    elif kind == "decimal":
+        if hasattr(field, "max_digits"):
+            kwargs["max_digits"] = field.max_digits
+        if hasattr(field, "decimal_places"):
+            kwargs["decimal_places"] = field.decimal_places
+        return generate_decimal(**kwargs)
+    elif kind == "datetime":
+        timezone = settings.USE_TZ and settings.TIME_ZONE
+        return generate_date_time(tz=timezone, **kwargs)
+    elif kind == "date":
+        timezone = settings.USE_TZ and settings.TIME_ZONE
+        return generate_date_time(tz=timezone, **kwargs).date()
+    elif kind == "float":
+        return generate_float(**kwargs)
+    elif kind == "time":
+        timezone = settings.USE_TZ and settings.TIME_ZONE
+        return generate_date_time(tz=timezone, **kwargs).time()
+    elif kind == "duration":
+        timezone = settings.USE_TZ and settings.TIME_ZONE
+        t1 = generate_date_time(tz=timezone, **kwargs)
+        t2 = generate_date_time(tz=timezone, **kwargs)
+        if t1 < t2:
+            return t2 - t1
+        else:
+            return t1 - t2
+    elif kind == "uuid":
+        return generate_uuid()
+    elif kind == "file_path":
+        return generate_file_path(**file_path_args(field, kwargs))
+    elif kind == "regex":
+        validator = regex_validator(field)
+        if validator is not None:
+            return generate_regex(
+                validator.regex,
+                max_length=kwargs.get("max_length"),
+                min_length=kwargs.get("min_length", 0),
+            )
+        if random.random() < 0.1:
+            return generate_string(**kwargs)
+        else:
+            return generate_text(**kwargs)
+    elif kind == "char":
+        if random.random() < 0.1:
+            return generate_string(**kwargs)
+        else:
+            return generate_text(**kwargs)
+    elif kind in ("image", "file"):
+        pool_size = get_setting("FILE_POOL", 0)
+        if pool_size:
+            return file_pool(field, pool_size, functools.partial(
+                generate_file_content, field, kwargs
+            )).value()
+        name, content = generate_file_content(field, kwargs)
+        file_class = ImageFieldFile if kind == "image" else FieldFile
+        writer = storage_writer()
+        if writer is not None:
+            return writer.value(field, name, content, file_class)
+        content = ContentFile(content)
+        val = file_class(content, field, name)
         val.save(name, content, False)
         return val
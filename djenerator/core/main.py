@@ -1,29 +1,49 @@
+import contextlib
+import datetime
 import functools
 import inspect
 import logging
 import math
-import random
+import time
 
 from django.db.utils import IntegrityError
 
-from .algos import topological_sort
+from .columns import ColumnBatch
+from .constraints import compile_constraints
 from .exceptions import InvalidGenerator
 from .fields_generator import (
-    generate_random_field_values, generate_random_value
+    generate_random_field_values, generate_random_values, value_key
 )
+from .pools import value_pool
+from .rng import (
+    child_stream,
+    random,
+    RandomStream,
+    seed_random_module,
+    use_stream,
+)
+from .sampling import (
+    related_value,
+    sample_related_values,
+    stored_values,
+)
+from .schema import schema_graph
+from .spill import spill_dir, SpilledKeys
+from .storage import commit_files, wait_for_files
 from .utils import (
     choices,
-    dependencies,
+    column_name,
     field_name,
     get_related_model,
+    get_setting,
     is_many_to_many_field,
     is_related,
     is_required,
     is_unique,
+    make_batch_generator,
     make_generator,
     retrieve_fields,
     retrieve_generators,
-    retrieve_models,
 )
 
 
@@ -52,11 +72,11 @@ def generate_field_values(
         if True, related fields can be linked to already existing models,
         otherwise, they restricted to the ones being generated.
     """
-    gen_function = make_generator(
-        functools.partial(generate_random_value, field)
-    )
     values = []
     gen_size = size * (int(math.sqrt(1000 * num_unique_constraints)) + 1)
+    gen_function = make_batch_generator(
+        functools.partial(generate_random_values, field), gen_size
+    )
     if field_name(field) in generators.keys():
         iterator = generators[field_name(field)]
         if hasattr(iterator, "__iter__"):
@@ -76,41 +96,55 @@ def generate_field_values(
             gen_function = make_generator(iterator)
 
     bad_values = []
-    if is_unique(field) and not is_related(field):
+    # Out of core, the stored values are excluded from the generated values,
+    # instead of loading the whole column for every chunk.
+    out_of_core = get_setting("OUT_OF_CORE", 0)
+    if is_unique(field) and not is_related(field) and not out_of_core:
         bad_values = list(
             field.model.objects.values_list(field.name, flat=True)
         )
 
     if hasattr(field, "choices") and field.choices:
+        if is_unique(field) and out_of_core:
+            bad_values = stored_values(field, [x for x, _ in field.choices])
         values = [
             x for x, _ in field.choices
             if not is_unique(field) or x not in bad_values
         ]
     elif is_related(field):
         related_model_cls = get_related_model(field)
-        if (
+        targets = prev_generated.get(related_model_cls.__name__)
+        if isinstance(targets, SpilledKeys) and not allow_external_instances:
+            return targets.sample(
+                field, size, allow_null and not is_required(field)
+            )
+        elif (
             related_model_cls.__name__ in prev_generated.keys() and
             not allow_external_instances
         ):
-            values = prev_generated[related_model_cls.__name__]
+            values = [
+                related_value(field, value)
+                for value in prev_generated[related_model_cls.__name__]
+            ]
         elif allow_external_instances:
-            values = related_model_cls.objects.all().distinct()
-            if is_unique(field):
-                values = list(values.exclude(
-                    pk__in=field.model.objects.values_list(
-                        field.name, flat=True
-                    )
-                ))
-            # assert len(values) >= len(
-            #     prev_generated.get(related_model_cls.__name__, [])
-            # ), (
-            #     len(values),
-            #     len(prev_generated.get(related_model_cls.__name__, []))
-            # )
+            values = sample_related_values(
+                field, size, unique=is_unique(field)
+            )
     else:
-        values = generate_random_field_values(
-            field, gen_function, gen_size, bad_values
-        )
+        pool = None
+        if (
+            not is_unique(field) and not num_unique_constraints and
+            field_name(field) not in generators.keys()
+        ):
+            pool = value_pool(field)
+        if pool is not None:
+            values = list(pool)
+        elif is_unique(field) and out_of_core:
+            values = generate_unstored_values(field, gen_function, gen_size)
+        else:
+            values = generate_random_field_values(
+                field, gen_function, gen_size, bad_values
+            )
     # values = list(filter(lambda x: x not in bad_values, values))
 
     if not values:
@@ -120,8 +154,8 @@ def generate_field_values(
         values.append(None)
 
     if is_unique(field):
-        assert len(set(values)) >= size or not is_required(field),\
-            len(set(values))
+        assert len(set(map(value_key(field), values))) >= size or \
+            not is_required(field), len(values)
         if len(values) < size:
             values.extend([None] * (size - len(values)))
         random.shuffle(values)  # choose without replacement
@@ -130,15 +164,100 @@ def generate_field_values(
         return choices(values, k=size)  # choose with replacement
 
 
+def generate_unstored_values(field, generator, size: int) -> list:
+    """
+    Generate a list of distinct values for a unique field, which are not
+    already stored. The generated values are checked against the stored
+    values, and the stored ones are replaced by new values.
+    """
+    key = value_key(field)
+    values, to_filter = [], []
+    while len(values) < size:
+        generated = generate_random_field_values(
+            field, generator, size - len(values), to_filter + values
+        )
+        stored = stored_values(field, generated)
+        stored_keys = set(map(key, stored))
+        values.extend(
+            value for value in generated if key(value) not in stored_keys
+        )
+        if not stored:
+            break
+        to_filter.extend(stored)
+    return values
+
+
+def satisfy_constraints(
+    model_cls, constraints: list, generated_dicts: dict, size: int,
+    regenerate, retries: int = 20
+) -> list:
+    """
+    Check the generated rows against the compiled constraints of the model,
+    and regenerate in memory the values of the violating rows, instead of
+    failing at the insertion. Rows that still violate the constraints after
+    the given number of retries are skipped.
+
+    :param constraints: The compiled constraints of the model.
+    :param generated_dicts: The generated values of each field.
+    :param regenerate:
+        A function generating a list of values for a given field and size.
+    :returns: The indices of the valid rows.
+    """
+    fields = dict(
+        (field_name(field), field) for field in retrieve_fields(model_cls)
+    )
+    valid = []
+    pending = range(size)
+    for attempt in range(retries + 1):
+        bad = []
+        to_regenerate = set([])
+        for i in pending:
+            row = {key: generated_dicts[key][i] for key in generated_dicts}
+            violated = [c for c in constraints if not c.accept(row)]
+            if violated:
+                bad.append(i)
+                for constraint in violated:
+                    to_regenerate |= constraint.fields
+            else:
+                for constraint in constraints:
+                    constraint.register(row)
+                valid.append(i)
+        if not bad or attempt == retries:
+            break
+        for name in to_regenerate:
+            with seed_random_module():
+                values = regenerate(fields[name], len(bad))
+            column = generated_dicts[column_name(fields[name])]
+            taken = set(column) if is_unique(fields[name]) else set([])
+            for i, value in zip(bad, values):
+                if value is not None and value in taken:
+                    continue
+                taken.discard(column[i])
+                taken.add(value)
+                column[i] = value
+        pending = bad
+    for i in bad:
+        logger.warning(
+            "skipping row of model %s violating its constraints: %s",
+            model_cls.__name__,
+            str({key: generated_dicts[key][i] for key in generated_dicts})
+        )
+    return sorted(valid)
+
+
 def generate_models(
     model_cls, size: int, prev_generated: dict = {}, generators: dict = {},
-    allow_null: bool = False, allow_external_instances: bool = False
+    allow_null: bool = False, allow_external_instances: bool = False,
+    fields: list = None
 ) -> tuple:
     """
     Generate a set of instances of a given model class.
+
+    :param fields: The fields of the model, retrieved if not given.
     """
-    fields = retrieve_fields(model_cls)
-    generated_dicts = {}
+    if fields is None:
+        fields = retrieve_fields(model_cls)
+    columns = ColumnBatch()
     recheck = []
 
     unique_together_counts = {}
@@ -152,32 +271,44 @@ def generate_models(
             recheck.append(field)
             continue
         num_constraints = unique_together_counts.get(field_name(field), 0)
-        values = generate_field_values(
-            field, size, prev_generated,
-            num_unique_constraints=num_constraints,
-            generators=generators.get(model_cls.__name__, {}),
-            allow_null=allow_null,
-            allow_external_instances=allow_external_instances
-        )
+        with child_stream(field_name(field)), seed_random_module():
+            values = generate_field_values(
+                field, size, prev_generated,
+                num_unique_constraints=num_constraints,
+                generators=generators.get(model_cls.__name__, {}),
+                allow_null=allow_null,
+                allow_external_instances=allow_external_instances
+            )
         if values:
-            generated_dicts[field_name(field)] = values
+            columns[column_name(field)] = values
             assert len(values) == size
         else:
             recheck.append(field)
+    rows = range(size)
+    constraints = compile_constraints(model_cls, dict(
+        (field_name(field), column_name(field)) for field in fields
+        if column_name(field) in columns
+    ))
+    if constraints:
+        rows = satisfy_constraints(
+            model_cls, constraints, columns, size,
+            functools.partial(
+                generate_field_values, prev_generated=prev_generated,
+                generators=generators.get(model_cls.__name__, {}),
+                allow_null=allow_null,
+                allow_external_instances=allow_external_instances
+            )
+        )
     models = []
-    for i in range(size):
+    for kwargs in columns.rows(rows):
         try:
-            model = model_cls.objects.create(**{
-                key: generated_dicts[key][i] for key in generated_dicts.keys()
-            })
+            model = model_cls.objects.create(**kwargs)
+            commit_files(kwargs.values())
             logger.info(
                 "generated Model %s %s", model.__class__.__name__, model.pk
             )
             models.append(model)
         except IntegrityError as error:
-            kwargs = {
-                key: generated_dicts[key][i] for key in generated_dicts.keys()
-            }
             logger.error(
                 "skipping bad value for model %s: %s. %s",
                 model_cls.__name__, str(kwargs), str(error)
@@ -193,27 +324,45 @@ def postcompute(to_postcompute, generated, allow_null=False):
     """
     for model_cls_name, fields in to_postcompute.items():
         models = generated[model_cls_name]
-        for field in fields:
-            values = generate_field_values(
-                field, len(models), generated, allow_null=allow_null
-            )
-            if is_many_to_many_field(field):
-                for model in models:
-                    getattr(model, field_name(field)).add(*choices(
-                        values, k=random.randint(0, min(5, len(values)))
-                    ))
-            else:
-                for model, value in zip(models, values):
-                    setattr(model, field_name(field), value)
+        if isinstance(models, SpilledKeys):
+            manager = fields[0].model._default_manager
+            for keys in models.iter_chunks():
+                postcompute_models(
+                    list(manager.in_bulk(keys).values()), fields, generated,
+                    allow_null
+                )
+        else:
+            postcompute_models(models, fields, generated, allow_null)
+
+
+def postcompute_models(models, fields, generated, allow_null=False):
+    """
+    Postcompute the postponed fields of some instances of a model.
+    """
+    for field in fields:
+        values = generate_field_values(
+            field, len(models), generated, allow_null=allow_null
+        )
+        if is_many_to_many_field(field):
+            for model in models:
+                getattr(model, field_name(field)).add(*choices(
+                    values, k=random.randint(0, min(5, len(values)))
+                ))
+        else:
+            for model, value in zip(models, values):
+                setattr(model, column_name(field), value)
 
-        for model in models:
-            model.save()
+    for model in models:
+        model.save()
+        commit_files(
+            getattr(model, column_name(field)) for field in fields
+        )
 
 
 def generate_test_data(app_name: str, size: int,
                        allow_null: bool = False,
                        allow_external_instances: bool = False,
-                       models_cls: list = None):
+                       models_cls: list = None, seed: int = None):
     """
     Generates a list of 'size' random data for each model in the models module
     in the given path, If the sample data is not enough for generating 'size'
@@ -228,30 +377,38 @@ def generate_test_data(app_name: str, size: int,
         if True, related fields can be linked to already existing models,
         otherwise, they restricted to the ones being generated.
     :param models_cls: Generate only for a specific set of models.
+    :param seed:
+        If given, the data is generated from a random stream with this seed,
+        and every model and field draws from its own child stream, so the
+        generated data is reproducible. The global generator of the random
+        module is also seeded for every field, for the custom generators, and
+        the generated dates are relative to one time, the setting
+        DJENERATOR_NOW if it is set, otherwise the start of the generation.
     """
+    stream = None
+    if seed is not None:
+        now = get_setting("NOW", None)
+        if isinstance(now, datetime.datetime):
+            now = now.timestamp()
+        stream = RandomStream(seed, now if now is not None else time.time())
+    with use_stream(stream):
+        generate_app_data(
+            app_name, size, allow_null, allow_external_instances, models_cls
+        )
 
-    all_models = retrieve_models(app_name + ".models")
-    if models_cls is None:
-        models_cls = all_models[:]
-    else:
+
+def generate_app_data(app_name: str, size: int, allow_null: bool,
+                      allow_external_instances: bool, models_cls: list):
+    """
+    Generate the data of an app, with the arguments of generate_test_data.
+    """
+    graph = schema_graph(app_name)
+    if models_cls is not None:
         names_map = dict(
-            (model_cls.__name__, model_cls) for model_cls in all_models
+            (model_cls.__name__, model_cls) for model_cls in graph.models
         )
-        models_cls = set([names_map[model_cls] for model_cls in models_cls])
-        # get all dependencies
-        siz = len(models_cls)
-        while True:
-            models_cls |= set([
-                dep for model_cls in models_cls
-                for dep in dependencies(model_cls, True)
-            ])
-            if len(models_cls) <= siz:
-                break
-            else:
-                siz = len(models_cls)
-        models_cls = list(models_cls)
-
-    models_cls, cycle = topological_sort(models_cls, dependencies)
+        models_cls = [names_map[model_cls] for model_cls in models_cls]
+    models_cls, _, cycle = graph.plan(models_cls)
     if cycle:
         raise ValueError(
             "Detected cyclic dependencies between models. " +
@@ -263,14 +420,32 @@ def generate_test_data(app_name: str, size: int,
     )
     to_postcompute = {}
     generated = {}
-    for model_cls in models_cls:
-        models, recheck = generate_models(
-            model_cls, size, generated, generators=generators,
-            allow_external_instances=allow_external_instances,
-            allow_null=allow_null
-        )
-        generated[model_cls.__name__] = models
-        if recheck:
-            to_postcompute[model_cls.__name__] = recheck
+    chunk_size = get_setting("OUT_OF_CORE", 0)
+    with contextlib.ExitStack() as stack:
+        directory = stack.enter_context(spill_dir()) if chunk_size else None
+        for model_cls in models_cls:
+            generate = functools.partial(
+                generate_models, model_cls, prev_generated=generated,
+                generators=generators, allow_null=allow_null,
+                allow_external_instances=allow_external_instances,
+                fields=graph.fields_of(model_cls)
+            )
+            with child_stream(model_cls._meta.label):
+                if directory is None:
+                    models, recheck = generate(size)
+                else:
+                    # The instances are released after every chunk, only
+                    # their keys are kept, on disk.
+                    models, recheck = SpilledKeys(model_cls, directory), []
+                    stack.callback(models.close)
+                    for start in range(0, size, chunk_size):
+                        chunk, recheck = generate(
+                            min(chunk_size, size - start)
+                        )
+                        models.append(chunk)
+            generated[model_cls.__name__] = models
+            if recheck:
+                to_postcompute[model_cls.__name__] = recheck
 
-    postcompute(to_postcompute, generated)
+        postcompute(to_postcompute, generated)
+    wait_for_files()
@@ -0,0 +1,393 @@
+"""
+This module has the shared pools of values of the fields. The fields having
+the same generation parameters (like many CharField(max_length=200) of a
+schema) share a pool of valid values, which is generated once, and the
+values of the non unique fields are drawn from it.
+
+It is enabled by the setting DJENERATOR_VALUE_POOL, the number of values of
+a pool. At most DJENERATOR_VALUE_POOL_COUNT pools are kept, the least
+recently used pool is evicted first.
+
+If the setting DJENERATOR_VALUE_POOL_CACHE is True, the pools are also stored
+in DJENERATOR_CACHE_DIR and memory mapped by the following runs, under a key
+depending on the signature of the fields and the source of the generators.
+The least recently used files are deleted when the pools take more than
+DJENERATOR_VALUE_POOL_CACHE_SIZE bytes.
+"""
+import array
+import datetime
+import functools
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import uuid
+from collections import OrderedDict
+from collections.abc import Sequence
+from decimal import Decimal
+from itertools import islice
+
+from . import fields_generator, regex_generator, utils, values_generator
+from .fields_generator import (
+    field_kind,
+    generate_random_field_values,
+    generate_random_values,
+)
+from .rng import run_key
+from .utils import (
+    atomic_write,
+    cache_dir,
+    canonical_json,
+    get_setting,
+    make_batch_generator,
+)
+from .. import __version__
+
+
+# The options of the fields which don't change the generated values.
+IGNORED_OPTIONS = [
+    "blank", "db_column", "db_comment", "db_index", "db_tablespace",
+    "editable", "error_messages", "help_text", "null", "serialize",
+    "verbose_name",
+]
+
+# The kinds of fields which are not pooled, as their values are stored.
+UNPOOLED_KINDS = ["file", "image"]
+
+DEFAULT_POOL_COUNT = 128
+
+
+def signature(value):
+    """
+    A hashable signature of an option of a field, the deconstructible values
+    (like the validators) are compared by their arguments.
+    """
+    if hasattr(value, "deconstruct") and not isinstance(value, type):
+        path, args, kwargs = value.deconstruct()
+        return (path, signature(args), signature(kwargs))
+    elif isinstance(value, dict):
+        return tuple(sorted(
+            (key, signature(item)) for key, item in value.items()
+        ))
+    elif isinstance(value, (list, tuple)):
+        return tuple(map(signature, value))
+    return repr(value)
+
+
+def field_signature(field) -> tuple:
+    """
+    The signature of the generation parameters of a field: its class, and
+    its options with its validators.
+    """
+    _, path, args, kwargs = field.deconstruct()
+    for option in IGNORED_OPTIONS:
+        kwargs.pop(option, None)
+    return (path, signature(args), signature(kwargs))
+
+
+POOL_MAGIC = b"DJVP0002"
+
+# The header of a file of a pool: the magic, the codec and the count.
+POOL_HEADER = struct.Struct("<8sB7xQ")
+
+DEFAULT_POOL_CACHE_SIZE = 256 * 1024 * 1024
+
+
+class Codec(object):
+    """
+    The binary format of the values of a type in the file of a pool, either
+    a fixed size item of an array ('typecode'), or variable length bytes.
+    """
+    def __init__(self, name, typecode=None, encode=None, decode=None):
+        self.name = name
+        self.typecode = typecode
+        self.encode = encode or (lambda value: value)
+        self.decode = decode or (lambda value: value)
+
+
+MICROSECOND = datetime.timedelta(microseconds=1)
+
+EPOCH = datetime.datetime(1970, 1, 1)
+
+# A datetime: the microseconds of its wall time since the epoch, the offset
+# of its timezone in seconds, and whether it has a timezone.
+DATETIME_STRUCT = struct.Struct("<qi?")
+
+
+def decode_timedelta(value):
+    return datetime.timedelta(microseconds=value)
+
+
+def encode_timedelta(value):
+    return value // MICROSECOND
+
+
+def decode_datetime(value):
+    wall_time, offset, aware = DATETIME_STRUCT.unpack(value)
+    value = EPOCH + wall_time * MICROSECOND
+    if aware:
+        value = value.replace(tzinfo=datetime.timezone(
+            datetime.timedelta(seconds=offset)
+        ))
+    return value
+
+
+def encode_datetime(value):
+    offset = value.utcoffset()
+    return DATETIME_STRUCT.pack(
+        (value.replace(tzinfo=None) - EPOCH) // MICROSECOND,
+        offset // datetime.timedelta(seconds=1) if offset is not None else 0,
+        offset is not None,
+    )
+
+
+def decode_time(value):
+    return (EPOCH + value * MICROSECOND).time()
+
+
+def encode_time(value):
+    return (
+        datetime.datetime.combine(EPOCH, value) - EPOCH
+    ) // MICROSECOND
+
+
+CODECS = [
+    Codec("int", "q"),
+    Codec("float", "d"),
+    Codec("bool", "B", int, bool),
+    Codec("str", None, str.encode, bytes.decode),
+    Codec("bytes", None, bytes, bytes),
+    Codec("decimal", None, lambda v: str(v).encode(),
+          lambda v: Decimal(v.decode())),
+    Codec("datetime", None, encode_datetime, decode_datetime),
+    Codec("date", "q", datetime.date.toordinal, datetime.date.fromordinal),
+    Codec("time", "q", encode_time, decode_time),
+    Codec("timedelta", "q", encode_timedelta, decode_timedelta),
+    Codec("uuid", None, lambda v: v.bytes, lambda v: uuid.UUID(bytes=v)),
+    Codec("json", None, lambda v: canonical_json(v).encode(), json.loads),
+]
+
+# The codecs of the types of values, the values of JSON fields are encoded
+# as JSON whatever their types.
+TYPE_CODECS = {
+    int: "int", float: "float", bool: "bool", str: "str", bytes: "bytes",
+    Decimal: "decimal", datetime.datetime: "datetime",
+    datetime.date: "date", datetime.time: "time",
+    datetime.timedelta: "timedelta", uuid.UUID: "uuid",
+}
+
+
+def values_codec(field, values: list) -> int:
+    """
+    The index of the codec of some values of a field, or None if they can't
+    be stored.
+    """
+    if field_kind(field) == "json":
+        name = "json"
+    else:
+        types = set(map(type, values))
+        if len(types) != 1 or next(iter(types)) not in TYPE_CODECS:
+            return None
+        name = TYPE_CODECS[next(iter(types))]
+        if name == "time" and any(
+            value.tzinfo is not None for value in values
+        ):
+            return None
+    return next(idx for idx, codec in enumerate(CODECS) if codec.name == name)
+
+
+def write_pool(path: str, codec_idx: int, values: list):
+    """
+    Write the values of a pool: a header, then either an array of the
+    values, or the offsets of the values then their bytes.
+    """
+    codec = CODECS[codec_idx]
+    encoded = list(map(codec.encode, values))
+    header = POOL_HEADER.pack(POOL_MAGIC, codec_idx, len(values))
+    if codec.typecode is not None:
+        atomic_write(path, [header, array.array(
+            codec.typecode, encoded
+        ).tobytes()])
+    else:
+        offsets = array.array("Q", [0])
+        for value in encoded:
+            offsets.append(offsets[-1] + len(value))
+        atomic_write(path, [header, offsets.tobytes()] + encoded)
+
+
+class MappedPool(Sequence):
+    """
+    The values of a pool in a memory mapped file, decoded on access.
+    """
+    def __init__(self, path: str):
+        with open(path, "rb") as pool_file:
+            self.data = mmap.mmap(
+                pool_file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+        magic, codec_idx, self.count = POOL_HEADER.unpack_from(self.data)
+        if magic != POOL_MAGIC or codec_idx >= len(CODECS):
+            raise ValueError("%s is not a pool of values." % path)
+        self.codec = CODECS[codec_idx]
+        view = memoryview(self.data)[POOL_HEADER.size:]
+        if self.codec.typecode is not None:
+            end = self.count * array.array(self.codec.typecode).itemsize
+            self.offsets = None
+            self.items = view[:end]
+            if len(self.items) < end:
+                raise ValueError("%s is truncated." % path)
+            self.items = self.items.cast(self.codec.typecode)
+        else:
+            end = 8 * (self.count + 1)
+            if len(view) < end:
+                raise ValueError("%s is truncated." % path)
+            self.offsets = view[:end].cast("Q")
+            self.items = view[end:]
+            if len(self.items) < self.offsets[-1]:
+                raise ValueError("%s is truncated." % path)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, idx: int):
+        if not 0 <= idx < self.count:
+            raise IndexError("pool index out of range")
+        if self.offsets is None:
+            return self.codec.decode(self.items[idx])
+        return self.codec.decode(
+            bytes(self.items[self.offsets[idx]:self.offsets[idx + 1]])
+        )
+
+    def close(self):
+        for view in [self.offsets, self.items]:
+            if view is not None:
+                view.release()
+        self.data.close()
+
+
+@functools.lru_cache(maxsize=1)
+def generator_version() -> str:
+    """
+    A hash of the source of the generators and of the format of the pools,
+    the stored pools of an older version are never used.
+    """
+    digest = hashlib.sha1(__version__.encode())
+    modules = [
+        fields_generator, regex_generator, values_generator, utils,
+        sys.modules[__name__],
+    ]
+    for module in modules:
+        with open(module.__file__, "rb") as source:
+            digest.update(source.read())
+    return digest.hexdigest()
+
+
+def pool_path(field) -> str:
+    """
+    The path of the stored pool of a field, or None if the signature of the
+    field is not the same between runs (it has functions or objects which
+    are compared by their addresses). The pools of seeded runs are stored
+    under their seed and time, so they are only reused by the same runs.
+    """
+    key = repr(field_signature(field))
+    if " at 0x" in key:
+        return None
+    key += repr(run_key())
+    digest = hashlib.sha1((key + generator_version()).encode()).hexdigest()
+    return os.path.join(cache_dir(), "value-pool-%s.bin" % digest)
+
+
+def trim_pool_cache(limit: int):
+    """
+    Delete the least recently used stored pools, until they take at most
+    'limit' bytes.
+    """
+    directory = cache_dir()
+    files = []
+    for name in os.listdir(directory):
+        if name.startswith("value-pool-"):
+            try:
+                stat = os.stat(os.path.join(directory, name))
+            except FileNotFoundError:
+                # Deleted by another process.
+                continue
+            files.append((stat.st_mtime, stat.st_size, name))
+    total = sum(size for _, size, _ in files)
+    for _, size, name in sorted(files):
+        if total <= limit:
+            break
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+class ValuePool(object):
+    """
+    A list of distinct valid values of a field, shared by the fields having
+    the same signature. If path is given, the values are read from the file,
+    and the missing values are generated and stored.
+    """
+    def __init__(self, field, size: int, path: str = None):
+        stored = []
+        if path is not None and os.path.isfile(path):
+            try:
+                stored = MappedPool(path)
+                # The modification time orders the pools by their last use.
+                os.utime(path)
+            except (OSError, ValueError):
+                pass
+        if len(stored) >= size:
+            self.values = stored
+            if len(stored) > size:
+                self.values = list(islice(stored, size))
+            return
+        generator = make_batch_generator(
+            functools.partial(generate_random_values, field), size
+        )
+        self.values = list(stored) + generate_random_field_values(
+            field, generator, size - len(stored), list(stored)
+        )
+        codec_idx = values_codec(field, self.values)
+        if path is not None and codec_idx is not None:
+            # The stored pools are only a cache, the values are used even if
+            # they can't be stored.
+            try:
+                write_pool(path, codec_idx, self.values)
+                trim_pool_cache(get_setting(
+                    "VALUE_POOL_CACHE_SIZE", DEFAULT_POOL_CACHE_SIZE
+                ))
+            except (OSError, OverflowError, struct.error):
+                pass
+
+
+# The pools of values, by the signatures of the fields, in the order of use.
+VALUE_POOLS = OrderedDict()
+
+
+def value_pool(field) -> list:
+    """
+    Get the values of the pool of a field, if the pools are enabled,
+    otherwise None. The pool is created on the first use.
+    """
+    size = get_setting("VALUE_POOL", 0)
+    if not size or field_kind(field) in UNPOOLED_KINDS:
+        return None
+    key = (field_signature(field), size, run_key())
+    if key in VALUE_POOLS:
+        VALUE_POOLS.move_to_end(key)
+    else:
+        path = None
+        if get_setting("VALUE_POOL_CACHE", False):
+            try:
+                path = pool_path(field)
+            except OSError:
+                pass
+        VALUE_POOLS[key] = ValuePool(field, size, path)
+        while len(VALUE_POOLS) > get_setting(
+            "VALUE_POOL_COUNT", DEFAULT_POOL_COUNT
+        ):
+            VALUE_POOLS.popitem(last=False)
+    return VALUE_POOLS[key].values
@@ -0,0 +1,325 @@
+"""
+This module compiles regular expressions into generators of strings that
+match them, it is used for fields having a RegexValidator.
+"""
+import bisect
+import functools
+
+try:
+    from re import _constants as sre_constants
+    from re import _parser as sre_parse
+except ImportError:
+    import sre_constants
+    import sre_parse
+
+from .exceptions import InconsistentDefinition
+from .rng import random
+
+
+# Printable ASCII characters, used for '.', negated sets and categories.
+BASE_ALPHABET = [(0x20, 0x7e)]
+
+# Unbounded repetitions (like '*' or '+') are limited to this many extra
+# repetitions over the minimum.
+UNBOUNDED_REPEAT = 16
+
+CATEGORIES = {
+    sre_constants.CATEGORY_DIGIT: [(0x30, 0x39)],
+    sre_constants.CATEGORY_WORD: [
+        (0x30, 0x39), (0x41, 0x5a), (0x5f, 0x5f), (0x61, 0x7a)
+    ],
+    sre_constants.CATEGORY_SPACE: [(0x20, 0x20)],
+}
+for _cat, _neg in [
+    (sre_constants.CATEGORY_DIGIT, sre_constants.CATEGORY_NOT_DIGIT),
+    (sre_constants.CATEGORY_WORD, sre_constants.CATEGORY_NOT_WORD),
+    (sre_constants.CATEGORY_SPACE, sre_constants.CATEGORY_NOT_SPACE),
+]:
+    CATEGORIES[_neg] = (_cat, )
+
+
+def _complement(ranges: list, universe: list = BASE_ALPHABET) -> list:
+    """
+    Compute the ranges of characters in the universe, which are not covered
+    by the given list of ranges.
+    """
+    excluded = set([])
+    for lo, hi in ranges:
+        for lo_u, hi_u in universe:
+            excluded.update(range(max(lo, lo_u), min(hi, hi_u) + 1))
+    result = []
+    for lo_u, hi_u in universe:
+        for char in range(lo_u, hi_u + 1):
+            if char in excluded:
+                continue
+            if result and result[-1][1] == char - 1:
+                result[-1] = (result[-1][0], char)
+            else:
+                result.append((char, char))
+    return result
+
+
+def _category_ranges(category) -> list:
+    ranges = CATEGORIES.get(category)
+    if ranges is None:
+        return BASE_ALPHABET
+    if isinstance(ranges, tuple):
+        return _complement(CATEGORIES[ranges[0]])
+    return ranges
+
+
+class RegexNode(object):
+    min_length = 0
+
+    def generate(self, budget: int, groups: dict) -> str:
+        return ""
+
+
+class CharacterSet(RegexNode):
+    min_length = 1
+
+    def __init__(self, ranges: list):
+        ranges = [
+            (lo, hi) for lo, hi in ranges
+            if not (0xd800 <= lo and hi <= 0xdfff)
+        ]
+        if not ranges:
+            raise InconsistentDefinition(
+                "A character class in the regular expression can't match "
+                "any printable character."
+            )
+        self.ranges = ranges
+        self.cumulative = []
+        total = 0
+        for lo, hi in ranges:
+            total += hi - lo + 1
+            self.cumulative.append(total)
+
+    def generate(self, budget: int, groups: dict) -> str:
+        idx = random.randrange(self.cumulative[-1])
+        pos = bisect.bisect_right(self.cumulative, idx)
+        lo, hi = self.ranges[pos]
+        return chr(hi - (self.cumulative[pos] - 1 - idx))
+
+
+class Literal(RegexNode):
+    def __init__(self, text: str):
+        self.text = text
+        self.min_length = len(text)
+
+    def generate(self, budget: int, groups: dict) -> str:
+        return self.text
+
+
+class Sequence(RegexNode):
+    def __init__(self, items: list):
+        self.items = items
+        self.min_length = sum(item.min_length for item in items)
+        self.suffix_min = [0] * (len(items) + 1)
+        for idx in range(len(items) - 1, -1, -1):
+            self.suffix_min[idx] = (
+                self.suffix_min[idx + 1] + items[idx].min_length
+            )
+
+    def generate(self, budget: int, groups: dict) -> str:
+        res = []
+        for idx, item in enumerate(self.items):
+            value = item.generate(budget - self.suffix_min[idx + 1], groups)
+            budget -= len(value)
+            res.append(value)
+        return ''.join(res)
+
+
+class Branch(RegexNode):
+    def __init__(self, alternatives: list):
+        self.alternatives = alternatives
+        self.min_length = min(alt.min_length for alt in alternatives)
+
+    def generate(self, budget: int, groups: dict) -> str:
+        possible = [
+            alt for alt in self.alternatives if alt.min_length <= budget
+        ] or self.alternatives
+        return random.choice(possible).generate(budget, groups)
+
+
+class Repeat(RegexNode):
+    def __init__(self, node: RegexNode, mn: int, mx: int):
+        self.node = node
+        self.mn = mn
+        if mx == sre_constants.MAXREPEAT:
+            mx = mn + UNBOUNDED_REPEAT
+        self.mx = mx
+        self.min_length = mn * node.min_length
+
+    def generate(self, budget: int, groups: dict) -> str:
+        mx = self.mx
+        if self.node.min_length > 0:
+            mx = min(mx, budget // self.node.min_length)
+        count = random.randint(self.mn, max(self.mn, mx))
+        res = []
+        for idx in range(count):
+            value = self.node.generate(
+                budget - (count - idx - 1) * self.node.min_length, groups
+            )
+            budget -= len(value)
+            res.append(value)
+        return ''.join(res)
+
+
+class Group(RegexNode):
+    def __init__(self, group, node: RegexNode):
+        self.group = group
+        self.node = node
+        self.min_length = node.min_length
+
+    def generate(self, budget: int, groups: dict) -> str:
+        value = self.node.generate(budget, groups)
+        if self.group is not None:
+            groups[self.group] = value
+        return value
+
+
+class GroupReference(RegexNode):
+    def __init__(self, group, min_length: int):
+        self.group = group
+        self.min_length = min_length
+
+    def generate(self, budget: int, groups: dict) -> str:
+        return groups.get(self.group, "")
+
+
+class GroupCondition(RegexNode):
+    def __init__(self, group, yes: RegexNode, no: RegexNode):
+        self.group = group
+        self.yes = yes
+        self.no = no
+        self.min_length = min(yes.min_length, no.min_length)
+
+    def generate(self, budget: int, groups: dict) -> str:
+        if self.group in groups:
+            return self.yes.generate(budget, groups)
+        return self.no.generate(budget, groups)
+
+
+def _compile_set(items) -> CharacterSet:
+    ranges = []
+    negate = False
+    for op, av in items:
+        if op == sre_constants.NEGATE:
+            negate = True
+        elif op == sre_constants.LITERAL:
+            ranges.append((av, av))
+        elif op == sre_constants.RANGE:
+            ranges.append(av)
+        elif op == sre_constants.CATEGORY:
+            ranges.extend(_category_ranges(av))
+    if negate:
+        ranges = _complement(ranges)
+    return CharacterSet(ranges)
+
+
+def _compile(parsed, group_lengths: dict) -> RegexNode:
+    items = []
+    for op, av in parsed:
+        if op == sre_constants.LITERAL:
+            if items and isinstance(items[-1], Literal):
+                items[-1] = Literal(items[-1].text + chr(av))
+            else:
+                items.append(Literal(chr(av)))
+        elif op == sre_constants.NOT_LITERAL:
+            items.append(CharacterSet(_complement([(av, av)])))
+        elif op == sre_constants.ANY:
+            items.append(CharacterSet(BASE_ALPHABET))
+        elif op == sre_constants.IN:
+            items.append(_compile_set(av))
+        elif op == sre_constants.BRANCH:
+            items.append(Branch([
+                _compile(alt, group_lengths) for alt in av[1]
+            ]))
+        elif op == sre_constants.SUBPATTERN:
+            group, pattern = av[0], av[-1]
+            node = _compile(pattern, group_lengths)
+            if group is not None:
+                group_lengths[group] = node.min_length
+            items.append(Group(group, node))
+        elif op in (
+            sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT,
+            getattr(sre_constants, "POSSESSIVE_REPEAT", None),
+        ):
+            mn, mx, pattern = av
+            items.append(Repeat(_compile(pattern, group_lengths), mn, mx))
+        elif op == getattr(sre_constants, "ATOMIC_GROUP", None):
+            items.append(_compile(av, group_lengths))
+        elif op == sre_constants.GROUPREF:
+            items.append(GroupReference(av, group_lengths.get(av, 0)))
+        elif op == sre_constants.GROUPREF_EXISTS:
+            group, yes, no = av
+            items.append(GroupCondition(
+                group, _compile(yes, group_lengths),
+                _compile(no, group_lengths) if no else RegexNode()
+            ))
+        # Anchors (AT) and look-around assertions (ASSERT, ASSERT_NOT) don't
+        # consume characters, the generated values are validated afterwards.
+    if len(items) == 1:
+        return items[0]
+    return Sequence(items)
+
+
+class RegexGenerator(object):
+    """
+    A generator of random strings matching a given regular expression, with
+    length between min_length and max_length.
+    """
+    def __init__(self, pattern: str, flags: int = 0, max_length: int = None,
+                 min_length: int = 0):
+        self.pattern = pattern
+        self.root = _compile(sre_parse.parse(pattern, flags), {})
+        self.max_length = max_length
+        self.min_length = min_length or 0
+        if max_length is not None and self.root.min_length > max_length:
+            raise InconsistentDefinition(
+                "The regular expression %r can't match a string shorter than "
+                "%d characters, but max_length is %d." % (
+                    pattern, self.root.min_length, max_length
+                )
+            )
+
+    def generate(self, retries: int = 10) -> str:
+        budget = self.max_length
+        if budget is None:
+            budget = max(self.root.min_length, self.min_length) + 256
+        for _ in range(retries):
+            value = self.root.generate(budget, {})
+            if self.min_length <= len(value) <= budget:
+                break
+        return value
+
+    def generate_batch(self, size: int) -> list:
+        return [self.generate() for _ in range(size)]
+
+
+@functools.lru_cache(maxsize=128)
+def compile_regex(pattern: str, flags: int = 0, max_length: int = None,
+                  min_length: int = 0) -> RegexGenerator:
+    return RegexGenerator(pattern, flags, max_length, min_length)
+
+
+def generate_regex(regex, max_length=None, min_length=0):
+    """
+    Generate a random string matching a given regular expression, which is
+    either a string pattern or a compiled one.
+    """
+    return compile_regex(
+        getattr(regex, "pattern", regex), getattr(regex, "flags", 0),
+        max_length, min_length
+    ).generate()
+
+
+def generate_regex_batch(regex, size, max_length=None, min_length=0):
+    """
+    Generate a list of random strings matching a given regular expression.
+    """
+    return compile_regex(
+        getattr(regex, "pattern", regex), getattr(regex, "flags", 0),
+        max_length, min_length
+    ).generate_batch(size)
@@ -0,0 +1,171 @@
+"""
+This module has the random number generators of djenerator. The generators
+draw from 'random', which is the random stream of the current thread if one
+is set, otherwise the global generator of the random module (so random.seed
+still applies).
+
+A random stream is seeded, and spawns independent child streams for the
+models, the fields, the shards or the threads, which are seeded from the
+seed of the parent and a key. The values of a child stream only depend on
+the seed of the root stream and the path of keys to the child, so seeded
+runs are reproducible even if they generate in parallel. A stream has a
+random.Random, and a numpy Generator (PCG64) for the batch generators.
+"""
+import contextlib
+import datetime
+import hashlib
+import random as random_module
+import threading
+from importlib import import_module
+
+
+LOCAL = threading.local()
+
+
+class RandomStream(object):
+    """
+    A seeded random number generator, spawning child streams.
+
+    :param seed: A non negative integer.
+    :param now:
+        The timestamp of the current time of the stream and its children, if
+        the generated dates are anchored to a time.
+    :param root: The seed of the root stream, by default 'seed'.
+    """
+    def __init__(self, seed: int, now: float = None, root: int = None):
+        self.seed = seed
+        self.now = now
+        self.root = seed if root is None else root
+        self.random = random_module.Random(seed)
+        self.generator = None
+        self.spawned = {}
+        self.lock = threading.Lock()
+
+    def numpy(self):
+        """
+        The numpy Generator of the stream, created on the first use.
+        """
+        if self.generator is None:
+            numpy = import_module("numpy")
+            self.generator = numpy.random.Generator(numpy.random.PCG64(
+                numpy.random.SeedSequence(self.seed)
+            ))
+        return self.generator
+
+    def spawn(self, *key):
+        """
+        Spawn a child stream for a key, the n-th child of the same key is
+        seeded from the seed of the stream, the key and n.
+        """
+        with self.lock:
+            count = self.spawned.get(key, 0)
+            self.spawned[key] = count + 1
+        digest = hashlib.sha256(repr((self.seed, key, count)).encode())
+        return RandomStream(
+            int.from_bytes(digest.digest()[:16], "little"), self.now,
+            self.root
+        )
+
+
+def current_stream():
+    """
+    The random stream of the current thread, or None.
+    """
+    return getattr(LOCAL, "stream", None)
+
+
+@contextlib.contextmanager
+def use_stream(stream):
+    """
+    Use a random stream in the current thread, in a with block. If stream
+    is None, the random stream is not changed.
+    """
+    if stream is None:
+        yield None
+        return
+    previous = current_stream()
+    LOCAL.stream = stream
+    random.bind(stream.random)
+    try:
+        yield stream
+    finally:
+        LOCAL.stream = previous
+        random.bind(previous.random if previous is not None else None)
+
+
+def child_stream(*key):
+    """
+    Use a child stream of the current random stream for a key, in a with
+    block, if there is a current stream.
+    """
+    stream = current_stream()
+    return use_stream(stream.spawn(*key) if stream is not None else None)
+
+
+@contextlib.contextmanager
+def seed_random_module():
+    """
+    Seed the global generator of the random module from the current random
+    stream, if there is one, in a with block, and restore its state after.
+    So the custom generators using the random module are reproducible too.
+    """
+    stream = current_stream()
+    if stream is None:
+        yield
+        return
+    state = random_module.getstate()
+    random_module.seed(stream.random.getrandbits(64))
+    try:
+        yield
+    finally:
+        random_module.setstate(state)
+
+
+def run_key():
+    """
+    The seed of the root stream and the time of the current random stream,
+    which identify a seeded run, or None if there is no current stream.
+    """
+    stream = current_stream()
+    if stream is None:
+        return None
+    return (stream.root, stream.now)
+
+
+def current_time(tz=None) -> datetime.datetime:
+    """
+    The current time, or the time of the current random stream if it is
+    anchored to a time.
+    """
+    stream = current_stream()
+    if stream is None or stream.now is None:
+        return datetime.datetime.now(tz=tz)
+    return datetime.datetime.fromtimestamp(stream.now, tz=tz)
+
+
+# The methods of random.Random, which are functions of the random module.
+METHODS = [
+    name for name in dir(random_module.Random)
+    if not name.startswith("_") and hasattr(random_module, name)
+]
+
+
+class ThreadRandom(threading.local):
+    """
+    The methods of the random module, drawing from the random stream of the
+    current thread if one is set. The methods are bound to the generator of
+    the stream in every thread, so calling them costs no indirection.
+    """
+    def __init__(self):
+        self.bind(None)
+
+    def bind(self, generator):
+        """
+        Bind the methods to a random.Random, or to the global generator of
+        the random module if generator is None.
+        """
+        for name in METHODS:
+            setattr(self, name, getattr(generator or random_module, name))
+
+
+random = ThreadRandom()
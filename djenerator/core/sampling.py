@@ -0,0 +1,204 @@
+"""
+This module has functions that sample random targets of related fields from
+the existing instances of a model, without loading the whole table.
+"""
+
+from django.db import connections
+from django.db.models import Max, Min
+
+from .rng import random
+from .utils import is_many_to_many_field, is_related
+
+
+INTEGER_TYPES = [
+    "AutoField", "BigAutoField", "SmallAutoField", "IntegerField",
+    "BigIntegerField", "SmallIntegerField", "PositiveIntegerField",
+    "PositiveBigIntegerField", "PositiveSmallIntegerField",
+]
+
+# Maximum number of parameters in one "IN" clause.
+CHUNK_SIZE = 500
+
+# Rounds of random probing of the range of integer keys before falling back
+# to sampling while streaming the keys.
+PROBING_ROUNDS = 8
+
+
+def related_target(field):
+    """
+    Retrieve the field of the related model referenced by a related field.
+    """
+    if is_many_to_many_field(field):
+        return field.related_model._meta.pk
+    return field.target_field
+
+
+def related_value(field, value):
+    """
+    Convert a related instance to the value stored in the given related field.
+    """
+    if value is None or not hasattr(value, "_meta"):
+        return value
+    return getattr(value, related_target(field).attname)
+
+
+def is_integer_key(field) -> bool:
+    while is_related(field):
+        field = field.target_field
+    return field.get_internal_type() in INTEGER_TYPES
+
+
+def reservoir_sample(iterable, size: int) -> list:
+    """
+    Sample uniformly 'size' values from an iterable of unknown length, in one
+    pass, keeping only 'size' values in memory.
+    """
+    sample = []
+    for idx, value in enumerate(iterable):
+        if idx < size:
+            sample.append(value)
+        else:
+            pos = random.randint(0, idx)
+            if pos < size:
+                sample[pos] = value
+    random.shuffle(sample)
+    return sample
+
+
+def stream_values(queryset, column: str):
+    values = queryset.values_list(column, flat=True)
+    try:
+        return values.iterator(chunk_size=2000)
+    except TypeError:
+        return values.iterator()
+
+
+def probe_integer_range(queryset, column: str, size: int) -> list:
+    """
+    Sample values of an integer column by probing random values in the range
+    of its keys, the density of the keys in the range is estimated from the
+    hits of the previous round.
+    """
+    bounds = queryset.aggregate(lo=Min(column), hi=Max(column))
+    lo, hi = bounds["lo"], bounds["hi"]
+    if lo is None:
+        return []
+    span = hi - lo + 1
+    found = set([])
+    probed = set([])
+    density = 1.0
+    for _ in range(PROBING_ROUNDS):
+        needed = size - len(found)
+        if needed <= 0 or len(probed) >= span:
+            break
+        count = min(span - len(probed), int(needed / density * 1.2) + 10)
+        candidates = [
+            lo + idx for idx in random.sample(range(span), count)
+            if lo + idx not in probed
+        ]
+        probed.update(candidates)
+        hits = 0
+        for beg in range(0, len(candidates), CHUNK_SIZE):
+            chunk = candidates[beg:beg + CHUNK_SIZE]
+            values = list(queryset.filter(**{column + "__in": chunk})
+                          .values_list(column, flat=True))
+            hits += len(values)
+            found.update(values)
+        density = max(hits / max(1, len(candidates)), 1.0 / span)
+    found = list(found)
+    random.shuffle(found)
+    return found[:size]
+
+
+def tablesample(model_cls, target, size: int, exclude_field=None,
+                using: str = "default") -> list:
+    """
+    Sample values of a column using TABLESAMPLE on PostgreSQL, estimating the
+    size of the table from the statistics of the planner. Returns None if it
+    is not supported, or if the table is too small to need it.
+    """
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return None
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+            [model_cls._meta.db_table]
+        )
+        row = cursor.fetchone()
+        if not row or row[0] < 10 * size:
+            return None
+        percent = min(100.0, 200.0 * size / row[0])
+        sql = "SELECT t.%s FROM %s AS t TABLESAMPLE SYSTEM (%%s)" % (
+            quote(target.column), quote(model_cls._meta.db_table),
+        )
+        if exclude_field is not None:
+            sql += (
+                " WHERE NOT EXISTS (SELECT 1 FROM %s AS r WHERE r.%s = t.%s)"
+                % (
+                    quote(exclude_field.model._meta.db_table),
+                    quote(exclude_field.column),
+                    quote(target.column),
+                )
+            )
+        cursor.execute(sql, [percent])
+        values = [value for value, in cursor.fetchall()]
+    if len(values) < size:
+        return None
+    random.shuffle(values)
+    return values[:size]
+
+
+def sample_related_values(field, size: int, unique: bool = False) -> list:
+    """
+    Sample up to 'size' distinct values of the targets of a related field from
+    the existing instances of the related model. Only the referenced keys are
+    retrieved, and the memory and the number of queries scale with 'size',
+    not with the size of the related table.
+
+    :param field: A related field.
+    :param size: The number of values to sample.
+    :param unique:
+        if True, the targets already referenced by the field are excluded,
+        using an anti-join with a subquery.
+    """
+    model_cls = field.related_model
+    target = related_target(field)
+    column = target.attname
+    queryset = model_cls._default_manager.all()
+    exclude_field = None
+    if unique:
+        exclude_field = field
+        queryset = queryset.exclude(**{
+            column + "__in": field.model._default_manager.filter(**{
+                field.attname + "__isnull": False
+            }).values(field.attname)
+        })
+
+    values = tablesample(
+        model_cls, target, size, exclude_field, using=queryset.db
+    )
+    if values is not None:
+        return values
+    if is_integer_key(target):
+        values = probe_integer_range(queryset, column, size)
+        if len(values) >= size:
+            return values
+    return reservoir_sample(stream_values(queryset, column), size)
+
+
+def stored_values(field, values: list) -> list:
+    """
+    Retrieve the values among some given values of a field which are already
+    stored, with a query per CHUNK_SIZE values, so only the given values are
+    retrieved, not the whole column.
+    """
+    values = [value for value in values if value is not None]
+    queryset = field.model._default_manager.all()
+    stored = []
+    for beg in range(0, len(values), CHUNK_SIZE):
+        chunk = values[beg:beg + CHUNK_SIZE]
+        stored.extend(queryset.filter(**{field.name + "__in": chunk})
+                      .values_list(field.name, flat=True))
+    return stored
@@ -0,0 +1,196 @@
+"""
+This module has the schema graph of an app: its models, the generated fields
+of every model, the dependencies between the models and the order of their
+generation. The graph is computed once per process.
+
+If the setting DJENERATOR_SCHEMA_CACHE is True, the graph is also cached in
+DJENERATOR_CACHE_DIR, under a key depending on the source of the models
+module of the app and the applied migrations, so the following runs skip the
+introspection of the models.
+"""
+import hashlib
+import inspect
+import json
+import os
+from importlib import import_module
+
+import django
+from django.apps import apps
+from django.db import connections, DEFAULT_DB_ALIAS
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.utils import DatabaseError
+
+from .algos import generation_plan
+from .utils import (
+    atomic_write,
+    cache_dir,
+    dependencies,
+    field_name,
+    get_setting,
+    retrieve_fields,
+    retrieve_models,
+)
+
+
+class SchemaGraph(object):
+    """
+    The models of an app, with the models they are related to.
+
+    :param models: The models of the app.
+    :param fields: The generated fields of every model, by model.
+    :param required:
+        The models that must be generated before every model, by model.
+    :param related: All the models related to every model, by model.
+    :param plan:
+        The order of generation of the models, their levels and the cycle of
+        dependencies between them if any (see generation_plan), which are
+        computed if they are not given.
+    """
+    def __init__(self, app_name: str, models: list, fields: dict,
+                 required: dict, related: dict, plan: tuple = None):
+        self.app_name = app_name
+        self.models = models
+        self.fields = fields
+        self.required = required
+        self.related = related
+        if plan is None:
+            plan = generation_plan(models, self.dependencies)
+        self.order, self.levels, self.cycle = plan
+
+    @classmethod
+    def introspect(cls, app_name: str):
+        """
+        Compute the graph of the models of an app, and all the models they
+        are related to.
+        """
+        models = retrieve_models(app_name + ".models")
+        fields, required, related = {}, {}, {}
+        pending = list(models)
+        while pending:
+            model_cls = pending.pop()
+            if model_cls in fields:
+                continue
+            fields[model_cls] = retrieve_fields(model_cls)
+            required[model_cls] = dependencies(model_cls)
+            related[model_cls] = dependencies(model_cls, True)
+            pending.extend(related[model_cls])
+        return cls(app_name, models, fields, required, related)
+
+    def fields_of(self, model_cls) -> list:
+        if model_cls not in self.fields:
+            self.fields[model_cls] = retrieve_fields(model_cls)
+        return self.fields[model_cls]
+
+    def dependencies(self, model_cls, strong_dependency: bool = False) -> list:
+        """
+        The models that must be generated before a given model, like
+        utils.dependencies.
+        """
+        graph = self.related if strong_dependency else self.required
+        if model_cls not in graph:
+            graph[model_cls] = dependencies(model_cls, strong_dependency)
+        return graph[model_cls]
+
+    def plan(self, models: list = None) -> tuple:
+        """
+        Plan the generation of some models of the app (all of them by
+        default) and all the models related to them.
+        """
+        if models is None:
+            return self.order, self.levels, self.cycle
+        return generation_plan(
+            models, self.dependencies,
+            lambda model_cls: self.dependencies(model_cls, True),
+        )
+
+    def to_dict(self) -> dict:
+        def labels(models):
+            return [model_cls._meta.label for model_cls in models]
+        return {
+            "models": labels(self.models),
+            "order": labels(self.order),
+            "levels": list(map(labels, self.levels)),
+            "cycle": labels(self.cycle),
+            "fields": dict(
+                (model_cls._meta.label, list(map(field_name, fields)))
+                for model_cls, fields in self.fields.items()
+            ),
+            "required": dict(
+                (model_cls._meta.label, labels(models))
+                for model_cls, models in self.required.items()
+            ),
+            "related": dict(
+                (model_cls._meta.label, labels(models))
+                for model_cls, models in self.related.items()
+            ),
+        }
+
+    @classmethod
+    def from_dict(cls, app_name: str, data: dict):
+        def models(labels):
+            return [apps.get_model(label) for label in labels]
+        return cls(
+            app_name, models(data["models"]),
+            dict(
+                (apps.get_model(label), [
+                    apps.get_model(label)._meta.get_field(name)
+                    for name in names
+                ]) for label, names in data["fields"].items()
+            ),
+            dict(
+                (apps.get_model(label), models(labels))
+                for label, labels in data["required"].items()
+            ),
+            dict(
+                (apps.get_model(label), models(labels))
+                for label, labels in data["related"].items()
+            ),
+            (
+                models(data["order"]), list(map(models, data["levels"])),
+                models(data["cycle"]),
+            ),
+        )
+
+
+def schema_key(app_name: str) -> str:
+    """
+    A hash of the source of the models module of an app and the applied
+    migrations.
+    """
+    source_file = inspect.getsourcefile(import_module(app_name + ".models"))
+    with open(source_file, "rb") as source:
+        digest = hashlib.sha1(source.read())
+    try:
+        recorder = MigrationRecorder(connections[DEFAULT_DB_ALIAS])
+        migrations = sorted(recorder.applied_migrations())
+    except DatabaseError:
+        migrations = []
+    digest.update(repr((app_name, django.VERSION, migrations)).encode())
+    return digest.hexdigest()
+
+
+# The schema graphs of the apps, by the names of the apps.
+SCHEMA_GRAPHS = {}
+
+
+def schema_graph(app_name: str) -> SchemaGraph:
+    """
+    Get the schema graph of an app, which is computed on the first use, or
+    loaded from the cache on disk if it is enabled.
+    """
+    if app_name in SCHEMA_GRAPHS:
+        return SCHEMA_GRAPHS[app_name]
+    if not get_setting("SCHEMA_CACHE", False):
+        graph = SchemaGraph.introspect(app_name)
+    else:
+        path = os.path.join(
+            cache_dir(), "schema-%s.json" % schema_key(app_name)
+        )
+        try:
+            with open(path, "r") as cache_file:
+                graph = SchemaGraph.from_dict(app_name, json.load(cache_file))
+        except (OSError, ValueError, LookupError):
+            graph = SchemaGraph.introspect(app_name)
+            atomic_write(path, [json.dumps(graph.to_dict()).encode()])
+    SCHEMA_GRAPHS[app_name] = graph
+    return graph
@@ -0,0 +1,206 @@
+"""
+This module has the out-of-core generation of djenerator. If the setting
+DJENERATOR_OUT_OF_CORE is set to a number of rows, the instances of every
+model are generated, inserted and released in chunks of this number of rows,
+so the memory doesn't grow with the size of the generated data.
+
+The primary keys of the generated instances of every model (and the other
+fields referenced by related fields) are written in chunks to files of a
+work directory (in the format of the stored pools of values), which are
+memory mapped, and the targets of the related fields are sampled from them.
+The work directory is created in DJENERATOR_SPILL_DIR (by default,
+DJENERATOR_CACHE_DIR), and deleted at the end of the generation.
+"""
+import bisect
+import contextlib
+import mmap
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+from collections.abc import Sequence
+
+from .pools import MappedPool, values_codec, write_pool
+from .rng import random
+from .sampling import related_target
+from .utils import cache_dir, field_name, get_setting, is_required, is_unique
+
+
+class LazyPermutation(object):
+    """
+    A random permutation of range(count), shuffled while it is drawn (with a
+    Fisher-Yates shuffle), in a memory mapped file. The file is sparse, an
+    item of zero is the identity, otherwise the value plus one.
+    """
+    def __init__(self, path: str, count: int):
+        with open(path, "w+b") as permutation_file:
+            permutation_file.truncate(max(count, 1) * 8)
+            self.data = mmap.mmap(permutation_file.fileno(), 0)
+        self.items = memoryview(self.data).cast("q")
+        self.count = count
+        self.position = 0
+
+    def draw(self, size: int) -> list:
+        """
+        Draw the next 'size' values of the permutation, or fewer if it is
+        exhausted.
+        """
+        drawn = []
+        end = min(self.count, self.position + size)
+        for position in range(self.position, end):
+            idx = random.randint(position, self.count - 1)
+            drawn.append((self.items[idx] or idx + 1) - 1)
+            self.items[idx] = self.items[position] or position + 1
+        self.position = end
+        return drawn
+
+    def close(self):
+        self.items.release()
+        self.data.close()
+
+
+class SpilledColumn(Sequence):
+    """
+    The values of a column of the generated instances of a model, appended in
+    chunks to files of the work directory. The values which can't be stored
+    (see pools.values_codec) are kept in memory.
+    """
+    def __init__(self, field, path: str):
+        self.field = field
+        self.path = path
+        self.chunks = []
+        # The number of values up to the end of every chunk.
+        self.ends = []
+
+    def __len__(self):
+        return self.ends[-1] if self.ends else 0
+
+    def __getitem__(self, idx: int):
+        if not 0 <= idx < len(self):
+            raise IndexError("column index out of range")
+        pos = bisect.bisect_right(self.ends, idx)
+        return self.chunks[pos][idx - (self.ends[pos - 1] if pos else 0)]
+
+    def append(self, values: list):
+        """
+        Append the values of a chunk of generated instances.
+        """
+        if not values:
+            return
+        codec_idx = values_codec(self.field, values)
+        chunk = values
+        if codec_idx is not None:
+            path = "%s.%d.bin" % (self.path, len(self.chunks))
+            write_pool(path, codec_idx, values)
+            chunk = MappedPool(path)
+        self.chunks.append(chunk)
+        self.ends.append(len(self) + len(values))
+
+    def close(self):
+        for chunk in self.chunks:
+            if isinstance(chunk, MappedPool):
+                chunk.close()
+
+
+def target_fields(model_cls) -> list:
+    """
+    The fields of a model referenced by the related fields: its primary key,
+    and the fields given as 'to_field'.
+    """
+    fields = [model_cls._meta.pk]
+    for relation in model_cls._meta.related_objects:
+        target = related_target(relation.field)
+        if target not in fields:
+            fields.append(target)
+    return fields
+
+
+class SpilledKeys(Sequence):
+    """
+    The keys of the generated instances of a model: their primary keys, and
+    the other fields referenced by the related fields, in spilled columns.
+    """
+    def __init__(self, model_cls, directory: str):
+        path = os.path.join(directory, model_cls._meta.label)
+        self.columns = OrderedDict(
+            (field.attname, SpilledColumn(
+                field, "%s.%s" % (path, field.attname)
+            )) for field in target_fields(model_cls)
+        )
+        self.pk = self.columns[model_cls._meta.pk.attname]
+        self.path = path
+        # The permutations of the keys drawn by the unique related fields.
+        self.permutations = {}
+
+    def __len__(self):
+        return len(self.pk)
+
+    def __getitem__(self, idx: int):
+        return self.pk[idx]
+
+    def append(self, models: list):
+        """
+        Append the keys of a chunk of generated instances.
+        """
+        for name, column in self.columns.items():
+            column.append([getattr(model, name) for model in models])
+
+    def iter_chunks(self):
+        """
+        Iterate over the chunks of primary keys, as lists.
+        """
+        for chunk in self.pk.chunks:
+            yield list(chunk)
+
+    def sample(self, field, size: int, allow_null: bool = False) -> list:
+        """
+        Sample 'size' targets for a related field, with replacement, or
+        without replacement if the field is unique, in which case the targets
+        are not drawn again by the following chunks of the field.
+
+        :param allow_null: Allow null values to appear.
+        """
+        column = self.columns[related_target(field).attname]
+        count = len(column)
+        if not is_unique(field):
+            return [
+                column[idx] if idx < count else None
+                for idx in (
+                    random.randrange(count + allow_null) for _ in range(size)
+                )
+            ]
+        key = (field.model._meta.label, field_name(field))
+        permutation = self.permutations.get(key)
+        if permutation is None or permutation.count != count:
+            if permutation is not None:
+                permutation.close()
+            permutation = self.permutations[key] = LazyPermutation(
+                "%s.%s.%s.perm" % (self.path, key[0], key[1]), count
+            )
+        values = [column[idx] for idx in permutation.draw(size)]
+        assert len(values) >= size or not is_required(field), len(values)
+        if len(values) < size:
+            values.extend([None] * (size - len(values)))
+            random.shuffle(values)
+        return values
+
+    def close(self):
+        for column in self.columns.values():
+            column.close()
+        for permutation in self.permutations.values():
+            permutation.close()
+
+
+@contextlib.contextmanager
+def spill_dir():
+    """
+    Create a work directory for the spilled keys, in a with block, which is
+    deleted at the end of the block.
+    """
+    parent = get_setting("SPILL_DIR") or cache_dir()
+    os.makedirs(parent, exist_ok=True)
+    directory = tempfile.mkdtemp(prefix="spill-", dir=parent)
+    try:
+        yield directory
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,245 @@
+"""
+This module has the storage writes of FileFields and ImageFields.
+
+A pool of files stores a fixed number of distinct files once, under names
+derived from the hashes of their contents, and the generated values
+reference these files, so the writes to the storage don't grow with the
+number of rows.
+
+A storage writer writes the files of the generated values concurrently in a
+bounded pool of threads, either as soon as the values are generated, or
+deferred until their rows are inserted.
+"""
+import hashlib
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.utils.crypto import get_random_string
+
+from .rng import random
+from .utils import get_setting
+
+
+logger = logging.getLogger(__name__)
+
+
+class FilePool(object):
+    """
+    A pool of distinct files of a field, the files are generated and stored
+    on the first use. If links is True and the storage is on the file
+    system, every value is a distinct hard link to a file of the pool.
+
+    :param field: A FileField or an ImageField.
+    :param size: The number of distinct files.
+    :param generate:
+        A function with no arguments, returning the name and the content of
+        a random file.
+    """
+    def __init__(self, field, size: int, generate, links: bool = False):
+        self.field = field
+        self.size = size
+        self.generate = generate
+        self.links = links and isinstance(field.storage, FileSystemStorage)
+        self.names = None
+
+    def store(self, name: str, content) -> str:
+        """
+        Store a content under the hash of the content, keeping the extension
+        of the given name. An existing file with the same name is reused.
+        """
+        if isinstance(content, str):
+            content = content.encode()
+        extension = os.path.splitext(name)[1]
+        digest = hashlib.sha256(content).hexdigest()[:32]
+        name = self.field.generate_filename(None, digest + extension)
+        if self.field.storage.exists(name):
+            return name
+        return self.field.storage.save(name, ContentFile(content))
+
+    def fill(self):
+        names = set([])
+        for _ in range(self.size):
+            names.add(self.store(*self.generate()))
+        self.names = sorted(names)
+
+    def link(self, name: str) -> str:
+        """
+        Create a hard link to a file of the pool, with a random available
+        name, or return the name of the file of the pool if it fails.
+        """
+        storage = self.field.storage
+        extension = os.path.splitext(name)[1]
+        new_name = storage.get_available_name(self.field.generate_filename(
+            None, "%016x%s" % (random.getrandbits(64), extension)
+        ))
+        try:
+            os.makedirs(os.path.dirname(storage.path(new_name)), exist_ok=True)
+            os.link(storage.path(name), storage.path(new_name))
+        except OSError:
+            return name
+        return new_name
+
+    def value(self):
+        """
+        Get a value of the field referencing a random file of the pool.
+        """
+        if self.names is None:
+            self.fill()
+        name = random.choice(self.names)
+        if self.links:
+            name = self.link(name)
+        return self.field.attr_class(None, self.field, name)
+
+
+# The pools of the fields, by the fields and the sizes of the pools.
+FILE_POOLS = {}
+
+
+def file_pool(field, size: int, generate) -> FilePool:
+    """
+    Get the pool of files of a field, which is created on the first use.
+    """
+    key = (field, size)
+    if key not in FILE_POOLS:
+        FILE_POOLS[key] = FilePool(
+            field, size, generate,
+            links=get_setting("FILE_POOL_LINKS", False),
+        )
+    return FILE_POOLS[key]
+
+
+class StorageWriter(object):
+    """
+    Write the files of the generated values in a pool of threads. The names
+    of the files are reserved when the values are generated, so the values
+    can be inserted before their files are written.
+
+    :param workers: The number of threads writing to the storages.
+    :param defer:
+        If True, the files are written only when their rows are inserted
+        (see commit), the files of the skipped rows are never written.
+    """
+    def __init__(self, workers: int, defer: bool = False):
+        self.workers = workers
+        self.defer = defer
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        # At most 2 writes per thread are waiting, the generation blocks
+        # when the storage falls behind.
+        self.slots = threading.BoundedSemaphore(2 * workers)
+        self.futures = []
+        self.pending = {}
+        self.reserved = set([])
+
+    def reserve(self, field, name: str) -> str:
+        storage = field.storage
+        name = storage.get_available_name(
+            field.generate_filename(None, name), max_length=field.max_length
+        )
+        while name in self.reserved:
+            root, extension = os.path.splitext(name)
+            name = storage.get_available_name(
+                "%s_%s%s" % (root, get_random_string(7), extension),
+                max_length=field.max_length,
+            )
+        self.reserved.add(name)
+        return name
+
+    def write(self, storage, name: str, content):
+        try:
+            saved = storage.save(name, ContentFile(content))
+            if saved != name:
+                logger.warning(
+                    "file %s was stored as %s, as it already exists",
+                    name, saved
+                )
+        finally:
+            self.slots.release()
+
+    def submit(self, storage, name: str, content):
+        self.slots.acquire()
+        try:
+            future = self.executor.submit(self.write, storage, name, content)
+        except BaseException:
+            self.slots.release()
+            raise
+        self.futures.append(future)
+
+    def value(self, field, name: str, content, file_class):
+        """
+        Get a value of the field for a generated file, the file is written
+        now, or when its row is inserted if the writes are deferred.
+        """
+        name = self.reserve(field, name)
+        value = file_class(None, field, name)
+        if self.defer:
+            self.pending[(field.storage, name)] = content
+        else:
+            self.submit(field.storage, name, content)
+        return value
+
+    def commit(self, values):
+        """
+        Write the deferred files of some values of an inserted row.
+        """
+        for value in values:
+            storage = getattr(value, "storage", None)
+            key = (storage, getattr(value, "name", None))
+            if storage is not None and key in self.pending:
+                self.submit(storage, key[1], self.pending.pop(key))
+
+    def wait(self):
+        """
+        Wait for all the submitted writes, the deferred files which are not
+        committed are discarded.
+        """
+        self.pending.clear()
+        self.reserved.clear()
+        futures, self.futures = self.futures, []
+        for future in futures:
+            future.result()
+
+    def shutdown(self):
+        self.wait()
+        self.executor.shutdown()
+
+
+# The storage writer of the current settings.
+STORAGE_WRITER = None
+
+
+def storage_writer():
+    """
+    Get the storage writer, if concurrent writes are enabled by the setting
+    DJENERATOR_STORAGE_WORKERS, otherwise None.
+    """
+    global STORAGE_WRITER
+    workers = get_setting("STORAGE_WORKERS", 0)
+    defer = get_setting("DEFER_STORAGE_WRITES", False)
+    if STORAGE_WRITER is not None and (
+        STORAGE_WRITER.workers != workers or STORAGE_WRITER.defer != defer
+    ):
+        STORAGE_WRITER.shutdown()
+        STORAGE_WRITER = None
+    if STORAGE_WRITER is None and workers:
+        STORAGE_WRITER = StorageWriter(workers, defer)
+    return STORAGE_WRITER
+
+
+def commit_files(values):
+    """
+    Write the deferred files of the values of an inserted row.
+    """
+    if STORAGE_WRITER is not None:
+        STORAGE_WRITER.commit(values)
+
+
+def wait_for_files():
+    """
+    Wait for all the pending writes of files.
+    """
+    if STORAGE_WRITER is not None:
+        STORAGE_WRITER.wait()
@@ -1,10 +1,41 @@
 
+import functools
 import inspect
-import random
+import json
+import os
+import tempfile
 from importlib import import_module
+from importlib.util import find_spec
 
+from django.conf import settings
 from django.core.exceptions import ValidationError
 
+from .rng import random
+
+
+class LazyModule(object):
+    """
+    A module which is imported on the first access to its attributes.
+    """
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = import_module(self._name)
+        return getattr(self._module, attr)
+
+
+def lazy_import(name: str):
+    """
+    Get an optional module, which is imported on the first use, or None if
+    it isn't installed.
+    """
+    if find_spec(name) is None:
+        return None
+    return LazyModule(name)
+
 
 def is_django_model_class(cls) -> bool:
     """
@@ -104,6 +135,19 @@ def field_name(field) -> str:
     return field.name
 
 
+def column_name(field) -> str:
+    """
+    Get the key of the generated values of a field. Since the values of the
+    related fields are the keys of the referenced instances, their key is
+    the attribute name of the field (like "owner_id").
+
+    :param DjangoField field: A reference to the given field.
+    """
+    if is_unidirectional_related(field):
+        return field.attname
+    return field_name(field)
+
+
 def is_auto_field(field) -> bool:
     """
     Test if a given field is an Auto-Field.
@@ -241,6 +285,24 @@ def make_generator(func):
         yield func()
 
 
+def make_batch_generator(func, size: int):
+    """
+    Create an infinite generator out of a function returning lists of 'size'
+    random values.
+    """
+    while True:
+        for value in func(size):
+            yield value
+
+
+def canonical_json(value) -> str:
+    """
+    Serialize a JSON value canonically, equal values have equal
+    serializations.
+    """
+    return json.dumps(value, sort_keys=True, separators=(",", ":"))
+
+
 def choices(lst: list, k: int = 1) -> list:
     """
     Select k random values randomly from a list.
@@ -251,6 +313,7 @@ def choices(lst: list, k: int = 1) -> list:
         return [random.choice(lst) for _ in range(k)]
 
 
+@functools.lru_cache(maxsize=None)
 def get_timezone(tz: str):
     """
     Get the timezone from the timezone.
@@ -265,3 +328,43 @@ def get_timezone(tz: str):
         except Exception:
             import pytz
             return pytz.timezone(tz)
+
+
+def get_setting(name: str, default=None):
+    """
+    Get an optional setting of djenerator, named DJENERATOR_<name> in the
+    settings of the project.
+    """
+    return getattr(settings, "DJENERATOR_" + name, default)
+
+
+def cache_dir() -> str:
+    """
+    Get the directory of the files cached by djenerator, which is the setting
+    DJENERATOR_CACHE_DIR, or a directory in the temporary directory.
+    """
+    path = get_setting("CACHE_DIR") or os.path.join(
+        tempfile.gettempdir(), "djenerator"
+    )
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def atomic_write(path: str, chunks):
+    """
+    Write the chunks of bytes to a file atomically, the file is written to a
+    temporary file in the same directory, then moved to the given path. So,
+    concurrent readers only see complete files.
+    """
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path) or ".", prefix=".tmp-"
+    )
+    try:
+        with os.fdopen(fd, "wb") as tmp_file:
+            for chunk in chunks:
+                tmp_file.write(chunk)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
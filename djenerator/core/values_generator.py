@@ -1,56 +1,159 @@
 """
 This module has functions that generated random values for django fields.
 """
+import array
+import bisect
 import datetime
+import functools
+import hashlib
 import math
+import mmap
 import os
-import random
+import re
 import struct
 import uuid
 import zlib
-from decimal import Decimal
-from itertools import islice
+from collections.abc import Mapping, Sequence
+from decimal import Context, Decimal
+from itertools import accumulate
 
 from django.utils.text import slugify
 
 from .exceptions import InconsistentDefinition
-from .utils import choices, get_timezone
+from .rng import current_stream, current_time, random
+from .utils import (
+    atomic_write,
+    cache_dir,
+    canonical_json,
+    choices,
+    get_setting,
+    get_timezone,
+    lazy_import,
+)
 
 
-def generate_positive_log(mx):
-    return min(mx, int(round(math.exp(math.log(mx) * random.random()))))
+# numpy is optional, and only imported when a batch generator uses it.
+numpy = lazy_import("numpy")
 
 
-def generate_integer(bits=32, negative_allowed=True, mn=None, mx=None, step=1):
+def generate_positive_log(mx, rng=None):
+    if mx <= 0:
+        return 0
+    rng = rng or random
+    return min(mx, int(round(math.exp(math.log(mx) * rng.random()))))
+
+
+def numpy_generator(rng=None):
+    """
+    Get a numpy random Generator for a given random number generator, which
+    is either a numpy Generator, or seeds one (like the random module). By
+    default, it is the Generator of the current random stream if any.
+    """
+    if rng is not None and hasattr(rng, "bit_generator"):
+        return rng
+    if rng is None and current_stream() is not None:
+        return current_stream().numpy()
+    return numpy.random.default_rng((rng or random).getrandbits(64))
+
+
+def integer_ranges(bits=32, negative_allowed=True, mn=None, mx=None, step=1):
+    """
+    Compute the ranges of the positive and the negative multipliers of step,
+    which are allowed by the given constraints, None if a sign is not allowed.
+    """
     if mn is not None and mx is not None:
         assert mn <= mx, (mn, mx)
 
-    positive_allowed = mx is None or math.floor(mx / step) >= 0
+    positive_allowed = mx is None or mx // step >= 0
     negative_allowed = (
-        negative_allowed and (mn is None or math.ceil(mn / step) < 0)
+        negative_allowed and (mn is None or -(-mn // step) < 0)
     )
-    assert negative_allowed or positive_allowed,\
+    assert negative_allowed or positive_allowed, (
         "No values are allowed with the given constraints"
-    if negative_allowed and positive_allowed:
-        positive = random.choice([True, False])
-    else:
-        positive = positive_allowed and not negative_allowed
+    )
+    positive = negative = None
+    if positive_allowed:
+        pos_mx = int((mx or (2 ** (bits - 1) - 1)) // step)
+        pos_mn = -int(-max(mn or 0, 0) // step)
+        assert pos_mn <= pos_mx, (
+            "No values are allowed with the given constraints"
+        )
+        positive = (pos_mn, pos_mx)
+    if negative_allowed:
+        neg_mn = -int((mn or -(2 ** (bits - 1))) // -step)
+        neg_mx = int(min(mx or -1, -1) // step)
+        assert neg_mn <= neg_mx, (
+            "No values are allowed with the given constraints"
+        )
+        negative = (neg_mn, neg_mx)
+    return positive, negative
 
-    if positive:
-        mx = mx or (2 ** (bits - 1) - 1)
-        mn = max(mn or 0, 0)
-        mx = math.floor(mx / step)
-        mn = math.ceil(mn / step)
-        assert mn <= mx, "No values are allowed with the given constraints"
 
-        return (generate_positive_log(mx - mn) + mn) * step
-    else:
-        mn = mn or -(2 ** (bits - 1))
-        mx = min(mx or -1, -1)
-        mx = math.floor(mx / step)
-        mn = math.ceil(mn / step)
-        assert mn <= mx, "No values are allowed with the given constraints"
-        return (mx - generate_positive_log(mx - mn)) * step
+def positive_log_array(rng, mx, size):
+    """
+    A numpy version of generate_positive_log, for an array of values. The
+    values that don't fit in 64 bits after rounding are clipped to mx.
+    """
+    if mx <= 0:
+        return numpy.zeros(size, dtype=numpy.int64)
+    values = numpy.rint(numpy.exp(math.log(mx) * rng.random(size)))
+    big = values >= 2.0 ** 63
+    values = numpy.where(big, 0, values).astype(numpy.int64)
+    values[big] = mx
+    return numpy.minimum(values, mx)
+
+
+def generate_integer_batch(size, bits=32, mn=None, mx=None, step=1, rng=None,
+                           negative_allowed=True):
+    """
+    Generate a list of random integers, with the same distribution as
+    generate_integer, the absolute values are log-scaled. The values are
+    generated with numpy array operations if numpy is installed and the
+    values fit in 64 bits.
+    """
+    positive, negative = integer_ranges(bits, negative_allowed, mn, mx, step)
+    bounds = [
+        bound * step for rng_ in (positive, negative) if rng_ is not None
+        for bound in rng_
+    ]
+    if (
+        numpy is not None and size >= 64 and
+        all(-2 ** 63 <= bound < 2 ** 63 for bound in bounds)
+    ):
+        gen = numpy_generator(rng)
+        if positive is not None and negative is not None:
+            is_positive = gen.random(size) < 0.5
+        else:
+            is_positive = numpy.full(size, positive is not None)
+        values = numpy.zeros(size, dtype=numpy.int64)
+        if positive is not None:
+            count = int(is_positive.sum())
+            values[is_positive] = (positive_log_array(
+                gen, positive[1] - positive[0], count
+            ) + positive[0]) * step
+        if negative is not None:
+            count = size - int(is_positive.sum())
+            values[~is_positive] = (negative[1] - positive_log_array(
+                gen, negative[1] - negative[0], count
+            )) * step
+        return values.tolist()
+
+    rng = rng or random
+    values = []
+    for _ in range(size):
+        if positive is not None and (negative is None or rng.random() < 0.5):
+            lo, hi = positive
+            values.append((generate_positive_log(hi - lo, rng) + lo) * step)
+        else:
+            lo, hi = negative
+            values.append((hi - generate_positive_log(hi - lo, rng)) * step)
+    return values
+
+
+def generate_integer(bits=32, negative_allowed=True, mn=None, mx=None, step=1):
+    return generate_integer_batch(
+        1, bits, mn=mn, mx=mx, step=step, negative_allowed=negative_allowed
+    )[0]
 
 
 def generate_big_integer(mn=None, mx=None, step=1):
@@ -83,16 +186,44 @@ def generate_boolean(null_allowed=False):
         return bool(res)
 
 
-def generate_ip(v4=True, v6=True):
-    ip4 = '.'.join([str(random.randint(0, 255)) for _ in range(4)])
-    ip6 = ':'.join([hex(random.randint(0, 2 ** 16 - 1))[2:].upper()
-                    for _ in range(8)])
+def random_bytes(size):
+    """
+    Get a buffer of random bytes from the random module in one call, so the
+    values drawn from it are reproducible with random.seed.
+    """
+    if size <= 0:
+        return b""
+    return random.getrandbits(8 * size).to_bytes(size, "little")
+
+
+def generate_ip_batch(size, v4=True, v6=True):
+    """
+    Generate a list of random IP addresses, from one buffer of random bytes.
+    If both protocols are allowed, each value is either protocol equally
+    likely.
+    """
+    if size <= 0:
+        return []
     if v4 and v6:
-        return random.choice([ip4, ip6])
-    if v6:
-        return ip6
+        is_v4 = [bit == "1" for bit in bin(
+            random.getrandbits(size) | (1 << size)
+        )[3:]]
     else:
-        return ip4
+        is_v4 = [not v6] * size
+    count_v4 = sum(is_v4)
+    ip4 = (
+        "%d.%d.%d.%d" % value
+        for value in struct.iter_unpack("4B", random_bytes(4 * count_v4))
+    )
+    ip6 = (
+        "%X:%X:%X:%X:%X:%X:%X:%X" % value for value in
+        struct.iter_unpack(">8H", random_bytes(16 * (size - count_v4)))
+    )
+    return [next(ip4) if flag else next(ip6) for flag in is_v4]
+
+
+def generate_ip(v4=True, v6=True):
+    return generate_ip_batch(1, v4, v6)[0]
 
 
 def generate_comma_separated_int(max_length):
@@ -103,9 +234,7 @@ def generate_comma_separated_int(max_length):
     return str.join(',', number)
 
 
-def generate_string(
-    max_length, min_length=1, lower=True, upper=True, digits=True, special=True
-):
+def string_alphabet(lower=True, upper=True, digits=True, special=True):
     allowed_characters = ""
     if lower:
         allowed_characters += "abcdefghijklmnopqrstuvwxyz"
@@ -117,22 +246,103 @@ def generate_string(
         allowed_characters += ''.join(special)
     elif special is True:
         allowed_characters += "!\"#$%&'()*+,-./:;<=>?@[\\]^_`{|}~"
+    return allowed_characters
+
 
+def generate_string(
+    max_length, min_length=1, lower=True, upper=True, digits=True, special=True
+):
+    allowed_characters = string_alphabet(lower, upper, digits, special)
     length = random.randint(min_length, max_length)
-    return ''.join([random.choice(allowed_characters) for _ in range(length)])
+    return ''.join(choices(allowed_characters, k=length))
+
+
+def generate_string_batch(
+    size, max_length, min_length=1, lower=True, upper=True, digits=True,
+    special=True
+):
+    """
+    Generate a list of random strings, the characters of all the strings are
+    drawn at once (as numpy indices into the alphabet if numpy is installed),
+    then the strings are sliced at their offsets.
+    """
+    allowed_characters = string_alphabet(lower, upper, digits, special)
+    if numpy is not None:
+        gen = numpy_generator()
+        lengths = gen.integers(min_length, max_length + 1, size).tolist()
+        codes = numpy.array(list(map(ord, allowed_characters)), "<u4")
+        text = codes[gen.integers(0, len(codes), sum(lengths))].tobytes()
+        text = text.decode("utf-32-le")
+    else:
+        lengths = choices(range(min_length, max_length + 1), k=size)
+        text = ''.join(choices(allowed_characters, k=sum(lengths)))
+    return [
+        text[end - length:end]
+        for end, length in zip(accumulate(lengths), lengths)
+    ]
+
+
+# The generated date times are in the last 3 years.
+DATE_TIME_RANGE = 3600 * 24 * 365 * 3
 
 
 def generate_date_time(auto_now=False, tz=None):
     if tz is not None:
         tz = get_timezone(tz)
-    now = datetime.datetime.now(tz=tz)
+    now = current_time(tz)
     if auto_now:
         return now
     else:
-        delta = generate_positive_log(3600 * 24 * 365 * 3)
+        delta = generate_positive_log(DATE_TIME_RANGE)
         return datetime.datetime.fromtimestamp(now.timestamp() - delta, tz=tz)
 
 
+def generate_time_offsets(size):
+    """
+    Generate a list of random numbers of seconds, log-scaled up to
+    DATE_TIME_RANGE, like the offsets of generate_date_time from now.
+    """
+    if numpy is not None and size >= 64:
+        return positive_log_array(
+            numpy_generator(), DATE_TIME_RANGE, size
+        ).tolist()
+    return [generate_positive_log(DATE_TIME_RANGE) for _ in range(size)]
+
+
+def generate_date_time_batch(size, auto_now=False, tz=None):
+    """
+    Generate a list of random date times, with the distribution of
+    generate_date_time. The timezone and the current time are resolved once
+    for all the values.
+    """
+    if tz is not None:
+        tz = get_timezone(tz)
+    now = current_time(tz)
+    if auto_now:
+        return [now] * size
+    timestamp = now.timestamp()
+    fromtimestamp = datetime.datetime.fromtimestamp
+    return [
+        fromtimestamp(timestamp - delta, tz=tz)
+        for delta in generate_time_offsets(size)
+    ]
+
+
+def generate_duration_batch(size, auto_now=False):
+    """
+    Generate a list of random durations, each is the duration between two
+    random date times of generate_date_time.
+    """
+    if auto_now:
+        return [datetime.timedelta(0)] * size
+    timedelta = datetime.timedelta
+    return [
+        timedelta(seconds=abs(first - second)) for first, second in zip(
+            generate_time_offsets(size), generate_time_offsets(size)
+        )
+    ]
+
+
 def generate_date(auto_now=False, tz=None):
     return generate_date_time(auto_now, tz).date()
 
@@ -141,77 +351,275 @@ def generate_time(auto_now=False, tz=None):
     return generate_date_time(auto_now, tz).time()
 
 
-def generate_dictionary():
-    """
-    Retrieve the list of words from the unix dictionary
-
-    :rtype: List[Str]
-    Returns: List of English words.
-    """
-    for fl in [os.path.join("usr", "dict", "words"),
-               os.path.join("usr", "share", "dict", "words")]:
-        if os.path.isfile(fl):
-            with open(fl, "r") as f:
-                words = f.read().split("\n")[:-1]
-            words = list(filter(
-                lambda x: len(x) in [3, 4, 5, 6, 7] and "'" not in x, words
-            ))
-    # precomputed list of random words in case the words file doesn't exist.
-    words = [
-        'Aerope', 'scowder', 'towmast', 'amla', 'choaty', 'Sosia', 'pagus',
-        'gasper', 'mongery', 'pewing', 'chinkle', 'knyazi', 'darg', 'pomfret',
-        'inure', 'reactor', 'phulwa', 'coseat', 'allege', 'attire', 'hardish',
-        'expel', 'bounder', 'side', 'amidin', 'fogdom', 'chiefly', 'pontage',
-        'valved', 'bib', 'postil', 'hominal', 'basidia', 'bobfly', 'barring',
-        'retral', 'Laurus', 'unbosom', 'cooncan', 'Ophitic', 'lampers',
-        'togate', 'doltish', 'awiggle', 'Scilla', 'lumbago', 'mirrory',
-        'alkamin', 'tambour', 'Paulus', 'Succisa', 'Grewia', 'concha', 'ripup',
-        'alloxan', 'eelfish', 'skookum', 'twee', 'clubbed', 'tow', 'khoja',
-        'glazing', 'mulish', 'egilops', 'phallin', 'Kubanka', 'Kiowan',
-        'becovet', 'Janus', 'incuse', 'adonite', 'mopus', 'baybush', 'proddle',
-        'chol', 'Lolium', 'dull', 'dixie', 'becuna', 'brother', 'remould',
-        'danger', 'prancy', 'collie', 'Alumel', 'admi', 'knockup', 'warsaw',
-        'clue', 'bail', 'visaged', 'begowk', 'smiter', 'cityish', 'goli',
-        'pokeout', 'Jambos', 'Dione', 'Sabuja', 'darter', 'wasty', 'insurge',
-        'outre', 'surmise', 'Aniba', 'unsoled', 'grouper', 'sell', 'kickish',
-        'pawkily', 'cytost', 'seraw', 'kanat', 'relish', 'pegbox', 'Sindhi',
-        'Pravin', 'duet', 'uncost', 'swungen', 'hitchy', 'nidana', 'look',
-        'Danny', 'canhoop', 'enhusk', 'ferrado', 'James', 'zaptieh', 'deva',
-        'gaduin', 'sneezer', 'smout', 'clapnet', 'atter', 'thermit', 'Darin',
-        'reif', 'Fidac', 'torpent', 'Alawi', 'prig', 'uranous', 'stenog',
-        'datch', 'rewet', 'resaw', 'cleg', 'marcher', 'suimate', 'writhen',
-        'ovology', 'upwound', 'myron', 'Picus', 'oration', 'protium',
-        'ambrite', 'inflate', 'townee', 'octuple', 'Delbert', 'mix', 'Antonia',
-    ]
-    dic = {}
-    for word in words:
-        if len(word) not in dic.keys():
-            dic[len(word)] = []
-        dic[len(word)].append(word)
-    return dic
+# The dictionaries of words tried in order.
+WORDS_FILES = ["/usr/share/dict/words", "/usr/dict/words"]
+
+WORDS_MAGIC = b"DJWD0001"
+
+# The lengths of the words of the dictionary.
+WORD_LENGTHS = range(3, 8)
+
+# A precomputed list of random words in case the words file doesn't exist.
+FALLBACK_WORDS = [
+    'Aerope', 'scowder', 'towmast', 'amla', 'choaty', 'Sosia', 'pagus',
+    'gasper', 'mongery', 'pewing', 'chinkle', 'knyazi', 'darg', 'pomfret',
+    'inure', 'reactor', 'phulwa', 'coseat', 'allege', 'attire', 'hardish',
+    'expel', 'bounder', 'side', 'amidin', 'fogdom', 'chiefly', 'pontage',
+    'valved', 'bib', 'postil', 'hominal', 'basidia', 'bobfly', 'barring',
+    'retral', 'Laurus', 'unbosom', 'cooncan', 'Ophitic', 'lampers',
+    'togate', 'doltish', 'awiggle', 'Scilla', 'lumbago', 'mirrory',
+    'alkamin', 'tambour', 'Paulus', 'Succisa', 'Grewia', 'concha', 'ripup',
+    'alloxan', 'eelfish', 'skookum', 'twee', 'clubbed', 'tow', 'khoja',
+    'glazing', 'mulish', 'egilops', 'phallin', 'Kubanka', 'Kiowan',
+    'becovet', 'Janus', 'incuse', 'adonite', 'mopus', 'baybush', 'proddle',
+    'chol', 'Lolium', 'dull', 'dixie', 'becuna', 'brother', 'remould',
+    'danger', 'prancy', 'collie', 'Alumel', 'admi', 'knockup', 'warsaw',
+    'clue', 'bail', 'visaged', 'begowk', 'smiter', 'cityish', 'goli',
+    'pokeout', 'Jambos', 'Dione', 'Sabuja', 'darter', 'wasty', 'insurge',
+    'outre', 'surmise', 'Aniba', 'unsoled', 'grouper', 'sell', 'kickish',
+    'pawkily', 'cytost', 'seraw', 'kanat', 'relish', 'pegbox', 'Sindhi',
+    'Pravin', 'duet', 'uncost', 'swungen', 'hitchy', 'nidana', 'look',
+    'Danny', 'canhoop', 'enhusk', 'ferrado', 'James', 'zaptieh', 'deva',
+    'gaduin', 'sneezer', 'smout', 'clapnet', 'atter', 'thermit', 'Darin',
+    'reif', 'Fidac', 'torpent', 'Alawi', 'prig', 'uranous', 'stenog',
+    'datch', 'rewet', 'resaw', 'cleg', 'marcher', 'suimate', 'writhen',
+    'ovology', 'upwound', 'myron', 'Picus', 'oration', 'protium',
+    'ambrite', 'inflate', 'townee', 'octuple', 'Delbert', 'mix', 'Antonia',
+]
+
+
+class WordBucket(Sequence):
+    """
+    The words of the same length, stored contiguously in a buffer (bytes or
+    a memory mapped file), so the i-th word starts at base + i * length.
+    """
+    def __init__(self, data, length: int, count: int, base: int = 0):
+        self.data = data
+        self.length = length
+        self.count = count
+        self.base = base
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, idx: int) -> str:
+        if not 0 <= idx < self.count:
+            if not -self.count <= idx < 0:
+                raise IndexError("word index out of range")
+            idx += self.count
+        beg = self.base + idx * self.length
+        return self.data[beg:beg + self.length].decode("ascii")
+
+    def array(self):
+        """
+        The words as a numpy array of fixed length byte strings, sharing the
+        buffer of the bucket.
+        """
+        return numpy.frombuffer(
+            self.data, dtype="S%d" % self.length, count=self.count,
+            offset=self.base,
+        )
+
+    def lower(self):
+        beg = self.base
+        data = bytes(self.data[beg:beg + self.count * self.length]).lower()
+        return WordBucket(data, self.length, self.count)
+
+
+class WordChain(Sequence):
+    """
+    The words of some buckets, as one sequence.
+    """
+    def __init__(self, buckets: list):
+        self.buckets = buckets
+        self.ends = list(accumulate(len(bucket) for bucket in buckets))
+
+    def __len__(self):
+        return self.ends[-1] if self.ends else 0
+
+    def __getitem__(self, idx: int) -> str:
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError("word index out of range")
+        pos = bisect.bisect_right(self.ends, idx)
+        return self.buckets[pos][idx - (self.ends[pos - 1] if pos else 0)]
+
+
+def read_words(path: str) -> dict:
+    """
+    Read the alphabetic ASCII words of a words file, by their lengths.
+    """
+    words = dict((length, []) for length in WORD_LENGTHS)
+    with open(path, "rb") as fl:
+        for line in fl:
+            word = line.strip()
+            if len(word) in words and word.isalpha() and all(
+                byte < 128 for byte in word
+            ):
+                words[len(word)].append(word)
+    return words
+
+
+def build_dictionary(path: str, words: dict):
+    """
+    Write the words of the dictionary file: a header with the number of the
+    words of each length, then the words of each length contiguously.
+    """
+    counts = [len(words.get(length, [])) for length in range(8)]
+    atomic_write(path, [WORDS_MAGIC, struct.pack("<8I", *counts)] + [
+        b"".join(words.get(length, [])) for length in range(8)
+    ])
+
+
+def map_dictionary(path: str):
+    """
+    Memory map a dictionary file, or return None if it isn't a complete
+    dictionary file of this version.
+    """
+    with open(path, "rb") as fl:
+        if os.fstat(fl.fileno()).st_size < 40:
+            return None
+        data = mmap.mmap(fl.fileno(), 0, access=mmap.ACCESS_READ)
+    counts = struct.unpack("<8I", data[8:40])
+    if data[:len(WORDS_MAGIC)] != WORDS_MAGIC or len(data) < 40 + sum(
+        length * count for length, count in enumerate(counts)
+    ):
+        data.close()
+        return None
+    return data
+
+
+class WordDictionary(Mapping):
+    """
+    The words of the unix dictionary by their lengths, or the fallback words
+    if no words file exists. The words are loaded on the first use, and the
+    words of a words file are cached in DJENERATOR_CACHE_DIR in a file that
+    is memory mapped.
+    """
+    def __init__(self):
+        self.buckets = None
+        self.source = None
+
+    def load(self):
+        path = next((
+            path for path in [get_setting("WORDS_FILE", None)] + WORDS_FILES
+            if path and os.path.isfile(path)
+        ), None)
+        if path is None:
+            self.source = "fallback:%s" % hashlib.sha1(
+                " ".join(FALLBACK_WORDS).encode()
+            ).hexdigest()
+            self.buckets = {}
+            for length in WORD_LENGTHS:
+                words = [w for w in FALLBACK_WORDS if len(w) == length]
+                self.buckets[length] = WordBucket(
+                    "".join(words).encode(), length, len(words)
+                )
+            return
+        stat = os.stat(path)
+        self.source = "%s:%d:%d" % (path, stat.st_mtime_ns, stat.st_size)
+        digest = hashlib.sha1(self.source.encode()).hexdigest()[:16]
+        cache_path = os.path.join(cache_dir(), "words-%s.bin" % digest)
+        data = None
+        if os.path.isfile(cache_path):
+            data = map_dictionary(cache_path)
+        if data is None:
+            build_dictionary(cache_path, read_words(path))
+            data = map_dictionary(cache_path)
+        counts = struct.unpack("<8I", data[8:40])
+        if not any(counts[length] for length in WORD_LENGTHS):
+            raise InconsistentDefinition(
+                "The words file %s has no words of %d to %d letters." % (
+                    path, WORD_LENGTHS[0], WORD_LENGTHS[-1]
+                )
+            )
+        base = 40
+        # Every length has a bucket, which is empty if the words file has no
+        # words of this length.
+        self.buckets = {}
+        for length, count in enumerate(counts):
+            if length in WORD_LENGTHS:
+                self.buckets[length] = WordBucket(data, length, count, base)
+            base += length * count
+
+    def signature(self) -> str:
+        """
+        A string identifying the words, which changes with the words file.
+        """
+        if self.buckets is None:
+            self.load()
+        return self.source
+
+    def __getitem__(self, length: int) -> WordBucket:
+        if self.buckets is None:
+            self.load()
+        return self.buckets[length]
+
+    def __iter__(self):
+        if self.buckets is None:
+            self.load()
+        return iter(self.buckets)
+
+    def __len__(self):
+        if self.buckets is None:
+            self.load()
+        return len(self.buckets)
+
+
+def generate_dictionary() -> WordDictionary:
+    """
+    Retrieve the words from the unix dictionary by their lengths, which are
+    loaded on the first use.
+    """
+    return WordDictionary()
 
 
 WORDS_DICTIONARY = generate_dictionary()
 
 
-def generate_text(max_length=None, min_length=0, sep=" "):
-    max_length = max_length or 1000
-    if max_length <= 8:
-        return generate_sentence(max_length)
+def random_floats(chunk=0):
+    """
+    An endless iterator of random floats in [0, 1), drawn in chunks of numpy
+    arrays if numpy is installed and a chunk size is given.
+    """
+    if numpy is None or chunk <= 1:
+        return iter(random.random, None)
+    return numpy_floats(chunk)
 
-    sentences = random.randint(1, max(1, max_length // 40))
 
-    lengths = [
-        random.randint(5, min(40, max_length)) for _ in range(sentences)
-    ]
+def numpy_floats(chunk):
+    gen = numpy_generator()
+    while True:
+        yield from gen.random(chunk).tolist()
+
+
+def text_lengths(max_length, min_length, sep, floats):
+    """
+    Plan the lengths of the sentences of a text.
+    """
+    sentences = 1 + int(next(floats) * max(1, max_length // 40))
+    width = min(40, max_length) - 4
+    lengths = [5 + int(next(floats) * width) for _ in range(sentences)]
     if sum(lengths) + max(len(lengths) - 1, 0) * len(sep) < min_length:
         rem = min_length - sum(lengths) - max(len(lengths) - 1, 0) * len(sep)
         if rem < 3:
             lengths[-1] += rem
         else:
             lengths.append(rem)
+    return lengths
+
+
+def generate_text(max_length=None, min_length=0, sep=" ", pool=None):
+    max_length = max_length or 1000
+    if max_length <= 8:
+        return generate_sentence(max_length, pool=pool)
 
-    res = sep.join((generate_sentence(length) for length in lengths))
+    floats = pool.floats if pool is not None else random_floats()
+    lengths = text_lengths(max_length, min_length, sep, floats)
+    res = sep.join([
+        generate_sentence(length, pool=pool) for length in lengths
+    ])
     assert len(res) >= min_length and len(res) <= max_length,\
         (lengths, sum(lengths), min_length, max_length)
     return res
@@ -228,6 +636,17 @@ def generate_text(max_length=None, min_length=0, sep=" "):
     # return str.join(' ', text)
 
 
+def generate_text_batch(size, max_length=None, min_length=0, sep=" "):
+    """
+    Generate a list of random texts, sharing a pool of random words.
+    """
+    pool = WordPool()
+    return [
+        generate_text(max_length, min_length, sep, pool=pool)
+        for _ in range(size)
+    ]
+
+
 # def generate_sentence(max_length, lower=True, upper=False, digits=False,
 #                       seperator=' ', endchar=['.'], exact=False):
 #     if max_length < 3:
@@ -268,62 +687,239 @@ def generate_text(max_length=None, min_length=0, sep=" "):
 #     return str.join('', words)
 
 
-def generate_sentence(length, seperators=" ", endchar="."):
+LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+
+@functools.lru_cache(maxsize=1)
+def word_tables() -> tuple:
+    """
+    The words of WORDS_DICTIONARY indexed by their lengths, and for every
+    remaining length of a sentence, the lengths of the words that fit in it.
+    """
+    words = tuple(WORDS_DICTIONARY.get(length, ()) for length in range(8))
+    fitting = tuple(
+        tuple(
+            length for length in range(3, min(budget, 7) + 1)
+            if len(words[length])
+        ) for budget in range(8)
+    )
+    return words, fitting
+
+
+class WordPool(object):
+    """
+    A pool of random words for generating sentences in batches. The words
+    that fit anywhere in a sentence (lengths 3 to 7) are drawn at once, with
+    the cumulative lengths of the words, each followed by a seperator. The
+    words at the beginning of a sentence, as long as the longest word still
+    fits, are then found by bisection in the pool, and only the last few
+    words of a sentence are drawn one by one.
+    """
+    def __init__(self, chunk=4096):
+        self.chunk = chunk
+        self.floats = random_floats(chunk)
+        self.words = []
+        self.cumulative = [0]
+        self.pos = 0
+
+    def refill(self, count):
+        words, fitting = word_tables()
+        # The lengths of the words that fit anywhere, which have words.
+        available = fitting[7]
+        count = max(count, self.chunk)
+        if numpy is not None:
+            gen = numpy_generator()
+            lengths = numpy.array(available)[
+                gen.integers(0, len(available), count)
+            ]
+            counts = numpy.array([len(table) for table in words])
+            indices = (gen.random(count) * counts[lengths]).astype(int)
+            new_words = numpy.empty(count, dtype="U7")
+            for length in available:
+                mask = lengths == length
+                new_words[mask] = words[length].array()[indices[mask]]
+            new_words = new_words.tolist()
+        else:
+            new_words = []
+            for _ in range(count):
+                table = words[available[
+                    int(next(self.floats) * len(available))
+                ]]
+                new_words.append(table[int(next(self.floats) * len(table))])
+        self.words = self.words[self.pos:] + new_words
+        self.cumulative = [0]
+        for word in self.words:
+            self.cumulative.append(self.cumulative[-1] + len(word) + 1)
+        self.pos = 0
+
+    def take(self, length, seperators):
+        """
+        Take the words at the beginning of a sentence of the given length,
+        while the longest word still fits after them.
+        """
+        if length < 7 or any(len(sep) != 1 for sep in seperators):
+            return [], 0
+        if len(self.words) - self.pos < length // 4 + 2:
+            self.refill(length // 4 + 2)
+        beg = self.pos
+        end = bisect.bisect_right(
+            self.cumulative, self.cumulative[beg] + length - 7
+        )
+        self.pos = end
+        words = self.words[beg:end]
+        if len(seperators) == 1:
+            parts = [seperators.join(words)]
+        else:
+            parts = [words[0]]
+            for word in words[1:]:
+                parts.append(
+                    seperators[int(next(self.floats) * len(seperators))]
+                )
+                parts.append(word)
+        return parts, self.cumulative[end] - self.cumulative[beg] - 1
+
+
+def generate_sentence(length, seperators=" ", endchar=".", pool=None):
     """
     Generate a sentence of a specific length, with specific seperators and
     ending character.
     """
-    end = random.choice(endchar) if endchar else ""
+    floats = pool.floats if pool is not None else random_floats()
+    words, fitting = word_tables()
+    end = endchar[int(next(floats) * len(endchar))] if endchar else ""
     length -= len(end)
 
-    res = ""
-    while len(res) + int(bool(res)) < length:
-        max_word_len = length - len(res) - int(bool(res))
-        if res:
-            res += random.choice(seperators)
-        if max_word_len <= 2:
-            for _ in range(max_word_len):
-                res += random.choice("abcdefghijklmnopqrstuvwxyz")
+    parts, size = pool.take(length, seperators) if pool else ([], 0)
+    while size + int(bool(parts)) < length:
+        max_word_len = length - size - int(bool(parts))
+        if parts:
+            parts.append(seperators[int(next(floats) * len(seperators))])
+            size += len(parts[-1])
+        lengths = fitting[min(max_word_len, 7)]
+        if not lengths:
+            parts.extend(
+                LETTERS[int(next(floats) * 26)] for _ in range(max_word_len)
+            )
+            size += max_word_len
             break
+        candidates = words[lengths[int(next(floats) * len(lengths))]]
+        parts.append(candidates[int(next(floats) * len(candidates))])
+        size += len(parts[-1])
+    if size < length:
+        parts.extend(
+            LETTERS[int(next(floats) * 26)] for _ in range(length - size)
+        )
+    res = ''.join(parts)
+    return res[:length] + end
+
+
+def generate_sentence_batch(lengths, seperators=" ", endchar="."):
+    """
+    Generate a list of random sentences of the given lengths, sharing a pool
+    of random words.
+    """
+    pool = WordPool()
+    return [
+        generate_sentence(length, seperators, endchar, pool=pool)
+        for length in lengths
+    ]
+
+
+def decimal_parts(size, max_digits, decimal_places):
+    """
+    Draw the parts of random decimals: the signs, the digits as integers (the
+    scaled values without the decimal point), and the numbers of decimal
+    places. The number of the digits of the integer part is uniform, its first
+    digit is nonzero, and the number of decimal places is uniform, at least 1
+    if decimal places are allowed.
+    """
+    integer_digits = max_digits - decimal_places
+    if numpy is not None and size >= 64 and max_digits <= 18:
+        gen = numpy_generator()
+        powers = 10 ** numpy.arange(19, dtype=numpy.int64)
+        lengths = gen.integers(0, integer_digits + 1, size)
+        low = powers[numpy.maximum(lengths - 1, 0)]
+        integers = gen.integers(low, numpy.maximum(powers[lengths], low + 1))
+        integers[lengths == 0] = 0
+        if decimal_places > 0:
+            places = gen.integers(1, decimal_places + 1, size)
         else:
-            res += random.choice(
-                WORDS_DICTIONARY[random.randint(3, min(max_word_len, 7))]
-            )
-    while len(res) < length:
-        res += random.choice("abcdefghijklmnopqrstuvwxyz")
-    res = res[:length] + end
-    return res
+            places = numpy.zeros(size, dtype=numpy.int64)
+        scaled = integers * powers[places] + gen.integers(0, powers[places])
+        negative = (
+            (numpy.maximum(lengths, 1) + places < max_digits) &
+            (gen.random(size) < 0.5)
+        )
+        return negative.tolist(), scaled.tolist(), places.tolist()
+
+    negative, scaled, places = [], [], []
+    for _ in range(size):
+        length = random.randint(0, integer_digits)
+        integer = random.randint(10 ** (length - 1), 10 ** length - 1)\
+            if length else 0
+        place = random.randint(1, decimal_places) if decimal_places else 0
+        scaled.append(integer * 10 ** place + random.randrange(10 ** place))
+        places.append(place)
+        negative.append(
+            max(length, 1) + place < max_digits and random.random() < 0.5
+        )
+    return negative, scaled, places
+
+
+def generate_decimal_batch(size, max_digits, decimal_places, as_string=False):
+    """
+    Generate a list of random decimals, the values are built from their
+    digits as integers, without parsing strings. If as_string, the values are
+    formatted as the strings of the decimals instead, like the database
+    representation.
+    """
+    negative, scaled, places = decimal_parts(size, max_digits, decimal_places)
+    if as_string:
+        values = []
+        for neg, value, place in zip(negative, scaled, places):
+            text = str(value).rjust(place + 1, "0")
+            if place:
+                text = text[:-place] + "." + text[-place:]
+            values.append("-" + text if neg else text)
+        return values
+    context = Context(prec=max_digits + 1)
+    return [
+        Decimal(-value if neg else value).scaleb(-place, context)
+        for neg, value, place in zip(negative, scaled, places)
+    ]
 
 
 def generate_decimal(max_digits, decimal_places):
-    integer_part_len = max_digits - decimal_places
-    res = ""
-    for _ in range(random.randint(0, integer_part_len)):
-        res += str(random.randint(1 - int(bool(res)), 9))
-    res = res or "0"
-    res += "."
-    for _ in range(random.randint(1, decimal_places)):
-        res += str(random.randint(0, 9))
-    if len(res) < max_digits + 1 and random.random() < 0.5:
-        res = "-" + res
+    return generate_decimal_batch(1, max_digits, decimal_places)[0]
 
-    return Decimal(res)
+
+def generate_float_batch(size, max_digits=30, decimal_places=20):
+    """
+    Generate a list of random floats, the floats of the random decimals of
+    generate_decimal_batch.
+    """
+    negative, scaled, places = decimal_parts(size, max_digits, decimal_places)
+    powers = [10 ** place for place in range(decimal_places + 1)]
+    return [
+        (-value if neg else value) / powers[place]
+        for neg, value, place in zip(negative, scaled, places)
+    ]
 
 
 def generate_float(max_digits=30, decimal_places=20):
-    return float(generate_decimal(max_digits, decimal_places))
+    return generate_float_batch(1, max_digits, decimal_places)[0]
 
 
-def generate_domain_name(max_length=20):
+def generate_domain_name(max_length=20, pool=None):
     dom = ['com', 'de', 'it', 'uk', 'edu', 'es', 'fr', 'eg', 'ru',
            'pl', 'org', 'es', 'pk', 'jo', 'fe', 'se', 'tr', 'ch']
     end = '.' + random.choice(dom)
     return slugify(generate_sentence(
-        max_length - len(end), seperators='-', endchar='.'
+        max_length - len(end), seperators='-', endchar='.', pool=pool
     ).lower()) + end
 
 
-def generate_email(max_length, min_length=14, allowlist=None):
+def generate_email(max_length, min_length=14, allowlist=None, pool=None):
     if min_length < 14 or max_length < min_length:
         raise InconsistentDefinition(
             "An Email with the specified lengths is too short. Should "
@@ -331,7 +927,10 @@ def generate_email(max_length, min_length=14, allowlist=None):
                 min_length, max_length
             )
         )
-    domain = random.choice(allowlist) if allowlist else generate_domain_name(9)
+    domain = (
+        random.choice(allowlist) if allowlist else
+        generate_domain_name(9, pool=pool)
+    )
     min_length -= len(domain) + 1
     max_length -= len(domain) + 1
     if max_length < 2:
@@ -341,13 +940,15 @@ def generate_email(max_length, min_length=14, allowlist=None):
         )
 
     email = slugify(generate_sentence(
-        random.randint(max(min_length, 2), max_length), endchar=None
+        random.randint(max(min_length, 2), max_length), endchar=None,
+        pool=pool,
     )) + "@" + domain
     return email
 
 
 def generate_url(
-    max_length, min_length=16, schemas=["https", "http", "ftp", "ftps"]
+    max_length, min_length=16, schemas=["https", "http", "ftp", "ftps"],
+    pool=None
 ):
     if min_length < 16 or max_length < min_length:
         raise InconsistentDefinition(
@@ -359,7 +960,9 @@ def generate_url(
 
     url = random.choice(schemas) + "://"
 
-    domain = generate_domain_name(random.randint(6, min(max_length - 8, 30)))
+    domain = generate_domain_name(
+        random.randint(6, min(max_length - 8, 30)), pool=pool
+    )
     if len(url) + 4 + len(domain) < max_length:
         domain = random.choice(["www.", ""]) + domain
     url += domain
@@ -374,7 +977,7 @@ def generate_url(
         url += "/" + "/".join(map(
             slugify,
             generate_text(
-                max_length - 1, min_length=min_length - 1, sep=""
+                max_length - 1, min_length=min_length - 1, sep="", pool=pool
             ).split(".")
         ))
     if len(url) < max_length and url[-1] != '/' and random.random() < 0.5:
@@ -382,24 +985,147 @@ def generate_url(
     return url
 
 
+UUID_VERSION_4 = bytes((byte & 0x0f) | 0x40 for byte in range(256))
+UUID_VARIANT_RFC_4122 = bytes((byte & 0x3f) | 0x80 for byte in range(256))
+
+
 def generate_uuid():
     return uuid.uuid4()
 
 
-def generate_file_path(root=os.getcwd(), max_length=256, min_length=1):
-    walk = os.walk(root)
-    flt = list(filter(
-        lambda path: (
-            not any(p.startswith('.') for p in path[0]) and
-            min_length <= len(path[0]) <= max_length
-        ), walk
-    ))
-    flt = list(map(lambda path: path[0], flt))
-    flt = list(islice(flt, 1000))
-    return random.choice(flt)
+def generate_uuid_batch(size):
+    """
+    Generate a list of random UUIDs (version 4), from one buffer of random
+    bytes.
+    """
+    buf = bytearray(random_bytes(16 * size))
+    # Set the version and the variant bits of all the UUIDs at once.
+    buf[6::16] = buf[6::16].translate(UUID_VERSION_4)
+    buf[8::16] = buf[8::16].translate(UUID_VARIANT_RFC_4122)
+    buf = bytes(buf)
+    UUID = uuid.UUID
+    return [UUID(bytes=buf[idx:idx + 16]) for idx in range(0, 16 * size, 16)]
+
+
+# The maximum number of paths in the index of a directory.
+MAX_INDEXED_PATHS = 100000
+
+
+class PathIndex(object):
+    """
+    An index of the paths in a directory, stored compactly as one string of
+    the paths separated by null characters, with the offsets of the paths,
+    so a random path is sampled in constant time.
+    """
+    def __init__(self, paths: list):
+        self.blob = "\0".join(paths)
+        self.offsets = array.array("L", [0])
+        for path in paths:
+            self.offsets.append(self.offsets[-1] + len(path) + 1)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def choice(self) -> str:
+        idx = random.randrange(len(self))
+        return self.blob[self.offsets[idx]:self.offsets[idx + 1] - 1]
+
+    @classmethod
+    def build(cls, root, match=None, recursive=True, allow_files=False,
+              allow_folders=True, min_length=1, max_length=256):
+        """
+        List the paths in a directory like the choices of a FilePathField,
+        the hidden files and directories are skipped.
+        """
+        pattern = re.compile(match) if match else None
+        paths = []
+
+        def add(directory, names):
+            for name in sorted(names):
+                if name.startswith('.') or name == "__pycache__":
+                    continue
+                if pattern is not None and not pattern.search(name):
+                    continue
+                path = os.path.join(directory, name)
+                if min_length <= len(path) <= max_length:
+                    paths.append(path)
+
+        for directory, dirs, files in os.walk(root):
+            dirs[:] = sorted(name for name in dirs if not name.startswith('.'))
+            if allow_files:
+                add(directory, files)
+            if allow_folders:
+                add(directory, dirs)
+            if not recursive or len(paths) >= MAX_INDEXED_PATHS:
+                break
+        return cls(paths[:MAX_INDEXED_PATHS])
+
+    @classmethod
+    def load(cls, path: str):
+        with open(path, "r", encoding="utf-8", errors="surrogateescape") as fl:
+            blob = fl.read()
+        return cls(blob.split("\0") if blob else [])
+
+    def dump(self, path: str):
+        atomic_write(path, [
+            self.blob.encode("utf-8", errors="surrogateescape")
+        ])
+
+
+@functools.lru_cache(maxsize=32)
+def path_index(root, match=None, recursive=True, allow_files=False,
+               allow_folders=True, min_length=1, max_length=256,
+               disk_cache=False):
+    """
+    Get the index of the paths in a directory, which is built once for the
+    given arguments. If disk_cache, the index is also cached on disk, under
+    a name depending on the arguments and the modification time of the
+    directory.
+    """
+    args = (
+        os.path.abspath(root), match, recursive, allow_files, allow_folders,
+        min_length, max_length,
+    )
+    if not disk_cache:
+        return PathIndex.build(*args)
+    key = repr(args + (os.stat(root).st_mtime_ns, )).encode()
+    cache_path = os.path.join(
+        cache_dir(), "path-index-%s.txt" % hashlib.sha1(key).hexdigest()
+    )
+    if os.path.isfile(cache_path):
+        return PathIndex.load(cache_path)
+    index = PathIndex.build(*args)
+    index.dump(cache_path)
+    return index
+
+
+def generate_file_path_batch(size: int, root=None, max_length=256,
+                             min_length=1, match=None, recursive=True,
+                             allow_files=False, allow_folders=True,
+                             disk_cache=False) -> list:
+    """
+    Generate a list of random paths in a directory (the current directory by
+    default), like the choices of a FilePathField. By default, the paths are
+    the directories in the tree of the directory.
+    """
+    root = root or os.getcwd()
+    index = path_index(
+        root, match, recursive, allow_files, allow_folders, min_length,
+        max_length, disk_cache,
+    )
+    if not len(index):
+        raise InconsistentDefinition(
+            "There are no paths in %s matching the given options." % root
+        )
+    return [index.choice() for _ in range(size)]
+
+
+def generate_file_path(**kwargs) -> str:
+    return generate_file_path_batch(1, **kwargs)[0]
 
 
-def generate_file_name(max_length=15, min_length=6, extensions=[]):
+def generate_file_name(max_length=15, min_length=6, extensions=[],
+                       pool=None):
     if extensions:
         extension = random.choice(extensions)
     else:
@@ -407,7 +1133,7 @@ def generate_file_name(max_length=15, min_length=6, extensions=[]):
     return generate_sentence(
         random.randint(
             max(1, min_length - len(extension)), max_length - len(extension)
-        ), seperators="-_", endchar=None
+        ), seperators="-_", endchar=None, pool=pool
     ) + extension
 
 
@@ -418,79 +1144,201 @@ def png_pack(png_tag, data):
             struct.pack("!I", 0xFFFFFFFF & zlib.crc32(chunk_head)))
 
 
-def generate_png(width=128, height=128, max_length=None):
-    buf = b''.join(
-        [struct.pack('>I', (random.randint(0, (1 << 24) - 1) << 8) | 0xff)
-         for _ in range(width * height)]
-    )
+# The default zlib compression level of the generated images, the random
+# pixels are incompressible, so higher levels only cost time.
+PNG_COMPRESSION = 0
+
+
+def generate_png(width=128, height=128, max_length=None,
+                 compression=PNG_COMPRESSION):
+    """
+    Generate a PNG image of random opaque pixels, the pixels are drawn in one
+    buffer of random bytes.
+    """
+    pixels = width * height
+    rgb = random_bytes(3 * pixels)
+    buf = bytearray(b'\xff') * (4 * pixels)
+    for channel in range(3):
+        buf[channel::4] = rgb[channel::3]
 
     width_byte_4 = width * 4
     raw_data = b''.join(
         b'\x00' + buf[span:span + width_byte_4]
-        for span in range((height - 1) * width_byte_4, -1, - width_byte_4)
+        for span in range(0, height * width_byte_4, width_byte_4)
     )
 
     return b''.join([
         b'\x89PNG\r\n\x1a\n',
         png_pack(b'IHDR', struct.pack("!2I5B", width, height, 8, 6, 0, 0, 0)),
-        png_pack(b'IDAT', zlib.compress(raw_data, 9)),
+        png_pack(b'IDAT', zlib.compress(raw_data, compression)),
         png_pack(b'IEND', b'')
     ])
 
 
-def generate_integer_list(
-    max_length=128, min_length=1, sep=',', allow_negative=True
-):
-    length = random.randint(min_length, max_length)
-    res = ""
-    while len(res) + 8 <= length:
-        if res:
-            res += sep
-        if not allow_negative or random.random() < 0.5:
-            res += str(random.randint(0, 999999))
-        else:
-            res += str(random.randint(-999999, 0))
+@functools.lru_cache(maxsize=16)
+def png_pool(size, width=128, height=128, compression=PNG_COMPRESSION):
+    """
+    A pool of distinct random PNG images, reused by the generated rows.
+    """
+    return tuple(
+        generate_png(width, height, compression=compression)
+        for _ in range(size)
+    )
 
-    if length - len(res) == 0:
-        return res
-    if length - len(res) == 1:
-        return res + str(random.randint(0, 9))
-    else:
-        if res:
-            res += sep
-        rem = length - len(res)
+
+def integer_strings(allow_negative=True, chunk=16):
+    """
+    An endless iterator of the strings of random integers of at most 6 digits,
+    drawn in chunks.
+    """
+    numbers = range(-999999 if allow_negative else 0, 1000000)
+    while True:
+        for number in choices(numbers, k=chunk):
+            yield str(number)
+
+
+def build_integer_list(length, numbers, sep=',', allow_negative=True):
+    """
+    Build a list of integers separated by sep, of exactly the given length,
+    from an iterator of the strings of integers.
+    """
+    parts = []
+    size = 0
+    while size + 8 <= length:
+        if parts:
+            parts.append(sep)
+            size += len(sep)
+        parts.append(next(numbers))
+        size += len(parts[-1])
+
+    rem = length - size
+    if rem == 1:
+        parts.append(str(random.randint(0, 9)))
+    elif rem > 1:
+        if parts:
+            parts.append(sep)
+            rem -= len(sep)
         if rem > 1 and allow_negative and random.random() < 0.5:
             rem -= 1
-            res += str(-random.randint(10 ** (rem - 1), 10 ** rem - 1))
+            parts.append(str(-random.randint(10 ** (rem - 1), 10 ** rem - 1)))
         elif rem == 1:
-            res += str(random.randint(0, 9))
+            parts.append(str(random.randint(0, 9)))
         else:
-            res += str(random.randint(10 ** (rem - 1), 10 ** rem - 1))
-    return res
+            parts.append(str(random.randint(10 ** (rem - 1), 10 ** rem - 1)))
+    return ''.join(parts)
 
 
-def generate_json(depth=0, max_length=None):
-    if random.random() < 1 - 1 / (1 + depth):
-        return random.choice([
-            generate_small_integer(),
-            generate_small_integer(),
-            generate_small_integer(),
-            True,
-            False,
-            None,
-        ] + (
-            list(map(lambda x: x.lower(), choices(WORDS_DICTIONARY[3], 3))) +
-            list(map(lambda x: x.lower(), choices(WORDS_DICTIONARY[4], 3))) +
-            list(map(lambda x: x.lower(), choices(WORDS_DICTIONARY[5], 3))) +
-            list(map(lambda x: x.lower(), choices(WORDS_DICTIONARY[7], 3)))
-        ))
+def generate_integer_list(
+    max_length=128, min_length=1, sep=',', allow_negative=True
+):
+    length = random.randint(min_length, max_length)
+    numbers = integer_strings(allow_negative, chunk=max(1, length // 7))
+    return build_integer_list(length, numbers, sep, allow_negative)
+
 
-    values = [generate_json(depth + 1) for _ in range(0, 4)]
-    words = [
-        random.choice(WORDS_DICTIONARY[random.randint(3, 7)]).lower()
-        for _ in values
+def generate_integer_list_batch(
+    size, max_length=128, min_length=1, sep=',', allow_negative=True
+):
+    """
+    Generate a list of random lists of integers, sharing one stream of random
+    integers.
+    """
+    lengths = choices(range(min_length, max_length + 1), k=size)
+    numbers = integer_strings(allow_negative, chunk=4096)
+    return [
+        build_integer_list(length, numbers, sep, allow_negative)
+        for length in lengths
     ]
-    if random.random() < 0.5:
+
+
+JSON_LEAVES = 18
+
+
+@functools.lru_cache(maxsize=1)
+def json_words() -> tuple:
+    """
+    The pools of words used for the leaves and the keys of the generated
+    JSON values.
+    """
+    keys = WordChain([
+        WORDS_DICTIONARY[length].lower() for length in WORD_LENGTHS
+    ])
+    # The leaves of a length missing from the words are drawn from all the
+    # words.
+    leaves = tuple(
+        WORDS_DICTIONARY[length].lower() if len(WORDS_DICTIONARY[length])
+        else keys for length in [3, 4, 5, 7]
+    )
+    return leaves, keys
+
+
+def generate_json_value(depth, leaves, keys, container=None, top_keys=None,
+                        max_depth=None):
+    if container is None and (
+        random.random() < 1 - 1 / (1 + depth) or
+        max_depth is not None and depth >= max_depth
+    ):
+        idx = random.randrange(JSON_LEAVES)
+        if idx < 3:
+            return generate_small_integer()
+        elif idx < 6:
+            return [True, False, None][idx - 3]
+        else:
+            return random.choice(leaves[(idx - 6) // 3])
+
+    if container is None:
+        container = "list" if random.random() < 0.5 else "dict"
+    if container == "dict" and top_keys:
+        return dict(
+            (key, generate_json_value(
+                depth + 1, leaves, keys, max_depth=max_depth
+            )) for key in top_keys
+        )
+    values = [
+        generate_json_value(depth + 1, leaves, keys, max_depth=max_depth)
+        for _ in range(0, 4)
+    ]
+    if container == "list":
         return values
     else:
-        return dict(zip(words, values))
+        return dict(zip(choices(keys, k=len(values)), values))
+
+
+def generate_json(depth=0, max_length=None, container=None, keys=None,
+                  max_depth=None):
+    leaves, all_keys = json_words()
+    return generate_json_value(
+        depth, leaves, all_keys, container, keys, max_depth
+    )
+
+
+def generate_json_batch(size, unique=False, serialized=False, container=None,
+                        keys=None, max_depth=None, max_length=None):
+    """
+    Generate a list of random JSON values, the leaves and the keys are drawn
+    from precomputed pools. The values are deduplicated by their canonical
+    serialization if unique is True, and they are returned serialized if
+    serialized is True.
+
+    :param container:
+        The type of the generated values, "list" or "dict", or None for both.
+    :param keys: The keys of the generated values, if they are dicts.
+    """
+    leaves, all_keys = json_words()
+    results = {}
+    for _ in range(10 * size):
+        if len(results) >= size:
+            break
+        value = generate_json_value(
+            0, leaves, all_keys, container, keys, max_depth
+        )
+        text = canonical_json(value)
+        if unique:
+            results[text] = value
+        else:
+            results[len(results)] = (text, value)
+    if unique:
+        results = results.items()
+    else:
+        results = results.values()
+    return [text if serialized else value for text, value in results]
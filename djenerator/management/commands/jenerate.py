@@ -1,7 +1,5 @@
 from django.core.management.base import BaseCommand
 
-from djenerator import generate_test_data
-
 
 class Command(BaseCommand):
     help = "Generates random test data for an app using djenerator."
@@ -19,6 +17,10 @@ class Command(BaseCommand):
             "--models", type=str, default=None, nargs="*",
             help="Generate data for a specific set of models."
         )
+        parser.add_argument(
+            "--seed", type=int, default=None,
+            help="The seed of the random generators, for reproducible data."
+        )
         parser.add_argument(
             "--allow-external-instances", action="store_true",
             help=(
@@ -28,6 +30,8 @@ class Command(BaseCommand):
         )
 
     def handle(self, *args, **options):
+        from djenerator import generate_test_data
+
         size = int(options["size"])
         app_name = options["app-name"]
         models_cls = options["models"]
@@ -36,5 +40,6 @@ class Command(BaseCommand):
 
         generate_test_data(
             app_name, size, allow_null=allow_null, models_cls=models_cls,
-            allow_external_instances=allow_external_instances
+            allow_external_instances=allow_external_instances,
+            seed=options["seed"]
         )
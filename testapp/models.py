@@ -277,3 +277,28 @@ class AllFieldsModel(models.Model):
         models.JSONField() if hasattr(models, "JSONField")
         else models.TextField()
     )
+
+
+class ConstrainedModel(models.Model):
+    start = models.IntegerField()
+    end = models.IntegerField()
+    kind = models.CharField(max_length=1, choices=[("a", "A"), ("b", "B")])
+    code = models.IntegerField(validators=[
+        validators.MinValueValidator(0),
+        validators.MaxValueValidator(1000),
+    ])
+
+    class Meta:
+        if hasattr(models, "CheckConstraint"):
+            constraints = [
+                models.CheckConstraint(
+                    name="start_before_end", **{
+                        "condition" if django.VERSION >= (5, 1) else "check":
+                        models.Q(start__lt=models.F("end"))
+                    }
+                ),
+                models.UniqueConstraint(
+                    fields=["code"], condition=models.Q(kind="a"),
+                    name="unique_code_for_a",
+                ),
+            ]
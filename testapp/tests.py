@@ -1,19 +1,84 @@
 import datetime
+import hashlib
 import itertools
+import json
 import os
 import random as rand
 import re
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import uuid
 from decimal import Decimal
+from unittest import mock, skipIf
 
-from django.test import TestCase
+from django.core import validators
+from django.db import models
+from django.test import override_settings, TestCase
 
 from djenerator import generate_test_data
-from djenerator.core.algos import topological_sort
+from djenerator.core.algos import generation_plan, topological_sort
+from djenerator.core.columns import Column, ColumnBatch
+from djenerator.core.constraints import compile_constraints
+from djenerator.core.corpus import text_corpus
+from djenerator.core.exceptions import (
+    InconsistentDefinition,
+    SparseGeneratorError,
+)
+from djenerator.core.fields_generator import (
+    AcceptanceTracker,
+    generate_random_field_values,
+    generate_random_value,
+    generate_random_values,
+)
+from djenerator.core.main import (
+    generate_field_values,
+    generate_models,
+    generate_unstored_values,
+)
+from djenerator.core.pools import (
+    field_signature,
+    MappedPool,
+    pool_path,
+    trim_pool_cache,
+    value_pool,
+    VALUE_POOLS,
+    values_codec,
+    write_pool,
+)
+from djenerator.core.regex_generator import (
+    generate_regex,
+    generate_regex_batch,
+)
+from djenerator.core.rng import (
+    child_stream,
+    random as thread_random,
+    RandomStream,
+    use_stream,
+)
+from djenerator.core.sampling import (
+    probe_integer_range,
+    reservoir_sample,
+    sample_related_values,
+    stored_values,
+)
+from djenerator.core.schema import schema_graph, SCHEMA_GRAPHS
+from djenerator.core.spill import LazyPermutation, spill_dir, SpilledKeys
+from djenerator.core.storage import (
+    commit_files,
+    storage_writer,
+    wait_for_files,
+)
 from djenerator.core.utils import (
+    canonical_json,
     dependencies,
     field_name,
     field_type,
     get_related_model,
+    get_timezone,
     is_auto_field,
     # is_django_model_class,
     is_many_to_many_field,
@@ -22,6 +87,7 @@ from djenerator.core.utils import (
     # is_reverse_related,
     is_unidirectional_related,
     is_unique,
+    make_generator,
     retrieve_fields,
     retrieve_generators,
     retrieve_models,
@@ -33,30 +99,50 @@ from djenerator.core.values_generator import (
     generate_comma_separated_int,
     generate_date,
     generate_date_time,
+    generate_date_time_batch,
     generate_decimal,
+    generate_decimal_batch,
+    generate_duration_batch,
     generate_email,
     generate_file_name,
     generate_file_path,
+    generate_file_path_batch,
+    generate_float_batch,
     # generate_float,
     generate_int,
     generate_integer,
+    generate_integer_batch,
+    generate_integer_list_batch,
     generate_ip,
+    generate_ip_batch,
+    generate_json_batch,
     generate_png,
     generate_positive_big_integer,
     generate_positive_integer,
     generate_positive_small_integer,
     generate_sentence,
+    generate_sentence_batch,
     generate_small_integer,
     generate_string,
+    generate_string_batch,
     generate_text,
+    generate_text_batch,
     generate_time,
     generate_url,
     generate_uuid,
+    generate_uuid_batch,
+    json_words,
+    path_index,
+    png_pool,
+    word_tables,
+    WordChain,
+    WordDictionary,
 )
 from testapp.models import (
-    Extend_SuperClass, ExtendAbstract, ExtendExtendSuperClass,
-    ExtendSuperClassNoProxy, ProxyExtend, TestModelA, TestModelE,
-    TestModelFields, TestModelX, TestModelY, validate_mod91,
+    ConstrainedModel, CycleA, CycleC, Extend_SuperClass, ExtendAbstract,
+    ExtendExtendSuperClass, ExtendSuperClassNoProxy, ProxyExtend, TestModelA,
+    TestModelB, TestModelC, TestModelE, TestModelFields, TestModelX,
+    TestModelY, validate_mod91,
 )
 
 
@@ -92,6 +178,7 @@ class UtilsTestCase(TestCase):
             "CycleE",
             "CycleF",
             "AllFieldsModel",
+            "ConstrainedModel",
         ]
         self.assertEqual(
             sorted(existing_models),
@@ -269,6 +356,46 @@ class AlgorithmsTestCase(TestCase):
         self.assertEqual(nodes, [])
         self.assertEqual(set(cycle), set(["A", "C", "D"]))
 
+        chain = list(range(5000))
+        nodes, cycle = topological_sort(chain, lambda x: [x + 1][:x < 4999])
+        self.assertEqual(cycle, [])
+        self.assertEqual(nodes, chain[::-1])
+
+    def test_generation_plan(self):
+        all_nodes = ["A", "B", "C", "D", "E", "F", "G"]
+        deps = {"A": ["B", "C"], "C": ["D", "E"], "D": ["F"]}
+
+        order, levels, cycle = generation_plan(
+            all_nodes, lambda x: deps.get(x, [])
+        )
+        self.assertEqual(cycle, [])
+        self.assertEqual(order, ["B", "E", "F", "G", "D", "C", "A"])
+        self.assertEqual(
+            levels, [["B", "E", "F", "G"], ["D"], ["C"], ["A"]]
+        )
+
+        order, levels, cycle = generation_plan(
+            ["C", "G"], lambda x: deps.get(x, []),
+            lambda x: deps.get(x, []) + (["B"] if x == "G" else [])
+        )
+        self.assertEqual(order, ["G", "E", "B", "F", "D", "C"])
+        self.assertEqual(levels, [["G", "E", "B", "F"], ["D"], ["C"]])
+
+        deps["D"].append("A")
+        order, levels, cycle = generation_plan(
+            all_nodes, lambda x: deps.get(x, [])
+        )
+        self.assertEqual((order, levels), ([], []))
+        self.assertEqual(set(cycle), set(["A", "C", "D"]))
+        self.assertEqual(cycle[0], cycle[-1])
+
+        chain = list(range(100000))
+        order, levels, cycle = generation_plan(
+            chain, lambda x: [x + 1][:x < 99999]
+        )
+        self.assertEqual(order, chain[::-1])
+        self.assertEqual(len(levels), 100000)
+
 
 class TestFieldsGeneratorNumbers(TestCase):
     def test(self):
@@ -639,3 +766,1101 @@ class TestTrivia(TestCase):
             self.assertTrue(False)
         except AssertionError:
             self.assertTrue(True)
+
+
+class TestRegexGenerator(TestCase):
+    def test(self):
+        patterns = [
+            r'^[a-z]{3,8}-\d{2,4}$',
+            r'^(foo|bar)+[A-Z]?$',
+            r'^\w+@\w+\.(?:com|org)$',
+            r'^(?P<x>ab)c(?P=x)$',
+            r'^[^a-z]{5}$',
+            r'^\+?1?\d{9,15}$',
+            r'(a)?(?(1)b|c)',
+            r'^.{10,}$',
+        ]
+        for pattern in patterns:
+            for value in generate_regex_batch(pattern, 200, max_length=30):
+                self.assertRegexpMatches(value, pattern)
+                self.assertLessEqual(len(value), 30)
+
+        value = generate_regex(re.compile(r'^[0-9]+$'), 5, min_length=3)
+        self.assertRegexpMatches(value, r'^[0-9]{3,5}$')
+
+        with self.assertRaises(InconsistentDefinition):
+            generate_regex(r'^[a-z]{10}$', max_length=5)
+
+        field = models.CharField(max_length=12, validators=[
+            validators.RegexValidator(r'^[A-Z]{2}-[0-9]{4,6}$')
+        ])
+        for _ in range(100):
+            value = generate_random_value(field)
+            self.assertRegexpMatches(value, r'^[A-Z]{2}-[0-9]{4,6}$')
+            field.run_validators(value)
+
+
+class TestConstraints(TestCase):
+    def test(self):
+        columns = dict((name, name) for name in ["start", "end", "kind"])
+        constraints = compile_constraints(ConstrainedModel, columns)
+        # The unique constraint refers to "code", which isn't generated.
+        self.assertEqual(len(constraints), 1)
+        check = constraints[0]
+        self.assertTrue(check.accept({"start": 1, "end": 2, "kind": "a"}))
+        self.assertFalse(check.accept({"start": 2, "end": 2, "kind": "a"}))
+        self.assertTrue(check.accept({"start": None, "end": 2, "kind": "a"}))
+
+        generate_test_data("testapp", 60, models_cls=["ConstrainedModel"])
+        self.assertGreater(ConstrainedModel.objects.count(), 0)
+        codes = []
+        for obj in ConstrainedModel.objects.all():
+            self.assertLess(obj.start, obj.end)
+            if obj.kind == "a":
+                codes.append(obj.code)
+        self.assertEqual(len(codes), len(set(codes)))
+
+        # The violating rows are regenerated like the other rows.
+        with mock.patch(
+            "djenerator.core.main.satisfy_constraints", return_value=[]
+        ) as satisfy:
+            generate_models(ConstrainedModel, 5, allow_null=True)
+        self.assertTrue(satisfy.call_args[0][4].keywords["allow_null"])
+
+
+class TestAcceptanceRate(TestCase):
+    def test(self):
+        tracker = AcceptanceTracker()
+        seen = set([])
+        for _ in range(1000):
+            value = rand.randint(0, 499)
+            tracker.add(value < 50, value not in seen)
+            seen.add(value)
+        self.assertAlmostEqual(tracker.distinct_values(), 50, delta=15)
+        self.assertEqual(
+            tracker.expected_draws(100, optimistic=False), float("inf")
+        )
+
+        field = models.IntegerField(unique=True, validators=[validate_mod91])
+        field.set_attributes_from_name("fieldMod")
+        field.model = TestModelX
+
+        values = generate_random_field_values(
+            field, make_generator(lambda: rand.randint(0, 10 ** 6)), 20
+        )
+        self.assertEqual(len(set(values)), 20)
+        self.assertTrue(all(validate_data(x, validate_mod91) for x in values))
+
+        with self.assertRaises(SparseGeneratorError) as error:
+            generate_random_field_values(
+                field, make_generator(lambda: rand.randint(0, 100000)), 5000
+            )
+        message = str(error.exception)
+        self.assertIn("draws for 5.0K unique values", message)
+        draws = int(re.search(r"out of (\d+) draws", message).group(1))
+        self.assertLess(draws, 50000)
+
+
+class TestRelatedSampling(TestCase):
+    def test(self):
+        sample = reservoir_sample(range(1000), 10)
+        self.assertEqual(len(set(sample)), 10)
+        self.assertEqual(
+            sorted(reservoir_sample(range(5), 10)), list(range(5))
+        )
+
+        TestModelX.objects.bulk_create(
+            [TestModelX(field1X=idx) for idx in range(600)]
+        )
+        TestModelX.objects.filter(field1X__lt=300).delete()
+        pks = set(TestModelX.objects.values_list("pk", flat=True))
+        values = probe_integer_range(TestModelX.objects.all(), "id", 100)
+        self.assertEqual(len(set(values)), 100)
+        self.assertTrue(set(values) <= pks)
+
+        field = TestModelY._meta.get_field("field3Y")
+        values = sample_related_values(field, 50)
+        self.assertEqual(len(set(values)), 50)
+        self.assertTrue(set(values) <= pks)
+
+        model_a = TestModelA.objects.create(
+            field2A="a", field3A="1.1.1.1", field4A="1.1.1.1",
+            field5A="::1", field6A="::1", field7A="1.1.1.1"
+        )
+        models_b = [
+            TestModelB.objects.create(field1B=str(idx), field2B=model_a)
+            for idx in range(20)
+        ]
+        for model_b in models_b[:10]:
+            TestModelC.objects.create(field1C="c", field2C=model_b)
+        field = TestModelC._meta.get_field("field2C")
+        values = sample_related_values(field, 20, unique=True)
+        self.assertEqual(
+            sorted(values), sorted(model_b.pk for model_b in models_b[10:])
+        )
+
+
+class TestJSONGenerator(TestCase):
+    def test(self):
+        values = generate_json_batch(300, unique=True)
+        self.assertEqual(len(values), 300)
+        self.assertEqual(len(set(map(canonical_json, values))), 300)
+        for value in values:
+            self.assertIsInstance(value, (list, dict))
+
+        texts = generate_json_batch(50, serialized=True, container="dict",
+                                    keys=["name", "tags"])
+        for text in texts:
+            self.assertEqual(sorted(json.loads(text).keys()), ["name", "tags"])
+
+        if not hasattr(models, "JSONField"):
+            return
+        field = models.JSONField(unique=True, default=list)
+        field.set_attributes_from_name("fieldJS")
+        field.model = TestModelX
+        values = generate_random_field_values(
+            field, iter(generate_random_values(field, 500)), 200,
+            to_filter=values[:10]
+        )
+        self.assertEqual(len(set(map(canonical_json, values))), 200)
+        for value in values:
+            self.assertIsInstance(value, list)
+
+
+class TestIntegerBatch(TestCase):
+    def test(self):
+        for bits in [16, 32, 64]:
+            for negative_allowed in [True, False]:
+                values = generate_integer_batch(
+                    1000, bits, negative_allowed=negative_allowed
+                )
+                self.assertEqual(len(values), 1000)
+                for value in values:
+                    self.assertIsInstance(value, int)
+                    self.assertLess(value, 2 ** (bits - 1))
+                    self.assertGreaterEqual(value, -2 ** (bits - 1))
+                    if not negative_allowed:
+                        self.assertGreaterEqual(value, 0)
+                self.assertEqual(any(value < 0 for value in values),
+                                 negative_allowed)
+
+        for size in [10, 1000]:
+            values = generate_integer_batch(size, 32, mn=-35, mx=1000, step=5)
+            for value in values:
+                self.assertTrue(-35 <= value <= 1000)
+                self.assertEqual(value % 5, 0)
+            values = generate_integer_batch(size, 64, mn=10 ** 30,
+                                            mx=10 ** 31)
+            for value in values:
+                self.assertTrue(10 ** 30 <= value <= 10 ** 31)
+            values = generate_integer_batch(size, 32, mn=7, mx=7)
+            self.assertEqual(set(values), {7})
+
+        values = generate_integer_batch(2000, 32, rng=rand.Random(1))
+        self.assertEqual(
+            values, generate_integer_batch(2000, 32, rng=rand.Random(1))
+        )
+
+        field = models.PositiveSmallIntegerField(
+            validators=[validators.MaxValueValidator(300)]
+        )
+        field.set_attributes_from_name("fieldPSI")
+        values = generate_random_values(field, 500)
+        self.assertEqual(len(values), 500)
+        self.assertTrue(all(0 <= value <= 300 for value in values))
+
+
+class TestStringBatch(TestCase):
+    def test(self):
+        values = generate_string_batch(1000, 12, min_length=3,
+                                       special=['_', '-'])
+        self.assertEqual(len(values), 1000)
+        for value in values:
+            self.assertTrue(3 <= len(value) <= 12)
+            self.assertTrue(re.match(r"^[a-zA-Z0-9_\-]+$", value))
+
+        for max_length in [1, 7, 8, 30, 128]:
+            values = generate_integer_list_batch(200, max_length=max_length)
+            for value in values:
+                self.assertTrue(1 <= len(value) <= max_length)
+                self.assertTrue(re.match(r"^-?\d+(,-?\d+)*$", value))
+
+        field = models.SlugField(max_length=20)
+        field.set_attributes_from_name("fieldSlug")
+        for value in generate_random_values(field, 300):
+            self.assertTrue(re.match(r"^[a-z0-9_\-]*$", value))
+            self.assertLessEqual(len(value), 20)
+        field = models.CharField(max_length=30)
+        field.set_attributes_from_name("fieldChar")
+        values = generate_random_values(field, 300)
+        self.assertEqual(len(values), 300)
+        for value in values:
+            self.assertLessEqual(len(value), 30)
+
+
+class TestTextBatch(TestCase):
+    def test(self):
+        lengths = [rand.randint(0, 300) for _ in range(500)]
+        for sep in [" ", "-_"]:
+            sentences = generate_sentence_batch(lengths, seperators=sep)
+            for length, sentence in zip(lengths, sentences):
+                self.assertEqual(len(sentence), max(1, length))
+                self.assertTrue(sentence.endswith("."))
+                self.assertNotIn("  ", sentence)
+
+        for max_length, min_length in [(8, 0), (100, 50), (1000, 0),
+                                       (1000, 900)]:
+            texts = generate_text_batch(200, max_length, min_length)
+            for text in texts:
+                self.assertTrue(min_length <= len(text) <= max_length)
+
+        field = models.EmailField(max_length=40)
+        field.set_attributes_from_name("fieldEmail")
+        for value in generate_random_values(field, 200):
+            validators.validate_email(value)
+            self.assertLessEqual(len(value), 40)
+
+
+class TestTextCorpus(TestCase):
+    def test(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+        path = os.path.join(directory, "corpus.bin")
+        with self.settings(DJENERATOR_TEXT_CORPUS=path,
+                           DJENERATOR_TEXT_CORPUS_SIZE=64 * 1024):
+            corpus = text_corpus()
+            self.assertTrue(os.path.isfile(path))
+            self.assertIs(corpus, text_corpus())
+            for max_length, min_length in [(8, 0), (100, 50), (1000, 0),
+                                           (1000, 900), (60, 55)]:
+                texts = corpus.generate_batch(200, max_length, min_length)
+                for text in texts:
+                    self.assertTrue(min_length <= len(text) <= max_length)
+            text = corpus.text(1000, 500)
+            self.assertTrue(text.endswith("."))
+            self.assertGreaterEqual(corpus.data.find(text.encode()), 0)
+
+            field = models.TextField(max_length=300)
+            field.set_attributes_from_name("fieldText")
+            for value in generate_random_values(field, 100):
+                self.assertLessEqual(len(value), 300)
+        self.assertIsNone(text_corpus())
+
+        count, = struct.unpack_from("<Q", corpus.data, 8)
+        offsets = struct.unpack_from("<%dQ" % (count + 1), corpus.data, 16)
+        self.assertEqual(list(corpus.offsets), list(offsets))
+        self.assertEqual(corpus.base, 16 + 8 * (count + 1))
+        self.assertEqual(len(corpus.data), corpus.base + offsets[-1])
+
+        # A corpus of an older format is rebuilt.
+        path = os.path.join(directory, "old-corpus.bin")
+        with open(path, "wb") as corpus_file:
+            corpus_file.write(b"DJTC0001" + struct.pack("<Q", 0))
+        with self.settings(DJENERATOR_TEXT_CORPUS=path,
+                           DJENERATOR_TEXT_CORPUS_SIZE=1024):
+            self.assertGreater(text_corpus().count, 0)
+
+        # Any other file is not overwritten.
+        for data in [b"", b"Some notes of the user."]:
+            path = os.path.join(directory, "notes.txt")
+            with open(path, "wb") as notes_file:
+                notes_file.write(data)
+            with self.settings(DJENERATOR_TEXT_CORPUS=path,
+                               DJENERATOR_TEXT_CORPUS_SIZE=1024):
+                with self.assertRaises(ValueError):
+                    text_corpus()
+            with open(path, "rb") as notes_file:
+                self.assertEqual(notes_file.read(), data)
+
+
+class TestDateTimeBatch(TestCase):
+    def test(self):
+        now = datetime.datetime.now(tz=get_timezone("Africa/Cairo"))
+        values = generate_date_time_batch(500, tz="Africa/Cairo")
+        self.assertEqual(len(values), 500)
+        for value in values:
+            self.assertIsNotNone(value.tzinfo)
+            self.assertLessEqual(value, now + datetime.timedelta(seconds=1))
+            self.assertGreater(value, now - datetime.timedelta(days=1100))
+        self.assertIs(get_timezone("Africa/Cairo"),
+                      get_timezone("Africa/Cairo"))
+        for value in generate_date_time_batch(10):
+            self.assertIsNone(value.tzinfo)
+        self.assertEqual(len(set(generate_date_time_batch(5, True))), 1)
+
+        for value in generate_duration_batch(500):
+            self.assertIsInstance(value, datetime.timedelta)
+            self.assertTrue(datetime.timedelta(0) <= value <
+                            datetime.timedelta(days=1100))
+
+        for field_cls, value_cls in [
+            (models.DateTimeField, datetime.datetime),
+            (models.DateField, datetime.date),
+            (models.TimeField, datetime.time),
+            (models.DurationField, datetime.timedelta),
+        ]:
+            field = field_cls()
+            field.set_attributes_from_name("fieldDT")
+            for value in generate_random_values(field, 100):
+                self.assertIsInstance(value, value_cls)
+
+
+class TestDecimalBatch(TestCase):
+    def test(self):
+        for size in [10, 1000]:
+            for max_digits, decimal_places in [(18, 4), (6, 6), (30, 10),
+                                               (5, 0)]:
+                values = generate_decimal_batch(size, max_digits,
+                                                decimal_places)
+                texts = generate_decimal_batch(size, max_digits,
+                                               decimal_places, as_string=True)
+                self.assertEqual(len(values), size)
+                self.assertEqual(len(texts), size)
+                validator = validators.DecimalValidator(max_digits,
+                                                        decimal_places)
+                for value, text in zip(values, texts):
+                    self.assertIsInstance(value, Decimal)
+                    validator(value)
+                    validator(Decimal(text))
+                    self.assertTrue(re.match(r"^-?\d+(\.\d+)?$", text))
+                    if decimal_places:
+                        self.assertEqual(text.count("."), 1)
+
+            for value in generate_float_batch(size, 10, 5):
+                self.assertIsInstance(value, float)
+                self.assertLess(abs(value), 10 ** 5)
+
+        field = models.DecimalField(max_digits=18, decimal_places=4)
+        field.set_attributes_from_name("fieldDec")
+        values = generate_random_values(field, 300)
+        self.assertEqual(len(values), 300)
+        for value in values:
+            field.run_validators(value)
+
+
+class TestUUIDAndIPBatch(TestCase):
+    def test(self):
+        values = generate_uuid_batch(1000)
+        self.assertEqual(len(set(values)), 1000)
+        for value in values:
+            self.assertEqual(value.version, 4)
+            self.assertEqual(value.variant, uuid.RFC_4122)
+
+        for v4, v6 in [(True, True), (True, False), (False, True)]:
+            values = generate_ip_batch(500, v4=v4, v6=v6)
+            self.assertEqual(len(values), 500)
+            protocols = set(map(lambda value: ":" in value, values))
+            self.assertEqual(protocols, set([False] * v4 + [True] * v6))
+            for value in values:
+                validators.validate_ipv46_address(value)
+            self.assertEqual(generate_ip_batch(0, v4=v4, v6=v6), [])
+            self.assertEqual(generate_ip_batch(-1, v4=v4, v6=v6), [])
+
+        field = models.GenericIPAddressField(protocol="IPv6")
+        field.set_attributes_from_name("fieldIP")
+        for value in generate_random_values(field, 100):
+            validators.validate_ipv6_address(value)
+        field = models.UUIDField()
+        field.set_attributes_from_name("fieldUUID")
+        self.assertEqual(len(set(generate_random_values(field, 100))), 100)
+
+
+def use_temporary_media(test_case):
+    """
+    Store the files written by a test in a temporary MEDIA_ROOT, which is
+    deleted after the test.
+    """
+    media = tempfile.mkdtemp()
+    test_case.addCleanup(shutil.rmtree, media, True)
+    settings = override_settings(MEDIA_ROOT=media)
+    settings.enable()
+    test_case.addCleanup(settings.disable)
+    return media
+
+
+class TestImagePool(TestCase):
+    def test(self):
+        use_temporary_media(self)
+        for compression in [0, 6]:
+            img = generate_png(64, 32, compression=compression)
+            self.assertTrue(img.startswith(b'\x89PNG\r\n\x1a\n'))
+            self.assertEqual(struct.unpack("!2I", img[16:24]), (64, 32))
+        pool = png_pool(5, 16, 16)
+        self.assertEqual(len(set(pool)), 5)
+        self.assertIs(pool, png_pool(5, 16, 16))
+
+        field = models.ImageField(upload_to="trash")
+        field.set_attributes_from_name("fieldImage")
+        field.model = TestModelX
+        with self.settings(DJENERATOR_IMAGE_POOL=3):
+            values = list(generate_random_values(field, 10))
+        self.assertLessEqual(len(set(value.read() for value in values)), 3)
+
+
+class TestFilePool(TestCase):
+    def test(self):
+        use_temporary_media(self)
+        field = models.FileField(upload_to="trash/pool")
+        field.set_attributes_from_name("fieldFile")
+        field.model = TestModelX
+        with self.settings(DJENERATOR_FILE_POOL=4):
+            values = list(generate_random_values(field, 30))
+        names = set(value.name for value in values)
+        self.assertLessEqual(len(names), 4)
+        for name in names:
+            self.assertTrue(field.storage.exists(name))
+            digest = os.path.splitext(os.path.basename(name))[0]
+            with field.storage.open(name) as pooled:
+                self.assertEqual(
+                    hashlib.sha256(pooled.read()).hexdigest()[:32], digest
+                )
+
+        field = models.ImageField(upload_to="trash/pool")
+        field.set_attributes_from_name("fieldImage")
+        field.model = TestModelX
+        with self.settings(DJENERATOR_FILE_POOL=2,
+                           DJENERATOR_FILE_POOL_LINKS=True):
+            values = list(generate_random_values(field, 5))
+        self.assertEqual(len(set(value.name for value in values)), 5)
+        inodes = set(os.stat(field.storage.path(value.name)).st_ino
+                     for value in values)
+        self.assertLessEqual(len(inodes), 2)
+
+
+class TestStorageWriter(TestCase):
+    def test(self):
+        use_temporary_media(self)
+        field = models.FileField(upload_to="trash/writer")
+        field.set_attributes_from_name("fieldFile")
+        field.model = TestModelX
+        with self.settings(DJENERATOR_STORAGE_WORKERS=4):
+            values = list(generate_random_values(field, 20))
+            self.assertEqual(len(set(value.name for value in values)), 20)
+            wait_for_files()
+            for value in values:
+                self.assertTrue(field.storage.exists(value.name))
+
+        with self.settings(DJENERATOR_STORAGE_WORKERS=2,
+                           DJENERATOR_DEFER_STORAGE_WRITES=True):
+            values = list(generate_random_values(field, 10))
+            commit_files(values[:5])
+            wait_for_files()
+            commit_files(values[5:])
+            wait_for_files()
+            for value in values[:5]:
+                self.assertTrue(field.storage.exists(value.name))
+            for value in values[5:]:
+                self.assertFalse(field.storage.exists(value.name))
+        self.assertIsNone(storage_writer())
+
+
+class TestFilePathIndex(TestCase):
+    def test(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, True)
+        cache = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache, True)
+        for path in ["a/b", "a/c", "d", ".hidden/e"]:
+            os.makedirs(os.path.join(root, path))
+        for path in ["x.txt", "a/y.txt", "a/b/z.md", ".hidden/e/w.txt"]:
+            open(os.path.join(root, path), "w").close()
+
+        paths = set(generate_file_path_batch(200, root=root))
+        expected = set(["a", "a/b", "a/c", "d"])
+        self.assertEqual(paths, set(os.path.join(root, p) for p in expected))
+
+        paths = set(generate_file_path_batch(
+            200, root=root, allow_files=True, allow_folders=False,
+            match=r"\.txt$"
+        ))
+        expected = set(["x.txt", "a/y.txt"])
+        self.assertEqual(paths, set(os.path.join(root, p) for p in expected))
+
+        paths = set(generate_file_path_batch(
+            200, root=root, allow_files=True, recursive=False
+        ))
+        expected = set(["x.txt", "a", "d"])
+        self.assertEqual(paths, set(os.path.join(root, p) for p in expected))
+
+        with self.assertRaises(InconsistentDefinition):
+            generate_file_path(root=root, match="nothing")
+
+        path_index.cache_clear()
+        with self.settings(DJENERATOR_CACHE_DIR=cache):
+            index = path_index(root, disk_cache=True)
+            path_index.cache_clear()
+            self.assertEqual(path_index(root, disk_cache=True).blob,
+                             index.blob)
+            self.assertEqual(len(index), 4)
+
+        field = models.FilePathField(
+            path=lambda: root, match=r"\.md$", recursive=True
+        )
+        field.set_attributes_from_name("fieldFilePath")
+        field.model = TestModelX
+        self.assertEqual(
+            set(generate_random_values(field, 20)),
+            set([os.path.join(root, "a/b/z.md")])
+        )
+
+
+class TestWordDictionary(TestCase):
+    def test(self):
+        # Without a words file, the fallback words are used.
+        with mock.patch(
+            "djenerator.core.values_generator.WORDS_FILES", []
+        ), self.settings(DJENERATOR_WORDS_FILE=None):
+            words = WordDictionary()
+            self.assertIsNone(words.buckets)
+            self.assertEqual(sorted(words.keys()), [3, 4, 5, 6, 7])
+            self.assertTrue(words.signature().startswith("fallback:"))
+            self.assertIn("Aerope", list(words[6]))
+            self.assertEqual(words[6][-1], words[6][len(words[6]) - 1])
+            with self.assertRaises(IndexError):
+                words[6][len(words[6])]
+
+        cache = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache, True)
+        path = os.path.join(cache, "words")
+        with open(path, "w", encoding="utf-8") as fl:
+            fl.write("ab\nabc\nDog's\ncaf\u00e9\nHouse\nhouse\nzebra\n"
+                     "abcdefgh\nlemon\n")
+        with self.settings(DJENERATOR_WORDS_FILE=path,
+                           DJENERATOR_CACHE_DIR=cache):
+            words = WordDictionary()
+            self.assertEqual(sorted(words.keys()), [3, 4, 5, 6, 7])
+            self.assertEqual(len(words[4]), 0)
+            self.assertEqual(list(words[3]), ["abc"])
+            self.assertEqual(
+                list(words[5]), ["House", "house", "zebra", "lemon"]
+            )
+            self.assertEqual(
+                list(words[5].lower()), ["house", "house", "zebra", "lemon"]
+            )
+            self.assertIn(path, words.signature())
+            self.assertEqual(len([
+                name for name in os.listdir(cache)
+                if name.startswith("words-")
+            ]), 1)
+            chain = WordChain([words[3], words[5]])
+            self.assertEqual(len(chain), 5)
+            self.assertEqual(chain[0], "abc")
+            self.assertEqual(chain[4], "lemon")
+            self.assertEqual(WordDictionary()[5][1], "house")
+
+            # The texts are generated from the lengths having words.
+            with mock.patch(
+                "djenerator.core.values_generator.WORDS_DICTIONARY", words
+            ):
+                word_tables.cache_clear()
+                json_words.cache_clear()
+                try:
+                    allowed = set(["abc", "House", "house", "zebra", "lemon"])
+                    for text in generate_text_batch(50, 200, 100):
+                        self.assertTrue(100 <= len(text) <= 200)
+                        self.assertGreater(
+                            len(set(re.findall(r"[A-Za-z]+", text)) &
+                                allowed), 0
+                        )
+                    for value in generate_json_batch(20):
+                        self.assertIsNotNone(value)
+                finally:
+                    word_tables.cache_clear()
+                    json_words.cache_clear()
+
+            # A cached dictionary of another format is rebuilt.
+            cached = os.path.join(cache, next(
+                name for name in os.listdir(cache)
+                if name.startswith("words-")
+            ))
+            with open(cached, "r+b") as fl:
+                fl.write(b"XXXX0000")
+            self.assertEqual(list(WordDictionary()[3]), ["abc"])
+
+            with open(path, "w") as fl:
+                fl.write("ab\nabcdefgh\n")
+            self.assertRaises(
+                InconsistentDefinition, WordDictionary().load
+            )
+
+
+@skipIf(sys.version_info < (3, 7), "python -X importtime needs 3.7")
+class TestImportTime(TestCase):
+    def imported_modules(self, statement):
+        """
+        The modules imported by a statement after loading the apps, from the
+        output of python -X importtime.
+        """
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE="backend.settings")
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c",
+             "import django; django.setup(); " + statement],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            env=env, stderr=subprocess.PIPE, check=True,
+        )
+        return set(
+            line.split("|")[-1].strip()
+            for line in result.stderr.decode().splitlines()
+            if line.startswith("import time:")
+        )
+
+    def test(self):
+        modules = self.imported_modules(
+            "import djenerator.management.commands.jenerate"
+        )
+        self.assertIn("djenerator.management.commands.jenerate", modules)
+        self.assertNotIn("djenerator.core.main", modules)
+        self.assertNotIn("numpy", modules)
+
+        modules = self.imported_modules(
+            "from djenerator import generate_test_data"
+        )
+        self.assertIn("djenerator.core.main", modules)
+        self.assertNotIn("numpy", modules)
+
+
+class TestSchemaGraph(TestCase):
+    def test(self):
+        graph = schema_graph("testapp")
+        self.assertIs(schema_graph("testapp"), graph)
+        models = retrieve_models("testapp.models")
+        self.assertEqual(graph.models, models)
+        self.assertEqual(
+            set(graph.order), set(topological_sort(models, dependencies)[0])
+        )
+        for idx, model_cls in enumerate(graph.order):
+            for dep in dependencies(model_cls):
+                self.assertLess(graph.order.index(dep), idx)
+        for model_cls in models:
+            self.assertEqual(graph.fields_of(model_cls),
+                             retrieve_fields(model_cls))
+            for strong in [False, True]:
+                self.assertEqual(graph.dependencies(model_cls, strong),
+                                 dependencies(model_cls, strong))
+
+        cache = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache, True)
+        with self.settings(DJENERATOR_SCHEMA_CACHE=True,
+                           DJENERATOR_CACHE_DIR=cache):
+            SCHEMA_GRAPHS.clear()
+            schema_graph("testapp")
+            self.assertEqual(len([
+                name for name in os.listdir(cache)
+                if name.startswith("schema-")
+            ]), 1)
+            SCHEMA_GRAPHS.clear()
+            loaded = schema_graph("testapp")
+            self.assertIsNot(loaded, graph)
+            self.assertEqual(loaded.to_dict(), graph.to_dict())
+            self.assertEqual(loaded.order, graph.order)
+        SCHEMA_GRAPHS.clear()
+
+
+def model_field(name, field):
+    """
+    Attach a field to TestModelX under a name, without adding it to the
+    model.
+    """
+    field.set_attributes_from_name(name)
+    field.model = TestModelX
+    return field
+
+
+class TestValuePools(TestCase):
+    def test(self):
+        regex = r"^[a-c]+$"
+        field1 = model_field("field1", models.CharField(
+            max_length=30, validators=[validators.RegexValidator(regex)]
+        ))
+        field2 = model_field("field2", models.CharField(
+            max_length=30, null=True, verbose_name="another",
+            validators=[validators.RegexValidator(regex)]
+        ))
+        field3 = model_field("field3", models.CharField(max_length=20))
+        self.assertEqual(field_signature(field1), field_signature(field2))
+        self.assertNotEqual(field_signature(field1), field_signature(field3))
+
+        self.assertIsNone(value_pool(field1))
+        VALUE_POOLS.clear()
+        with self.settings(DJENERATOR_VALUE_POOL=50,
+                           DJENERATOR_VALUE_POOL_COUNT=2):
+            pool = value_pool(field1)
+            self.assertEqual(len(set(pool)), 50)
+            for value in pool:
+                self.assertRegex(value, regex)
+                self.assertLessEqual(len(value), 30)
+            self.assertIs(value_pool(field2), pool)
+
+            values = generate_field_values(field2, 200, {})
+            self.assertEqual(len(values), 200)
+            self.assertTrue(set(values) <= set(pool))
+
+            value_pool(field3)
+            value_pool(model_field("field4", models.IntegerField()))
+            self.assertEqual(len(VALUE_POOLS), 2)
+            self.assertIsNot(value_pool(field1), pool)
+
+            generate_test_data("testapp", 20)
+        VALUE_POOLS.clear()
+
+
+class TestStoredValuePools(TestCase):
+    def test(self):
+        fields = [
+            models.CharField(max_length=30), models.IntegerField(),
+            models.FloatField(), models.BooleanField(),
+            models.DecimalField(max_digits=6, decimal_places=2),
+            models.DateTimeField(), models.DateField(), models.TimeField(),
+            models.DurationField(), models.UUIDField(), models.JSONField(),
+            models.BinaryField(), models.EmailField(),
+        ]
+        cache = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache, True)
+        with self.settings(DJENERATOR_VALUE_POOL=40,
+                           DJENERATOR_VALUE_POOL_CACHE=True,
+                           DJENERATOR_CACHE_DIR=cache):
+            for idx, field in enumerate(fields):
+                field = model_field("field%d" % idx, field)
+                VALUE_POOLS.clear()
+                values = list(value_pool(field))
+                self.assertTrue(os.path.isfile(pool_path(field)))
+                VALUE_POOLS.clear()
+                stored = value_pool(field)
+                if len(values) == 40:
+                    self.assertIsInstance(stored, MappedPool)
+                self.assertEqual(list(stored), values)
+
+            field = model_field("field", models.CharField(max_length=10))
+            VALUE_POOLS.clear()
+            values = list(value_pool(field))
+            with self.settings(DJENERATOR_VALUE_POOL=60):
+                VALUE_POOLS.clear()
+                more = list(value_pool(field))
+                self.assertEqual(more[:40], values)
+                self.assertEqual(len(set(more)), 60)
+                self.assertEqual(len(MappedPool(pool_path(field))), 60)
+
+            field = model_field("field", models.CharField(
+                max_length=10, validators=[lambda value: None]
+            ))
+            self.assertIsNone(pool_path(field))
+            self.assertEqual(len(value_pool(field)), 40)
+
+            with self.settings(DJENERATOR_VALUE_POOL_CACHE_SIZE=0):
+                VALUE_POOLS.clear()
+                value_pool(model_field("field", models.SlugField()))
+                self.assertFalse([
+                    name for name in os.listdir(cache)
+                    if name.startswith("value-pool-")
+                ])
+        VALUE_POOLS.clear()
+
+    def test_seeded_runs(self):
+        field = model_field("field", models.CharField(max_length=10))
+        cache = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache, True)
+
+        def seeded_pool(seed, now=0.0):
+            VALUE_POOLS.clear()
+            with use_stream(RandomStream(seed, now)):
+                return list(value_pool(field)), pool_path(field)
+
+        with self.settings(DJENERATOR_VALUE_POOL=40,
+                           DJENERATOR_VALUE_POOL_CACHE=True,
+                           DJENERATOR_CACHE_DIR=cache):
+            values, path = seeded_pool(1)
+            self.assertEqual(seeded_pool(1), (values, path))
+            self.assertEqual(seeded_pool(1, 1.0)[0], values)
+            self.assertNotEqual(seeded_pool(1, 1.0)[1], path)
+            other, other_path = seeded_pool(2)
+            self.assertNotEqual(other, values)
+            self.assertNotEqual(other_path, path)
+            # A pool of a seeded run is also not reused in memory.
+            with use_stream(RandomStream(1, 0.0)):
+                values = value_pool(field)
+            with use_stream(RandomStream(2, 0.0)):
+                self.assertIsNot(value_pool(field), values)
+            VALUE_POOLS.clear()
+            self.assertNotIn(pool_path(field), [path, other_path])
+        VALUE_POOLS.clear()
+
+    def test_unwritable_cache(self):
+        field = model_field("field", models.CharField(max_length=10))
+        cache = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache, True)
+        with self.settings(DJENERATOR_VALUE_POOL=40,
+                           DJENERATOR_VALUE_POOL_CACHE=True,
+                           DJENERATOR_CACHE_DIR=cache):
+            VALUE_POOLS.clear()
+            with mock.patch("djenerator.core.pools.write_pool",
+                            side_effect=OSError(28, "No space left")):
+                self.assertEqual(len(set(value_pool(field))), 40)
+            self.assertFalse(os.path.exists(pool_path(field)))
+            VALUE_POOLS.clear()
+            with mock.patch("djenerator.core.pools.cache_dir",
+                            side_effect=PermissionError(13, "Read-only")):
+                self.assertEqual(len(value_pool(field)), 40)
+            # A pool deleted by another process while trimming.
+            with mock.patch("os.listdir", return_value=[
+                "value-pool-deleted.bin"
+            ]):
+                trim_pool_cache(0)
+        VALUE_POOLS.clear()
+
+    def test_codecs(self):
+        tz = get_timezone("Africa/Cairo")
+        values = {
+            "datetime": [
+                datetime.datetime(1, 1, 1),
+                datetime.datetime(9999, 12, 31, 23, 59, 59, 999999),
+            ],
+            "aware": [
+                datetime.datetime(1890, 5, 1, 3, 4, 5, 6, tzinfo=tz),
+                datetime.datetime(2021, 7, 1, tzinfo=datetime.timezone.utc),
+            ],
+            "date": [datetime.date(1, 1, 1), datetime.date(9999, 12, 31)],
+            "time": [datetime.time(0), datetime.time(23, 59, 59, 999999)],
+        }
+        field = model_field("field", models.DateTimeField())
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+        path = os.path.join(directory, "pool.bin")
+        for name, items in values.items():
+            write_pool(path, values_codec(field, items), items)
+            stored = MappedPool(path)
+            self.assertEqual(list(stored), items)
+            if name == "aware":
+                self.assertEqual(
+                    [value.utcoffset() for value in stored],
+                    [value.utcoffset() for value in items],
+                )
+            stored.close()
+        self.assertIsNone(values_codec(field, [
+            datetime.time(1, tzinfo=datetime.timezone.utc)
+        ]))
+
+
+class TestRandomStreams(TestCase):
+    def draw(self, seed, *key):
+        with use_stream(RandomStream(seed)):
+            with child_stream(*key):
+                return (
+                    [thread_random.random() for _ in range(5)] +
+                    generate_integer_batch(100) + generate_string_batch(5, 20)
+                )
+
+    def test(self):
+        self.assertEqual(self.draw(1, "a"), self.draw(1, "a"))
+        self.assertNotEqual(self.draw(1, "a"), self.draw(1, "b"))
+        self.assertNotEqual(self.draw(1, "a"), self.draw(2, "a"))
+
+        stream = RandomStream(3)
+        first, second = stream.spawn("a"), stream.spawn("a")
+        self.assertNotEqual(first.seed, second.seed)
+        self.assertEqual(RandomStream(3).spawn("a").seed, first.seed)
+
+        results = {}
+
+        def worker(key):
+            results[key] = self.draw(5, key)
+
+        threads = [
+            threading.Thread(target=worker, args=(key, )) for key in "xyz"
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for key in "xyz":
+            self.assertEqual(results[key], self.draw(5, key))
+
+        rand.seed(11)
+        values = [thread_random.random() for _ in range(3)]
+        rand.seed(11)
+        self.assertEqual(values, [rand.random() for _ in range(3)])
+
+    def snapshot(self):
+        """
+        The values of the fields of all the models of the test app, except
+        the keys, in the order of their generation.
+        """
+        rows = {}
+        for model_cls in retrieve_models("testapp.models"):
+            names = [
+                field.attname for field in model_cls._meta.concrete_fields
+                if not field.primary_key and not is_related(field)
+            ]
+            queryset = model_cls.objects.order_by("pk")
+            rows[model_cls.__name__] = (
+                list(queryset.values_list(*names)) if names
+                else queryset.count()
+            )
+        return rows
+
+    def test_seeded_data(self):
+        rows = []
+        for _ in range(2):
+            TestModelY.objects.all().delete()
+            TestModelX.objects.all().delete()
+            generate_test_data("testapp", 20, models_cls=["TestModelY"],
+                               seed=42)
+            rows.append((
+                list(TestModelX.objects.order_by("pk").values_list(
+                    "field1X", flat=True
+                )),
+                list(TestModelY.objects.order_by("pk").values_list(
+                    "field1Y", "field2Y"
+                )),
+            ))
+        self.assertEqual(rows[0], rows[1])
+        self.assertEqual(len(rows[0][1]), 20)
+
+        # The whole app, with the custom generators of test_data and the
+        # dates relative to DJENERATOR_NOW.
+        snapshots = []
+        for _ in range(2):
+            for model_cls in retrieve_models("testapp.models"):
+                model_cls.objects.all().delete()
+            media = tempfile.mkdtemp()
+            self.addCleanup(shutil.rmtree, media, True)
+            rand.seed()
+            with self.settings(MEDIA_ROOT=media, DJENERATOR_NOW=1.6e9):
+                generate_test_data("testapp", 8, seed=42)
+            snapshots.append(self.snapshot())
+        self.assertEqual(snapshots[0], snapshots[1])
+        self.assertEqual(len(snapshots[0]["TestModel1"]), 8)
+        self.assertTrue(snapshots[0]["AllFieldsModel"])
+
+
+class TestColumnBatch(TestCase):
+    def test(self):
+        tz = get_timezone("Africa/Cairo")
+        now = datetime.datetime(2021, 3, 4, 5, 6, 7, 891011)
+        columns = {
+            "int": [1, -2 ** 63, 2 ** 63 - 1, None],
+            "float": [0.5, -1e300, None, 3.0],
+            "bool": [True, False, None, True],
+            "str": ["abc", "", "\u00e9\U0001f600", None],
+            "datetime": [now, now - datetime.timedelta(days=40000), None,
+                         now],
+            "date": [now.date(), datetime.date(1, 1, 1), None,
+                     datetime.date(9999, 12, 31)],
+            "object": [Decimal("1.5"), "a", 3, None],
+        }
+        columns["tz"] = [now.replace(tzinfo=tz), now.astimezone(tz), None,
+                         now.replace(tzinfo=tz)]
+        for kind, values in columns.items():
+            column = Column(values)
+            self.assertEqual(
+                column.kind, "datetime" if kind == "tz" else kind
+            )
+            self.assertEqual(list(column), values)
+            self.assertEqual(len(column), 4)
+            self.assertEqual(column[-1], values[-1])
+        self.assertEqual(Column([2 ** 63, 1]).kind, "object")
+        self.assertEqual(Column([None, None]).kind, "object")
+        self.assertEqual(
+            Column([now, now.replace(tzinfo=tz)]).kind, "object"
+        )
+
+        column = Column(["a", "b", "c"])
+        column[1] = None
+        column[2] = "d"
+        self.assertEqual(list(column), ["a", None, "d"])
+        column[0] = 1
+        self.assertEqual(column.kind, "object")
+        self.assertEqual(list(column), [1, None, "d"])
+        column = Column([1, 2, 3])
+        column[0] = None
+        column[1] = 5
+        self.assertEqual((column.kind, list(column)), ("int", [None, 5, 3]))
+        column[2] = 2 ** 70
+        self.assertEqual(list(column), [None, 5, 2 ** 70])
+
+        batch = ColumnBatch()
+        batch["a"] = [1, 2, 3]
+        batch["b"] = ["x", "y", "z"]
+        self.assertIn("a", batch)
+        self.assertEqual(list(batch), ["a", "b"])
+        self.assertEqual(
+            list(batch.rows([2, 0])),
+            [{"a": 3, "b": "z"}, {"a": 1, "b": "x"}],
+        )
+        values = list(range(10000))
+        self.assertLess(
+            sys.getsizeof(Column(values).data), 8 * 10000 + 1000
+        )
+
+
+class TestOutOfCore(TestCase):
+    def test(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+        with self.settings(DJENERATOR_SPILL_DIR=directory):
+            with spill_dir() as work_dir:
+                permutation = LazyPermutation(
+                    os.path.join(work_dir, "perm"), 1000
+                )
+                drawn = permutation.draw(400) + permutation.draw(700)
+                self.assertEqual(sorted(drawn), list(range(1000)))
+                permutation.close()
+
+                keys = SpilledKeys(CycleA, work_dir)
+                self.assertEqual(list(keys.columns), ["id"])
+                keys.append([CycleA(pk=pk) for pk in range(10)])
+                keys.append([CycleA(pk=pk) for pk in range(10, 15)])
+                self.assertEqual(list(keys), list(range(15)))
+                self.assertEqual(
+                    list(keys.iter_chunks()),
+                    [list(range(10)), list(range(10, 15))],
+                )
+                field = CycleC._meta.get_field("ca")
+                values = keys.sample(field, 10) + keys.sample(field, 10)
+                self.assertNotIn(None, values[:10])
+                self.assertEqual(
+                    sorted(filter(None.__ne__, values)), list(range(15))
+                )
+                self.assertRaises(
+                    AssertionError, keys.sample,
+                    TestModelC._meta.get_field("field2C"), 16
+                )
+                keys.close()
+            self.assertEqual(os.listdir(directory), [])
+
+            rows = []
+            for _ in range(2):
+                for model_cls in [TestModelE, TestModelC, TestModelB,
+                                  TestModelA]:
+                    model_cls.objects.all().delete()
+                with self.settings(DJENERATOR_OUT_OF_CORE=4):
+                    generate_test_data("testapp", 10,
+                                       models_cls=["TestModelE"], seed=7)
+                rows.append(list(
+                    TestModelE.objects.order_by("pk").values_list(
+                        "field1E__field1B", "field3E__field1C", "field4E"
+                    )
+                ))
+            self.assertEqual(rows[0], rows[1])
+            self.assertEqual(len(rows[0]), 10)
+            self.assertEqual(len(set(row[0] for row in rows[0])), 10)
+            self.assertTrue(TestModelE.field2E.through.objects.exists())
+            self.assertEqual(os.listdir(directory), [])
+
+    def test_unique_values(self):
+        model = TestModelA.objects.create(
+            field2A="a", field3A="1.1.1.1", field4A="1.1.1.1", field5A="::1",
+            field6A="::1", field7A="1.1.1.1",
+        )
+        for value in "ab":
+            TestModelB.objects.create(field1B=value, field2B=model)
+        field = TestModelB._meta.get_field("field1B")
+        self.assertEqual(
+            sorted(stored_values(field, list("abcd") + [None])), ["a", "b"]
+        )
+        values = generate_unstored_values(field, itertools.cycle("abcd"), 2)
+        self.assertEqual(sorted(values), ["c", "d"])
+        with self.settings(DJENERATOR_OUT_OF_CORE=4):
+            values = generate_field_values(
+                field, 2, {}, generators={"field1B": list("abcd")}
+            )
+        self.assertEqual(sorted(values), ["c", "d"])